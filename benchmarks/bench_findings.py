@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Findings database benchmark for su6oRecon.
+
+Fills a fresh findings database of each size with synthetic records spread
+over many programs (open ports, discovered paths, Nuclei findings and
+takeovers, in the proportions a real session has), then times typical
+`su6oRecon query` lookups against it. Lookups should stay in the
+milliseconds as the database grows.
+
+    python benchmarks/bench_findings.py --sizes 1000000,3000000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from findings import FindingsDB  # noqa: E402
+
+PROGRAMS = 200
+PRODUCTS = ("nginx", "Apache httpd", "Jetty", "OpenSSH", "Microsoft IIS httpd")
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+SEEN = "2026-01-01T00:00:00"
+
+# (label, query filters) timed at every size.
+QUERIES = (
+    ("non-standard Jetty", {"product": "jetty", "ports": "!80,443"}),
+    ("one host", {"host": "sub123.program7.test"}),
+    ("host suffix", {"target": "program7.test", "host": "*.program7.test"}),
+    ("critical, recent", {"severity": ["critical"], "since": SEEN}),
+    ("port 8443", {"ports": "8443"}),
+    ("ports 8000-9000", {"ports": "8000-9000"}),
+    ("template", {"template": "exposed-panel-3"}),
+)
+
+console = Console()
+
+
+def records(size):
+    """
+    (program, stage, key, record) tuples, `size` in total.
+    """
+    for i in range(size):
+        # Ten records per host, one of each kind.
+        program = f"program{i // 10 % PROGRAMS}.test"
+        host = f"sub{i // 10 // PROGRAMS}.{program}"
+        kind = i % 10
+        if kind < 5:
+            port = (80, 443, 8080, 8443, 22)[kind]
+            yield program, "port_scan", f"{host}|tcp/{port}", {
+                "host": host,
+                "port": port,
+                "protocol": "tcp",
+                "service": "ssh" if port == 22 else "http",
+                "product": PRODUCTS[(i // 10) % len(PRODUCTS)],
+                "version": "1.0",
+            }
+        elif kind < 9:
+            url = f"https://{host}/path{kind}"
+            yield program, "directory_scan", url, {
+                "host": host,
+                "url": url,
+                "status": 200 if kind % 2 else 403,
+                "length": 1000 + kind,
+            }
+        elif (i // 10) % 20 == 0:
+            yield program, "takeover", host, {"host": host, "service": "github"}
+        else:
+            template = f"exposed-panel-{(i // 10) % 50}"
+            yield program, "vulnerability_scan", f"{template}|{host}", {
+                "host": host,
+                "url": f"https://{host}/admin",
+                "template": template,
+                "severity": SEVERITIES[(i // 10) % len(SEVERITIES)],
+            }
+
+
+def fill(db, size):
+    """
+    Ingest the records stage by stage, as a run would. Returns rows stored.
+    """
+    groups = {}
+    for program, stage, key, record in records(size):
+        groups.setdefault((program, stage), []).append((key, record))
+        if len(groups) > 4 * PROGRAMS:
+            for (target, name), items in groups.items():
+                db.ingest(target, name, items, SEEN)
+            groups.clear()
+    for (target, name), items in groups.items():
+        db.ingest(target, name, items, SEEN)
+    return db.count()
+
+
+def run_one(size, repeat):
+    workdir = tempfile.mkdtemp(prefix=f"su6o-findings-{size}-")
+    try:
+        db = FindingsDB(os.path.join(workdir, "findings.db"))
+        started = time.perf_counter()
+        rows = fill(db, size)
+        record = {
+            "size": size,
+            "rows": rows,
+            "ingest_s": round(time.perf_counter() - started, 2),
+            "db_bytes": sum(
+                os.path.getsize(os.path.join(workdir, name))
+                for name in os.listdir(workdir)
+            ),
+            "queries": {},
+        }
+        for label, filters in QUERIES:
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                found = db.query(**filters)
+                times.append(time.perf_counter() - started)
+            record["queries"][label] = {
+                "ms": round(min(times) * 1000, 2),
+                "rows": len(found),
+            }
+        db.close()
+        return record
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--results", default=os.path.join(HERE, "findings_results.jsonl")
+    )
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = Table(title="su6oRecon findings database")
+    table.add_column("Size", justify="right")
+    table.add_column("Ingest s", justify="right")
+    table.add_column("k rows/s", justify="right")
+    table.add_column("DB MB", justify="right")
+    for label, _ in QUERIES:
+        table.add_column(f"{label} ms", justify="right")
+
+    with open(args.results, "a") as results:
+        for size in args.sizes:
+            console.print(f"[yellow]Running at {size}...[/yellow]")
+            record = run_one(size, args.repeat)
+            record["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            table.add_row(
+                str(size),
+                f"{record['ingest_s']:.1f}",
+                f"{size / max(record['ingest_s'], 1e-6) / 1000:.0f}",
+                f"{record['db_bytes'] / 1024 / 1024:.0f}",
+                *(
+                    f"{record['queries'][label]['ms']:.1f}"
+                    for label, _ in QUERIES
+                ),
+            )
+    console.print(table)
+    console.print(f"[green]Results appended to {args.results}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Report generation benchmark for su6oRecon.
+
+Builds a synthetic session of each size (subdomains, alive hosts, and per
+host port, directory, Nuclei and parameter results), then writes each report
+format in its own process and records wall time, CPU and peak RSS. Time and
+memory should grow linearly with the session size; the "per 1k" columns make
+that easy to check.
+
+    python benchmarks/bench_reports.py --sizes 1000,10000,50000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from reports import FORMATS  # noqa: E402
+from utils import SessionStore  # noqa: E402
+
+TARGET = "bench.test"
+
+console = Console()
+
+
+def build_session(workdir, size, alive=0.2, results=20):
+    """
+    Write a session for `size` subdomains into workdir/sessions.
+    """
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        store = SessionStore(TARGET)
+        names = [f"sub{i}.{TARGET}" for i in range(size)]
+        hosts = [f"https://{name}" for name in names[: max(1, int(size * alive))]]
+        store.save_stage("subdomains", names)
+        store.save_stage("alive_domains", hosts)
+        for stage, line in (
+            ("port_scan", "{n}/tcp open  http  nginx 1.{n}"),
+            ("directory_scan", "/path{n} [Status: 200, Size: {n}, Words: 10]"),
+            ("vulnerability_scan", "[tech-detect:nginx] [http] [info] {host}/{n}"),
+            ("parameters", "{host}/page?id={n}&q=FUZZ"),
+        ):
+            store.save_stage(
+                stage,
+                {
+                    host: [line.format(n=n, host=host) for n in range(results)]
+                    for host in hosts
+                },
+            )
+        store.save_stage("takeover", {"vulnerabilities": []})
+        store.close()
+    finally:
+        os.chdir(cwd)
+
+
+def run_one(workdir, fmt):
+    """
+    Write one format in a fresh process, measured with os.wait4.
+    """
+    code = (
+        f"import sys; sys.path.insert(0, {ROOT!r})\n"
+        "from reports import generate_reports\n"
+        "from utils import SessionStore\n"
+        f"store = SessionStore({TARGET!r}, resume=True)\n"
+        f"generate_reports(store, output_prefix='bench', formats=[{fmt!r}])\n"
+    )
+    started = time.monotonic()
+    with open(os.path.join(workdir, f"{fmt}.log"), "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-c", code], cwd=workdir, stdout=log, stderr=log
+        )
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.monotonic() - started
+    peak = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    size = sum(
+        os.path.getsize(os.path.join(workdir, "reports", name))
+        for name in os.listdir(os.path.join(workdir, "reports"))
+        if name.startswith("bench") and name.endswith("." + fmt)
+    )
+    return {
+        "format": fmt,
+        "returncode": os.waitstatus_to_exitcode(status),
+        "wall": round(wall, 3),
+        "cpu": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_kb": peak,
+        "report_bytes": size,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--alive", type=float, default=0.2)
+    parser.add_argument("--results-per-target", type=int, default=20)
+    parser.add_argument(
+        "--results", default=os.path.join(HERE, "report_results.jsonl")
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the work directories")
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.formats = [f for f in args.formats.split(",") if f]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = Table(title="su6oRecon report generation")
+    for column in ("Format", "Size", "Exit", "Wall s", "CPU s", "Peak RSS MB"):
+        table.add_column(column, justify="left" if column == "Format" else "right")
+    table.add_column("ms per 1k", justify="right")
+    table.add_column("Report KB", justify="right")
+
+    with open(args.results, "a") as results:
+        for size in args.sizes:
+            workdir = tempfile.mkdtemp(prefix=f"su6o-reports-{size}-")
+            console.print(f"[yellow]Building a session of {size}...[/yellow]")
+            # Built in a child process: on Linux a forked child starts with
+            # its parent's peak RSS, which would hide the writers' own.
+            builder = multiprocessing.Process(
+                target=build_session,
+                args=(workdir, size, args.alive, args.results_per_target),
+            )
+            builder.start()
+            builder.join()
+            for fmt in args.formats:
+                record = run_one(workdir, fmt)
+                record.update(
+                    {
+                        "size": size,
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "settings": {
+                            "alive": args.alive,
+                            "results_per_target": args.results_per_target,
+                        },
+                    }
+                )
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+                table.add_row(
+                    fmt,
+                    str(size),
+                    str(record["returncode"]),
+                    f"{record['wall']:.2f}",
+                    f"{record['cpu']:.2f}",
+                    f"{record['peak_rss_kb'] / 1024:.0f}",
+                    f"{record['wall'] * 1000 / (size / 1000):.0f}",
+                    f"{record['report_bytes'] / 1024:.0f}",
+                )
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+    console.print(table)
+    console.print(f"[green]Results appended to {args.results}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Subdomain deduplication benchmark for su6oRecon.
+
+Runs enumeration of each size against the fake assetfinder, subfinder and
+amass (which overlap, so about 1.8 lines come in per unique name) and
+records wall time and the peak RSS of the su6oRecon process for four
+modes, each in a fresh process:
+
+    legacy  every tool's stdout held in memory, then set() and sorted(),
+            as enumeration used to work
+    file    run_subdomain_enumeration(): on-disk dedupe into a names file,
+            as full and monitor run it
+    cached  the same twice with the tool cache on: the first run fills the
+            cache, the second is served from it
+    stream  enumerate_subdomains() written straight to a file
+
+All modes must give the same sorted names; all but "legacy" should keep a
+flat peak as the size grows.
+
+    python benchmarks/bench_subdomains.py --sizes 1000000,5000000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from run_benchmarks import install_fake_tools  # noqa: E402
+
+DOMAIN = "bench.test"
+MODES = ("legacy", "file", "cached", "stream")
+
+console = Console()
+
+
+def _legacy(domain):
+    from modules.runner import run_tool
+    from modules.subdomain import _STREAM_COMMANDS
+
+    async def gather():
+        return await asyncio.gather(
+            *(run_tool(command(domain)) for command in _STREAM_COMMANDS.values())
+        )
+
+    subdomains = set()
+    for _, stdout, _ in asyncio.run(gather()):
+        for sub in stdout.decode().split():
+            subdomains.add(sub.strip())
+    return sorted(subdomains)
+
+
+def run_one(mode, size, bin_dir, workdir):
+    """
+    One enumeration in this (fresh) process. Returns its measurements.
+    """
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+    os.environ["FAKE_SUBDOMAINS"] = str(size)
+    os.chdir(workdir)
+    from modules.cache import configure_cache
+    from modules.dedupe import read_names
+    from modules.subdomain import enumerate_subdomains, run_subdomain_enumeration
+
+    # A fresh cache per run, so earlier sizes are never served from it.
+    shutil.rmtree("cache", ignore_errors=True)
+    configure_cache(enabled=mode == "cached")
+    digest = hashlib.sha256()
+    count = 0
+    started = time.perf_counter()
+    if mode == "stream":
+        names = enumerate_subdomains(DOMAIN)
+        try:
+            with open("subdomains.txt", "w") as f:
+                for name in names:
+                    f.write(name + "\n")
+                    digest.update(name.encode() + b"\n")
+                    count += 1
+        finally:
+            names.close()
+    elif mode == "legacy":
+        names = _legacy(DOMAIN)
+        for name in names:
+            digest.update(name.encode() + b"\n")
+        count = len(names)
+    else:
+        path = run_subdomain_enumeration(DOMAIN, path=f"{mode}_subdomains.txt")
+        if mode == "cached":
+            path = run_subdomain_enumeration(DOMAIN, path=f"{mode}_subdomains.txt")
+        for name in read_names(path):
+            digest.update(name.encode() + b"\n")
+            count += 1
+    wall = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "size": size,
+        "unique": count,
+        "sha256": digest.hexdigest(),
+        "wall": round(wall, 2),
+        "peak_rss_kb": peak // 1024 if sys.platform == "darwin" else peak,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000000,5000000")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument(
+        "--results", default=os.path.join(HERE, "subdomain_results.jsonl")
+    )
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.modes = [mode for mode in args.modes.split(",") if mode]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = Table(title="su6oRecon subdomain deduplication")
+    for column in ("Mode", "Size", "Unique", "Wall s", "Peak RSS MB", "Same"):
+        table.add_column(column, justify="left" if column == "Mode" else "right")
+
+    workdir = tempfile.mkdtemp(prefix="su6o-subdomains-")
+    bin_dir = os.path.join(workdir, "bin")
+    install_fake_tools(bin_dir)
+    context = multiprocessing.get_context("spawn")
+    try:
+        with open(args.results, "a") as results:
+            for size in args.sizes:
+                digests = set()
+                for mode in args.modes:
+                    console.print(f"[yellow]Running {mode} at {size}...[/yellow]")
+                    # A fresh process per run, so each peak RSS is its own.
+                    with ProcessPoolExecutor(1, mp_context=context) as pool:
+                        record = pool.submit(
+                            run_one, mode, size, bin_dir, workdir
+                        ).result()
+                    record["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                    results.write(json.dumps(record) + "\n")
+                    results.flush()
+                    digests.add(record["sha256"])
+                    table.add_row(
+                        mode,
+                        str(size),
+                        str(record["unique"]),
+                        f"{record['wall']:.1f}",
+                        f"{record['peak_rss_kb'] / 1024:.0f}",
+                        "yes" if len(digests) == 1 else "NO",
+                    )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    console.print(table)
+    console.print(f"[green]Results appended to {args.results}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Target model benchmark for su6oRecon.
+
+Builds a synthetic alive-host list of each size, as httpx reports it (URLs,
+with the http and https variant of some hosts), parses it into Target
+records and reduces it to the per-tool units. Records time and the memory
+held per host by the raw strings, the Target records and the unit lists,
+measured with tracemalloc, plus the peak RSS of an untraced run.
+
+    python benchmarks/bench_targets.py --sizes 100000,1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from modules.targets import Target, unique_hosts, unique_urls  # noqa: E402
+
+console = Console()
+
+
+def alive_urls(size, both=0.3):
+    """
+    `size` hosts as URLs; a `both` share of them is listed under http too.
+    """
+    urls = []
+    step = round(1 / both) if both else 0
+    for i in range(size):
+        urls.append(f"https://sub{i}.bench.test")
+        if step and i % step == 0:
+            urls.append(f"http://sub{i}.bench.test")
+    return urls
+
+
+def measure(build, traced):
+    """
+    Run `build()` and return (result, seconds, bytes it left allocated).
+    Bytes are only counted when tracemalloc is on, which slows the run.
+    """
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0] if traced else 0
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0] - before if traced else 0
+    return result, elapsed, held
+
+
+def run_pass(size, both, traced=False):
+    record = {}
+    urls, _, record["raw_bytes"] = measure(lambda: alive_urls(size, both), traced)
+    targets, record["parse_s"], record["target_bytes"] = measure(
+        lambda: [Target.parse(url) for url in urls], traced
+    )
+    hosts, record["unique_hosts_s"], record["hosts_bytes"] = measure(
+        lambda: unique_hosts(targets), traced
+    )
+    web, record["unique_urls_s"], record["urls_bytes"] = measure(
+        lambda: unique_urls(targets), traced
+    )
+    record.update(inputs=len(urls), hosts=len(hosts), urls=len(web))
+    return record
+
+
+def run_one(size, both):
+    """
+    One untraced pass for time and peak RSS, then a traced one for bytes
+    per host. Meant to run in a fresh process per size.
+    """
+    record = {"size": size, **run_pass(size, both)}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record["peak_rss_kb"] = peak // 1024 if sys.platform == "darwin" else peak
+    tracemalloc.start()
+    traced = run_pass(size, both, traced=True)
+    tracemalloc.stop()
+    for key in ("raw_bytes", "target_bytes", "hosts_bytes", "urls_bytes"):
+        record[key] = traced[key]
+    for key in ("parse_s", "unique_hosts_s", "unique_urls_s"):
+        record[key] = round(record[key], 3)
+    return record
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument(
+        "--both", type=float, default=0.3, help="Share of hosts alive on http too"
+    )
+    parser.add_argument("--results", default=os.path.join(HERE, "target_results.jsonl"))
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = Table(title="su6oRecon target model")
+    for column in ("Size", "Inputs", "Unique URLs", "Parse s", "Dedupe s"):
+        table.add_column(column, justify="right")
+    for column in ("Raw B/host", "Target B/host", "Units B/host", "Peak RSS MB"):
+        table.add_column(column, justify="right")
+
+    with open(args.results, "a") as results:
+        for size in args.sizes:
+            console.print(f"[yellow]Running at {size}...[/yellow]")
+            # A fresh process per size, so each peak RSS is its own.
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                record = pool.submit(run_one, size, args.both).result()
+            record["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            table.add_row(
+                str(size),
+                str(record["inputs"]),
+                str(record["urls"]),
+                f"{record['parse_s']:.2f}",
+                f"{record['unique_hosts_s'] + record['unique_urls_s']:.2f}",
+                f"{record['raw_bytes'] / size:.0f}",
+                f"{record['target_bytes'] / size:.0f}",
+                f"{(record['hosts_bytes'] + record['urls_bytes']) / size:.0f}",
+                f"{record['peak_rss_kb'] / 1024:.0f}",
+            )
+    console.print(table)
+    console.print(f"[green]Results appended to {args.results}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Stand-in for the external recon tools, used by run_benchmarks.py.
+
+The harness installs one wrapper per tool name on PATH; the wrapper calls
+main() with the tool it impersonates. Output is synthetic but shaped like
+the real tool's, deterministic, and sized through environment variables:
+
+    FAKE_SUBDOMAINS    subdomains the enumerators report in total (1000)
+    FAKE_ALIVE         fraction of names httpx reports alive (0.2)
+    FAKE_FINDINGS      fraction of targets with a nuclei/subjack hit (0.05)
+    FAKE_RESULTS       result lines per target for ffuf/ParamSpider (20)
+    FAKE_LATENCY       seconds each invocation sleeps before answering (0)
+    FAKE_ITEM_LATENCY  extra seconds per input line for list tools (0)
+
+No tool touches the network.
+"""
+
+import json
+import os
+import sys
+import time
+import zlib
+
+
+def _env(name, default):
+    return type(default)(os.environ.get(name, default))
+
+
+def subdomains(domain, count):
+    return [f"sub{i}.{domain}" for i in range(count)]
+
+
+def _picked(name, fraction):
+    return zlib.crc32(name.encode()) % 10000 < fraction * 10000
+
+
+def is_alive(name):
+    return _picked(name, _env("FAKE_ALIVE", 0.2))
+
+
+def has_finding(name):
+    return _picked("finding:" + name, _env("FAKE_FINDINGS", 0.05))
+
+
+def _host(target):
+    return target.split("://")[-1].split("/")[0]
+
+
+def _option(args, *names):
+    for name in names:
+        if name in args:
+            index = args.index(name)
+            if index + 1 < len(args):
+                return args[index + 1]
+    return None
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _item_delay(count):
+    delay = _env("FAKE_ITEM_LATENCY", 0.0)
+    if delay:
+        time.sleep(delay * count)
+
+
+def _enumerate(domain, part):
+    # The three enumerators overlap, like the real ones, so deduplication
+    # has work to do: assetfinder covers the first 60%, subfinder the last
+    # 70% and amass every other name. Written in blocks, so millions of
+    # names do not have to fit in memory.
+    count = _env("FAKE_SUBDOMAINS", 1000)
+    if part == "assetfinder":
+        indexes = range(count * 6 // 10)
+    elif part == "subfinder":
+        indexes = range(count * 3 // 10, count)
+    else:
+        indexes = range(0, count, 2)
+    for start in range(0, len(indexes), 10000):
+        block = indexes[start : start + 10000]
+        sys.stdout.write("".join(f"sub{i}.{domain}\n" for i in block))
+
+
+def _httpx(args):
+    lines = [line.strip() for line in sys.stdin if line.strip()]
+    _item_delay(len(lines))
+    for line in lines:
+        if is_alive(_host(line)):
+            url = line if "://" in line else f"https://{line}"
+            sys.stdout.write(url + "\n")
+
+
+def _nmap_ports(host):
+    record = []
+    for port, service in ((80, "http"), (443, "https")):
+        record.append((port, service, "nginx", "1.25.3"))
+    if zlib.crc32(host.encode()) % 5 == 0:
+        record.append((22, "ssh", "OpenSSH", "9.6"))
+    return record
+
+
+def _nmap_xml(hosts):
+    yield '<?xml version="1.0"?>'
+    yield "<nmaprun>"
+    for host in hosts:
+        parts = [
+            f'<host><status state="up"/>'
+            f'<address addr="{host}" addrtype="ipv4"/><ports>'
+        ]
+        for port, service, product, version in _nmap_ports(host):
+            parts.append(
+                f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                f'<service name="{service}" product="{product}" '
+                f'version="{version}"/></port>'
+            )
+        parts.append("</ports></host>")
+        yield "".join(parts)
+    yield "</nmaprun>"
+
+
+def _output(path):
+    # "-" is stdout, as with the real tools.
+    return sys.stdout if path == "-" else open(path, "w")
+
+
+def _nmap(args):
+    xml_file = _option(args, "-oX")
+    if "-iL" in args:
+        hosts = _read_lines(_option(args, "-iL"))
+        _item_delay(len(hosts))
+    else:
+        hosts = [args[-1]]
+    if xml_file:
+        f = _output(xml_file)
+        for line in _nmap_xml(hosts):
+            f.write(line + "\n")
+            f.flush()
+        if f is not sys.stdout:
+            f.close()
+        return
+    target = hosts[0]
+    lines = [f"Nmap scan report for {target}", "PORT    STATE SERVICE VERSION"]
+    for port, service, product, version in _nmap_ports(target):
+        lines.append(f"{port}/tcp open  {service} {product} {version}")
+    with open(_option(args, "-oN"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _ffuf(args):
+    url = _option(args, "-u")
+    results = [
+        {
+            "input": {"FUZZ": f"path{i}"},
+            "status": 200 if i % 3 else 403,
+            "length": 1000 + i,
+            "words": 50 + i,
+            "lines": 10 + i,
+            "url": url.replace("FUZZ", f"path{i}"),
+        }
+        for i in range(_env("FAKE_RESULTS", 20))
+    ]
+    if "-json" in args:
+        for result in results:
+            sys.stdout.write(json.dumps(result) + "\n")
+        return
+    with open(_option(args, "-o"), "w") as f:
+        json.dump({"commandline": " ".join(args), "results": results}, f)
+
+
+def _gowitness(args):
+    url = _option(args, "--url")
+    directory = _option(args, "--destination") or "screenshots"
+    os.makedirs(directory, exist_ok=True)
+    name = "".join(c if c.isalnum() else "-" for c in url)
+    with open(os.path.join(directory, name + ".png"), "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + bytes(2048))
+
+
+def _paramspider(args):
+    domain = _option(args, "--domain", "-d")
+    lines = [
+        f"https://{_host(domain)}/page{i}?id=FUZZ"
+        for i in range(_env("FAKE_RESULTS", 20))
+    ]
+    with open(_option(args, "--output", "-o"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _subjack(args):
+    hosts = _read_lines(_option(args, "-w"))
+    _item_delay(len(hosts))
+    with open(_option(args, "-o"), "w") as f:
+        for host in hosts:
+            if has_finding(host):
+                f.write(f"[Vulnerable] {host} (github)\n")
+
+
+def _nuclei_finding(url):
+    return {
+        "template-id": "fake-exposure",
+        "info": {"name": "Fake exposure", "severity": "medium"},
+        "host": url,
+        "url": url,
+        "matched-at": url.rstrip("/") + "/.git/config",
+    }
+
+
+def _nuclei(args):
+    if "-l" in args:
+        urls = _read_lines(_option(args, "-l"))
+        _item_delay(len(urls))
+        for url in urls:
+            if has_finding(_host(url)):
+                sys.stdout.write(json.dumps(_nuclei_finding(url)) + "\n")
+        return
+    url = _option(args, "-u")
+    if "-jsonl" in args:
+        if has_finding(_host(url)):
+            sys.stdout.write(json.dumps(_nuclei_finding(url)) + "\n")
+        return
+    with open(_option(args, "-o"), "w") as f:
+        if has_finding(_host(url)):
+            finding = _nuclei_finding(url)
+            f.write(f"[{finding['template-id']}] [http] [medium] {url}\n")
+
+
+TOOLS = {
+    "assetfinder": lambda args: _enumerate(args[-1], "assetfinder"),
+    "subfinder": lambda args: _enumerate(_option(args, "-d"), "subfinder"),
+    "amass": lambda args: _enumerate(_option(args, "-d"), "amass"),
+    "httpx": _httpx,
+    "nmap": _nmap,
+    "ffuf": _ffuf,
+    "gowitness": _gowitness,
+    "paramspider": _paramspider,
+    "subjack": _subjack,
+    "nuclei": _nuclei,
+}
+
+
+def main(tool, args=None):
+    args = sys.argv[1:] if args is None else args
+    latency = _env("FAKE_LATENCY", 0.0)
+    if latency:
+        time.sleep(latency)
+    try:
+        TOOLS[tool](args)
+    except OSError as e:
+        sys.stderr.write(f"{tool}: {e}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(os.path.basename(sys.argv[1]), sys.argv[2:]))
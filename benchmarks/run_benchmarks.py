@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark harness for su6oRecon.
+
+Puts fake_tool.py stand-ins for every external tool on PATH, runs `full`
+and the single-tool commands against synthetic targets of each size, and
+appends one JSON line per run to the results file (wall time, CPU, peak
+RSS, session and report sizes, plus the git commit) so runs can be compared
+across commits.
+
+    python benchmarks/run_benchmarks.py --sizes 1000,10000 \\
+        --scenarios full,subdomain,httpx --full-args "--nmap-batch"
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from fake_tool import TOOLS, is_alive, subdomains  # noqa: E402
+
+DOMAIN = "bench.test"
+SCENARIOS = [
+    "full",
+    "subdomain",
+    "httpx",
+    "screenshot",
+    "nmap",
+    "fuzz",
+    "nuclei",
+    "params",
+    "takeover",
+]
+# Commands that take --concurrency for their process pool.
+POOLED = {"screenshot", "nmap", "fuzz", "nuclei", "params"}
+
+console = Console()
+
+
+def install_fake_tools(bin_dir):
+    os.makedirs(bin_dir, exist_ok=True)
+    for tool in TOOLS:
+        path = os.path.join(bin_dir, tool)
+        with open(path, "w") as f:
+            f.write(
+                f"#!{sys.executable} -S\n"
+                "import sys\n"
+                f"sys.path.insert(0, {HERE!r})\n"
+                "from fake_tool import main\n"
+                f"sys.exit(main({tool!r}))\n"
+            )
+        os.chmod(path, 0o755)
+
+
+def prepare_inputs(workdir, size):
+    names = subdomains(DOMAIN, size)
+    alive = [f"https://{name}" for name in names if is_alive(name)]
+    with open(os.path.join(workdir, "names.txt"), "w") as f:
+        f.write("\n".join(names) + "\n")
+    with open(os.path.join(workdir, "alive.txt"), "w") as f:
+        f.write("\n".join(alive) + "\n")
+    return len(alive)
+
+
+def command_for(scenario, args):
+    if scenario == "full":
+        return [
+            "full",
+            DOMAIN,
+            "--concurrency",
+            str(args.concurrency),
+            "--parallel",
+            str(args.parallel),
+        ] + shlex.split(args.full_args)
+    if scenario == "subdomain":
+        return ["subdomain", DOMAIN]
+    if scenario == "httpx":
+        return ["httpx", "names.txt"]
+    cmd = [scenario, "alive.txt"]
+    if scenario in POOLED:
+        cmd += ["--concurrency", str(args.concurrency)]
+    return cmd
+
+
+def _tree_size(path):
+    total = files = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+            files += 1
+    return total, files
+
+
+def run_one(workdir, env, scenario, args):
+    """
+    Run one su6oRecon command and measure it with os.wait4, whose rusage
+    covers su6oRecon and every tool process it waited for.
+    """
+    cmd = [sys.executable, os.path.join(ROOT, "su6oRecon.py")]
+    if not args.cache:
+        cmd.append("--no-cache")
+    cmd += command_for(scenario, args)
+    log_path = os.path.join(workdir, f"{scenario}.log")
+    started = time.monotonic()
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.monotonic() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    session_bytes, _ = _tree_size(os.path.join(workdir, "sessions"))
+    report_bytes, report_files = _tree_size(os.path.join(workdir, "reports"))
+    peak = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "scenario": scenario,
+        "command": cmd[2:],
+        "returncode": proc.returncode,
+        "wall": round(wall, 3),
+        "cpu_user": round(usage.ru_utime, 3),
+        "cpu_sys": round(usage.ru_stime, 3),
+        "peak_rss_kb": peak,
+        "session_bytes": session_bytes,
+        "report_bytes": report_bytes,
+        "report_files": report_files,
+        "log": log_path if args.keep else None,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "-C", ROOT, "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument(
+        "--full-args", default="", help="Extra options for the full command"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--item-latency", type=float, default=0.0)
+    parser.add_argument("--alive", type=float, default=0.2)
+    parser.add_argument("--findings", type=float, default=0.05)
+    parser.add_argument("--results-per-target", type=int, default=20)
+    parser.add_argument("--results", default=os.path.join(HERE, "results.jsonl"))
+    parser.add_argument("--cache", action="store_true", help="Keep the tool cache on")
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the work directories and logs"
+    )
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit = git_commit()
+    # Set here as well as for the runs, so the input files written by
+    # prepare_inputs() agree with what the fake httpx reports.
+    os.environ.update(
+        FAKE_ALIVE=str(args.alive),
+        FAKE_FINDINGS=str(args.findings),
+        FAKE_RESULTS=str(args.results_per_target),
+        FAKE_LATENCY=str(args.latency),
+        FAKE_ITEM_LATENCY=str(args.item_latency),
+    )
+    table = Table(title=f"su6oRecon benchmarks ({commit or 'unknown commit'})")
+    for column in ("Scenario", "Size", "Alive", "Exit", "Wall s", "CPU s"):
+        table.add_column(column, justify="left" if column == "Scenario" else "right")
+    table.add_column("Peak RSS MB", justify="right")
+    table.add_column("Session KB", justify="right")
+    table.add_column("Reports KB", justify="right")
+
+    with open(args.results, "a") as results:
+        for size in args.sizes:
+            for scenario in args.scenarios:
+                # A fresh directory per run so sessions, caches and reports
+                # from one run never leak into the next.
+                workdir = tempfile.mkdtemp(prefix=f"su6o-bench-{scenario}-{size}-")
+                bin_dir = os.path.join(workdir, "bin")
+                install_fake_tools(bin_dir)
+                alive = prepare_inputs(workdir, size)
+                env = dict(
+                    os.environ,
+                    PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+                    FAKE_SUBDOMAINS=str(size),
+                )
+                console.print(f"[yellow]Running {scenario} at {size}...[/yellow]")
+                record = run_one(workdir, env, scenario, args)
+                record.update(
+                    {
+                        "commit": commit,
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "size": size,
+                        "alive": alive,
+                        "settings": {
+                            "concurrency": args.concurrency,
+                            "parallel": args.parallel,
+                            "latency": args.latency,
+                            "item_latency": args.item_latency,
+                            "cache": args.cache,
+                        },
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                    }
+                )
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+                if not args.keep:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                table.add_row(
+                    scenario,
+                    str(size),
+                    str(alive),
+                    str(record["returncode"]),
+                    f"{record['wall']:.2f}",
+                    f"{record['cpu_user'] + record['cpu_sys']:.2f}",
+                    f"{record['peak_rss_kb'] / 1024:.0f}",
+                    f"{record['session_bytes'] / 1024:.0f}",
+                    f"{record['report_bytes'] / 1024:.0f}",
+                )
+    console.print(table)
+    console.print(f"[green]Results appended to {args.results}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,5 +21,10 @@ def run_setup_wizard():
         config["telegram_chat_id"] = chat_id.strip()
     else:
         print("Skipping Telegram setup. You can configure it later via config.")
+    templates = Prompt.ask(
+        "Path to Nuclei templates (leave empty to use nuclei's default)", default=""
+    )
+    if templates.strip():
+        config["nuclei_templates"] = templates.strip()
     save_config(config)
     print("[green]Setup complete![/green] Your configuration has been saved.")
\ No newline at end of file
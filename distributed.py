@@ -0,0 +1,471 @@
+"""
+Coordinator/worker mode: the coordinator runs enumeration and probing and
+serves per-host scan work over TCP; `su6oRecon worker` processes lease work
+items, run the regular modules/ functions and send the results back.
+
+The protocol is one JSON object per line in each direction:
+    {"op": "lease", "worker": id}                 -> {"item": {...} | null}
+    {"op": "heartbeat", "worker": id, "id": n}    -> {"ok": bool}
+    {"op": "complete", "worker": id, "id": n, "result": ...} -> {"ok": bool}
+    {"op": "fail", "worker": id, "id": n, "error": text}     -> {"ok": bool}
+Every request carries "token" when the coordinator was given one.
+"""
+
+import collections
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import traceback
+import uuid
+from rich import print
+
+from modules.directory_scan import run_directory_scan
+from modules.metrics import get_metrics
+from modules.param_finder import run_param_spider
+from modules.portscan import run_batched_port_scan, run_port_scan
+from modules.runner import PoolCancelled, deadline_left, terminate_all
+from modules.takeover import run_subjack
+from modules.vulnscan import run_batched_vulnerability_scan, run_vulnerability_scan
+from utils import merge_results
+
+DEFAULT_PORT = 7878
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+# Targets per work item for stages that run in batch mode (nmap -iL, nuclei -l).
+BATCH_CHUNK = 64
+
+
+def parse_address(value, default_host="127.0.0.1"):
+    """
+    Parse "host:port", "host" or ":port" into (host, port).
+    """
+    host, _, port = value.rpartition(":") if ":" in value else (value, "", "")
+    return host.strip("[]") or default_host, int(port or DEFAULT_PORT)
+
+
+# What a worker runs for each kind of work item. Per-target stages return
+# {target: result}; takeover returns one result for the whole item.
+TASKS = {
+    "port_scan": lambda targets, options: (
+        run_batched_port_scan if options.get("batch") else run_port_scan
+    )(
+        targets,
+        prescan_ports=options.get("prescan_ports"),
+        prescan_options=options.get("prescan_options"),
+    ),
+    "directory_scan": lambda targets, options: run_directory_scan(targets),
+    "vulnerability_scan": lambda targets, options: (
+        run_batched_vulnerability_scan(
+            targets,
+            templates=options.get("templates"),
+            tags=options.get("tags"),
+            severity=options.get("severity"),
+        )
+        if options.get("batch")
+        else run_vulnerability_scan(
+            targets,
+            templates=options.get("templates"),
+            tags=options.get("tags"),
+            severity=options.get("severity"),
+        )
+    ),
+    "parameters": lambda targets, options: run_param_spider(targets),
+    "takeover": lambda targets, options: run_subjack(targets),
+}
+
+
+class WorkQueue:
+    """
+    Work items with leases. A leased item goes back to the queue when its
+    worker stops sending heartbeats or reports a failure, until it has been
+    tried `max_attempts` times.
+    """
+
+    def __init__(
+        self, token=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS
+    ):
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.workers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = collections.deque()
+        self._items = {}
+
+    def submit(self, stage, chunks, options):
+        """
+        Queue one item per chunk of targets. Returns a queue.Queue that
+        receives (targets, result) for every finished item; result is None
+        for items that failed every attempt.
+        """
+        finished = queue.Queue()
+        with self._lock:
+            for targets in chunks:
+                item_id = next(self._ids)
+                self._items[item_id] = {
+                    "id": item_id,
+                    "stage": stage,
+                    "targets": targets,
+                    "options": options,
+                    "attempts": 0,
+                    "worker": None,
+                    "expires": None,
+                    "finished": finished,
+                }
+                self._pending.append(item_id)
+        return finished
+
+    def handle(self, request):
+        if self.token and request.get("token") != self.token:
+            return {"error": "unauthorized"}
+        op = request.get("op")
+        worker = request.get("worker")
+        if op == "lease":
+            return {"item": self._lease(worker)}
+        if op == "heartbeat":
+            return {"ok": self._extend(request.get("id"), worker)}
+        if op == "complete":
+            result = request.get("result")
+            return {"ok": self._finish(request.get("id"), worker, result)}
+        if op == "fail":
+            print(
+                f"[red]Worker {worker} failed item {request.get('id')}:[/red] "
+                f"{request.get('error')}"
+            )
+            return {"ok": self._retry(request.get("id"), worker)}
+        return {"error": f"unknown op {op!r}"}
+
+    def _lease(self, worker):
+        with self._lock:
+            if worker not in self.workers:
+                self.workers.add(worker)
+                print(f"[cyan]Worker {worker} connected.[/cyan]")
+            while self._pending:
+                item = self._items.get(self._pending.popleft())
+                if item is None:
+                    continue
+                item["attempts"] += 1
+                item["worker"] = worker
+                item["expires"] = time.monotonic() + self.lease_seconds
+                return {
+                    "id": item["id"],
+                    "stage": item["stage"],
+                    "targets": item["targets"],
+                    "options": item["options"],
+                    "lease_seconds": self.lease_seconds,
+                }
+        return None
+
+    def _extend(self, item_id, worker):
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None or item["worker"] != worker:
+                return False
+            item["expires"] = time.monotonic() + self.lease_seconds
+            return True
+
+    def _finish(self, item_id, worker, result):
+        with self._lock:
+            item = self._items.get(item_id)
+            # A late result from a worker whose lease ran out is still good,
+            # as long as nobody else has finished the item yet.
+            if item is None:
+                return False
+            del self._items[item_id]
+        item["finished"].put((item["targets"], result))
+        return True
+
+    def _retry(self, item_id, worker=None):
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None or (worker is not None and item["worker"] != worker):
+                return False
+            item["worker"] = None
+            item["expires"] = None
+            if item["attempts"] < self.max_attempts:
+                self._pending.append(item_id)
+                return True
+            del self._items[item_id]
+        print(
+            f"[red]Giving up on {item['stage']} for {len(item['targets'])} "
+            f"target(s) after {item['attempts']} attempt(s).[/red]"
+        )
+        item["finished"].put((item["targets"], None))
+        return True
+
+    def cancel(self, finished):
+        """
+        Drop the unfinished items of one submit() call, so they are no longer
+        leased and late results for them are ignored. Returns their targets.
+        """
+        with self._lock:
+            dropped = [
+                item_id
+                for item_id, item in self._items.items()
+                if item["finished"] is finished
+            ]
+            items = [self._items.pop(item_id) for item_id in dropped]
+        return [target for item in items for target in item["targets"]]
+
+    def expire(self):
+        """
+        Requeue items whose lease ran out.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                (item_id, item["worker"])
+                for item_id, item in self._items.items()
+                if item["expires"] is not None and item["expires"] < now
+            ]
+        for item_id, worker in expired:
+            print(
+                f"[yellow]Lease of item {item_id} expired (worker {worker}).[/yellow]"
+            )
+            self._retry(item_id, worker)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                return
+            response = self.server.work.handle(request)
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """
+    Serves work items to workers and hands their results back to the stage
+    that queued them. Stage functions call map() or gather() instead of
+    running the tools locally. Both return early with what is finished once
+    the stage or run deadline passes.
+    """
+
+    def __init__(self, address, token=None, lease_seconds=LEASE_SECONDS):
+        self.address = parse_address(address)
+        self.work = WorkQueue(token, lease_seconds, MAX_ATTEMPTS)
+        self._stopping = threading.Event()
+        self._server = None
+
+    def start(self):
+        self._server = _Server(self.address, _Handler)
+        self._server.work = self.work
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        print(f"[green]Coordinator listening on {host}:{port}[/green]")
+        if host not in ("127.0.0.1", "::1", "localhost") and not self.work.token:
+            print("[yellow]Listening beyond localhost without --token.[/yellow]")
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _results(self, stage, chunks, options):
+        finished = self.work.submit(stage, chunks, options or {})
+        print(f"[yellow]Queued {len(chunks)} {stage} work item(s).[/yellow]")
+        for done in range(1, len(chunks) + 1):
+            while True:
+                if self._stopping.is_set():
+                    raise PoolCancelled()
+                left = deadline_left()
+                if left is not None and left <= 0:
+                    # Like the local pool: what is not done by the deadline
+                    # is left out and recorded as partial.
+                    unfinished = self.work.cancel(finished)
+                    print(
+                        f"[yellow]Deadline reached; {len(unfinished)} {stage} "
+                        "target(s) left unfinished on the workers.[/yellow]"
+                    )
+                    for target in unfinished:
+                        get_metrics().record_partial(
+                            target, "deadline reached before a worker finished it"
+                        )
+                    return
+                try:
+                    targets, result = finished.get(
+                        timeout=1 if left is None else min(1, left)
+                    )
+                    break
+                except queue.Empty:
+                    self.work.expire()
+            if done % 50 == 0 or done == len(chunks):
+                print(f"[cyan]{stage}: {done}/{len(chunks)} work item(s) done.[/cyan]")
+            yield targets, result
+
+    def map(
+        self, stage, targets, options=None, chunk=1, completed=None, on_result=None
+    ):
+        """
+        Run a per-target stage on the workers, `chunk` targets per item.
+        Same contract as run_pool: targets in `completed` are skipped,
+        `on_result` is called per new result, and the returned dict is in
+        target order without targets that produced no result.
+        """
+        targets = list(targets)
+        completed = completed or {}
+        todo = [target for target in targets if target not in completed]
+        chunks = [todo[i : i + chunk] for i in range(0, len(todo), chunk)]
+        fresh = {}
+        for item_targets, result in self._results(stage, chunks, options):
+            for target in item_targets:
+                value = (result or {}).get(target)
+                if value is not None:
+                    fresh[target] = value
+                    if on_result:
+                        on_result(target, value)
+        results = {}
+        for target in targets:
+            value = completed[target] if target in completed else fresh.get(target)
+            if value is not None:
+                results[target] = value
+        return results
+
+    def gather(self, stage, targets, options=None, chunk=256):
+        """
+        Run a whole-list stage (takeover) on the workers in chunks and merge
+        the chunk results.
+        """
+        targets = list(targets)
+        chunks = [targets[i : i + chunk] for i in range(0, len(targets), chunk)]
+        merged = {}
+        for _, result in self._results(stage, chunks, options):
+            if result:
+                merged = merge_results(merged, result)
+        return merged
+
+
+class _Connection:
+    """
+    Line-based JSON client that reconnects after the coordinator restarts.
+    """
+
+    def __init__(self, address, token):
+        self.address = address
+        self.token = token
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def request(self, **request):
+        if self.token:
+            request["token"] = self.token
+        data = (json.dumps(request) + "\n").encode()
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._sock = socket.create_connection(self.address, timeout=30)
+                    self._file = self._sock.makefile("rb")
+                self._sock.sendall(data)
+                line = self._file.readline()
+                if not line:
+                    raise ConnectionError("coordinator closed the connection")
+            except OSError:
+                self.close()
+                raise
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+
+def _heartbeat(conn, worker, item, stop):
+    interval = max(1.0, item["lease_seconds"] / 3)
+    while not stop.wait(interval):
+        try:
+            conn.request(op="heartbeat", worker=worker, id=item["id"])
+        except (OSError, RuntimeError):
+            pass
+
+
+def _work_loop(address, token, worker, stop, poll_interval):
+    conn = _Connection(address, token)
+    waiting = False
+    while not stop.is_set():
+        try:
+            item = conn.request(op="lease", worker=worker)["item"]
+        except (OSError, RuntimeError, ValueError) as e:
+            if not waiting:
+                print(
+                    f"[yellow]Waiting for coordinator at "
+                    f"{address[0]}:{address[1]} ({e})[/yellow]"
+                )
+                waiting = True
+            stop.wait(poll_interval)
+            continue
+        waiting = False
+        if item is None:
+            stop.wait(poll_interval)
+            continue
+        print(
+            f"[yellow]{worker}: {item['stage']} on {len(item['targets'])} "
+            f"target(s)[/yellow]"
+        )
+        beating = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(conn, worker, item, beating), daemon=True
+        ).start()
+        try:
+            result = TASKS[item["stage"]](item["targets"], item["options"])
+            reply = {"op": "complete", "result": result}
+        except Exception:
+            reply = {"op": "fail", "error": traceback.format_exc(limit=3)}
+        finally:
+            beating.set()
+        for _ in range(5):
+            try:
+                conn.request(worker=worker, id=item["id"], **reply)
+                break
+            except (OSError, RuntimeError):
+                stop.wait(poll_interval)
+    conn.close()
+
+
+def run_worker(address, concurrency=1, token=None, poll_interval=2.0):
+    """
+    Pull work items from the coordinator at `address` with `concurrency`
+    items in progress at a time, until interrupted.
+    """
+    address = parse_address(address)
+    base = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=_work_loop,
+            args=(address, token, f"{base}/{i}", stop, poll_interval),
+            daemon=True,
+        )
+        for i in range(max(1, concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+    print(f"[green]Worker {base} serving {address[0]}:{address[1]}[/green]")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop.set()
+        terminate_all()
+        raise
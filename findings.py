@@ -0,0 +1,386 @@
+"""
+Local findings database. Parsers turn the results of the scan stages into
+typed records (open ports, discovered paths, Nuclei findings, takeovers),
+which are kept across runs and programs in findings/findings.db (SQLite),
+indexed for the lookups `su6oRecon query` makes.
+"""
+
+import itertools
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from modules.directory_scan import result_record
+from modules.portscan import parse_nmap_text
+from modules.takeover import parse_takeover
+from modules.targets import host_of
+from reports import SessionReader
+from utils import MultiSessionStore
+
+DB_PATH = os.path.join("findings", "findings.db")
+STAGES = ("port_scan", "directory_scan", "vulnerability_scan", "takeover")
+# Typed columns a record may fill; the rest stay NULL.
+COLUMNS = (
+    "host",
+    "ip",
+    "port",
+    "protocol",
+    "service",
+    "product",
+    "version",
+    "url",
+    "status",
+    "length",
+    "words",
+    "lines",
+    "template",
+    "name",
+    "severity",
+)
+# Rows written per executemany() call while ingesting.
+BATCH_SIZE = 10000
+# Text lines of nuclei versions without -jsonl: [template] [proto] [severity] url
+_NUCLEI_LINE = re.compile(r"^\[([^\]]+)\]\s+\[[^\]]*\]\s+\[([^\]]+)\]\s+(\S+)")
+
+
+def port_records(host, result):
+    """
+    One record per open port of a port_scan result: {"ip", "ports"} records,
+    or the nmap text of older sessions.
+    """
+    if isinstance(result, str):
+        ip, ports = None, parse_nmap_text(result)
+    elif isinstance(result, dict):
+        ip, ports = result.get("ip"), result.get("ports") or []
+    else:
+        return
+    for port in ports:
+        if port.get("state") not in (None, "open"):
+            continue
+        yield f"{host}|{port.get('protocol')}/{port['port']}", {
+            "host": host,
+            "ip": ip,
+            "port": port["port"],
+            "protocol": port.get("protocol"),
+            "service": (port.get("service") or "").lower() or None,
+            "product": port.get("product"),
+            "version": port.get("version"),
+        }
+
+
+def path_records(url, result):
+    """
+    One record per path ffuf found: parsed records, or the lines of ffuf's
+    JSON output file in older sessions.
+    """
+    for item in result or []:
+        if isinstance(item, str):
+            try:
+                data = json.loads(item)
+            except json.JSONDecodeError:
+                continue
+            items = data.get("results", []) if isinstance(data, dict) else []
+            parsed = map(result_record, items)
+        else:
+            parsed = [item]
+        for hit in parsed:
+            if not hit or not hit.get("url"):
+                continue
+            yield hit["url"], {
+                "host": host_of(hit["url"]),
+                "url": hit["url"],
+                "status": hit.get("status"),
+                "length": hit.get("length"),
+                "words": hit.get("words"),
+                "lines": hit.get("lines"),
+            }
+
+
+def nuclei_records(url, result):
+    """
+    One record per Nuclei finding: parsed -jsonl records, or the text lines
+    of older sessions.
+    """
+    for item in result or []:
+        if isinstance(item, str):
+            match = _NUCLEI_LINE.match(item.strip())
+            if not match:
+                continue
+            template, severity, matched = match.groups()
+            item = {"template": template, "severity": severity, "matched_at": matched}
+        matched = item.get("matched_at") or item.get("url") or url
+        yield f"{item.get('template')}|{matched}", {
+            "host": host_of(matched),
+            "url": matched,
+            "template": (item.get("template") or "").lower() or None,
+            "name": item.get("name"),
+            "severity": (item.get("severity") or "unknown").lower(),
+        }
+
+
+def takeover_records(key, lines):
+    """
+    One record per host subjack flagged.
+    """
+    if key != "vulnerabilities":
+        return
+    for line in lines or []:
+        parsed = parse_takeover(line)
+        if parsed:
+            yield parsed["host"], parsed
+
+
+PARSERS = {
+    "port_scan": port_records,
+    "directory_scan": path_records,
+    "vulnerability_scan": nuclei_records,
+    "takeover": takeover_records,
+}
+
+
+def seen_at(timestamp):
+    """
+    ISO time of a session timestamp (YYYYmmdd_HHMMSS), or now.
+    """
+    try:
+        moment = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+    except (TypeError, ValueError):
+        moment = datetime.now()
+    return moment.isoformat(timespec="seconds")
+
+
+def parse_ports(spec):
+    """
+    (ranges, exclude) from a port spec such as "80,8000-8100", or "!80,443"
+    to exclude them; ranges are (start, end) pairs, a single port being
+    (port, port). Raises ValueError for anything that is not a port or range
+    of ports within 0-65535.
+    """
+    exclude = spec.startswith("!")
+    ranges = []
+    for part in spec.lstrip("!").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        try:
+            start, end = int(start), int(end or start)
+        except ValueError:
+            raise ValueError(f"'{part}' is not a port or port range") from None
+        if not 0 <= start <= end <= 65535:
+            raise ValueError(
+                f"'{part}' is not a valid port range (0-65535, start <= end)"
+            )
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError(f"'{spec}' lists no ports")
+    return ranges, exclude
+
+
+def _port_filter(spec):
+    """
+    SQL condition and parameters for a port spec (see parse_ports): IN for
+    single ports and BETWEEN per range, so the port index serves both.
+    """
+    ranges, exclude = parse_ports(spec)
+    singles = sorted({start for start, end in ranges if start == end})
+    terms, params = [], []
+    if singles:
+        terms.append(f"port IN ({', '.join('?' for _ in singles)})")
+        params.extend(singles)
+    for start, end in ranges:
+        if start != end:
+            terms.append("port BETWEEN ? AND ?")
+            params.extend((start, end))
+    condition = " OR ".join(terms)
+    return (f"NOT ({condition})" if exclude else f"({condition})"), params
+
+
+def _like(pattern):
+    # Glob-style '*' for the command line; LIKE's own wildcards are escaped.
+    escaped = re.sub(r"([%_\\])", r"\\\1", pattern)
+    return escaped.replace("*", "%")
+
+
+class FindingsDB:
+    """
+    Findings of every run in one SQLite table, one row per distinct finding
+    of a program (the root target or scope name). A finding seen again
+    keeps its row: first_seen stays and last_seen moves on, so the table
+    grows with what was found rather than with the number of runs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Runs in the same directory may ingest at the same time.
+        self._conn = sqlite3.connect(self.path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # A larger page cache keeps index updates in memory while ingesting.
+        self._conn.execute("PRAGMA cache_size=-65536")
+        columns = ", ".join(
+            f"{name} INTEGER"
+            if name in ("port", "status", "length", "words", "lines")
+            else f"{name} TEXT"
+            for name in COLUMNS
+        )
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS findings ("
+                "id INTEGER PRIMARY KEY, target TEXT NOT NULL, "
+                "stage TEXT NOT NULL, key TEXT NOT NULL, "
+                f"{columns}, first_seen TEXT NOT NULL, last_seen TEXT NOT NULL, "
+                "UNIQUE (target, stage, key))"
+            )
+            # Each index ends in last_seen, so the newest matches come
+            # straight off it; text lookups compare case-insensitively.
+            for name, indexed in (
+                ("last_seen", "last_seen"),
+                ("stage", "stage, last_seen"),
+                ("host", "host COLLATE NOCASE, last_seen"),
+                ("port", "port, last_seen"),
+                ("service", "service COLLATE NOCASE, last_seen"),
+                ("severity", "severity, last_seen"),
+                ("template", "template COLLATE NOCASE, last_seen"),
+            ):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS findings_{name} "
+                    f"ON findings ({indexed})"
+                )
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        # Details come from the latest sighting, so importing an older
+        # session afterwards does not roll them back.
+        updates = ", ".join(
+            f"{name} = CASE WHEN excluded.last_seen >= last_seen "
+            f"THEN excluded.{name} ELSE {name} END"
+            for name in COLUMNS
+        )
+        self._upsert = (
+            f"INSERT INTO findings (target, stage, key, {', '.join(COLUMNS)}, "
+            f"first_seen, last_seen) VALUES (?, ?, ?, {placeholders}, ?, ?) "
+            f"ON CONFLICT (target, stage, key) DO UPDATE SET {updates}, "
+            "first_seen = MIN(first_seen, excluded.first_seen), "
+            "last_seen = MAX(last_seen, excluded.last_seen)"
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def ingest(self, target, stage, records, seen):
+        """
+        Store (key, record) pairs of one stage, seen at ISO time `seen`.
+        Returns the number of records written.
+        """
+        rows = (
+            (target, stage, key)
+            + tuple(map(record.get, COLUMNS))
+            + (seen, seen)
+            for key, record in records
+        )
+        count = 0
+        with self._conn:
+            while True:
+                batch = list(itertools.islice(rows, BATCH_SIZE))
+                if not batch:
+                    return count
+                self._conn.executemany(self._upsert, batch)
+                count += len(batch)
+
+    def ingest_session(self, store, target=None):
+        """
+        Parse the scan stages of a SessionStore or MultiSessionStore into
+        records. Scope sessions are stored per root domain. Returns the
+        number of records written.
+        """
+        if isinstance(store, MultiSessionStore):
+            return sum(
+                self.ingest_session(root_store, target)
+                for root_store in store.stores.values()
+            )
+        reader = SessionReader.from_store(store)
+        seen = seen_at(reader.timestamp)
+        target = target or store.target
+        count = 0
+        for stage, shape, entries in reader.sections():
+            parser = PARSERS.get(stage)
+            if parser is None or shape != "dict":
+                continue
+            records = (
+                record for key, value in entries for record in parser(key, value)
+            )
+            count += self.ingest(target, stage, records, seen)
+        return count
+
+    def query(
+        self,
+        target=None,
+        stage=None,
+        host=None,
+        ports=None,
+        service=None,
+        product=None,
+        template=None,
+        severity=None,
+        status=None,
+        since=None,
+        until=None,
+        limit=100,
+    ):
+        """
+        Findings matching every given filter, most recently seen first, as
+        dicts. `host`, `service`, `product` and `template` take '*'
+        wildcards (case-insensitive); `ports` is a spec such as
+        "8000-8100" or "!80,443"; `severity` and `status` are lists;
+        `since` and `until` are ISO times compared with last_seen.
+        """
+        where, params = [], []
+        if target:
+            where.append("target = ?")
+            params.append(target)
+        if stage:
+            where.append("stage = ?")
+            params.append(stage)
+        for column, pattern in (
+            ("host", host),
+            ("service", service),
+            ("product", product),
+            ("template", template),
+        ):
+            if not pattern:
+                continue
+            if "*" in pattern:
+                where.append(f"{column} LIKE ? ESCAPE '\\'")
+                params.append(_like(pattern))
+            else:
+                # Plain equality can use the column's index.
+                where.append(f"{column} = ? COLLATE NOCASE")
+                params.append(pattern)
+        if ports:
+            condition, values = _port_filter(ports)
+            where.append(condition)
+            params.extend(values)
+        for column, values in (("severity", severity), ("status", status)):
+            if values:
+                where.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        if since:
+            where.append("last_seen >= ?")
+            params.append(since)
+        if until:
+            where.append("last_seen <= ?")
+            params.append(until)
+        sql = "SELECT * FROM findings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY last_seen DESC, id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        cursor = self._conn.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0]
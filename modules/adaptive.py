@@ -0,0 +1,299 @@
+"""
+Concurrency limits shared by every pool: fixed per-tool budgets and AIMD
+limits that adapt to how much load a target tolerates.
+"""
+
+import asyncio
+import collections
+import contextvars
+import threading
+import time
+from rich import print
+
+# Host the current pool job is working on, so the processes it starts count
+# against that destination's limit.
+current_destination = contextvars.ContextVar("current_destination", default=None)
+
+_controller = None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ToolBudget:
+    """
+    Limit on how many processes of one tool run at the same time across all
+    pools, whichever stage thread and event loop they belong to.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self._running = 0
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+
+    @property
+    def running(self):
+        return self._running
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._running < self.limit:
+                self._running += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted:
+                self.release()
+            raise
+
+    def _hand_over(self):
+        # Called with the lock held. Returns True once a waiter owns the slot.
+        while self._waiters:
+            loop, future = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+                return True
+            except RuntimeError:
+                continue
+        return False
+
+    def release(self):
+        with self._lock:
+            # The slot is handed straight to the next waiter unless the
+            # limit has shrunk below the number of running processes.
+            if self._running > self.limit or not self._hand_over():
+                self._running -= 1
+
+    def _set_limit(self, limit):
+        # Called with the lock held.
+        self.limit = limit
+        while self._running < self.limit and self._hand_over():
+            self._running += 1
+
+
+class AdaptiveLimit(ToolBudget):
+    """
+    Additive-increase/multiplicative-decrease limit. Every successful
+    completion whose latency stays within `tolerance` times the best latency
+    seen grows the limit by 1/limit, so one full round of successes adds
+    one slot. A failure (non-zero exit, timeout, reset, HTTP 429/503) cuts
+    the limit by `backoff`, at most once per `cooldown` seconds so a burst
+    of failures from the same round only counts once.
+    """
+
+    def __init__(
+        self,
+        name,
+        initial,
+        minimum=1,
+        maximum=None,
+        backoff=0.5,
+        tolerance=2.0,
+        cooldown=2.0,
+        quiet=False,
+    ):
+        super().__init__(initial)
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.limit, maximum or self.limit)
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.cooldown = cooldown
+        self.quiet = quiet
+        self.backoffs = 0
+        self.successes = 0
+        self.failures = 0
+        self._window = float(self.limit)
+        self._best = None
+        self._hold_until = 0.0
+
+    def observe(self, ok, latency=None, weight=1, reason=None):
+        """
+        Feed back one outcome. `weight` is the number of items the outcome
+        covers, for tools that run many items in one process.
+        """
+        with self._lock:
+            before = self.limit
+            if ok:
+                self.successes += weight
+                if latency is not None:
+                    latency /= weight
+                    if self._best is None or latency < self._best:
+                        self._best = latency
+                    elif latency > self._best * self.tolerance:
+                        return
+                self._window = min(self.maximum, self._window + weight / self._window)
+            else:
+                self.failures += weight
+                now = time.monotonic()
+                if now < self._hold_until:
+                    return
+                self._hold_until = now + self.cooldown
+                self._window = max(self.minimum, self._window * self.backoff)
+                self.backoffs += 1
+                # Latency measured under the old load no longer applies.
+                self._best = None
+            self._set_limit(int(self._window))
+        if self.limit < before and not self.quiet:
+            print(
+                f"[yellow]{self.name}: concurrency {before} -> {self.limit}"
+                f"{f' ({reason})' if reason else ''}[/yellow]"
+            )
+
+    def snapshot(self):
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "maximum": self.maximum,
+            "successes": self.successes,
+            "failures": self.failures,
+            "backoffs": self.backoffs,
+        }
+
+
+class ConcurrencyController:
+    """
+    One AdaptiveLimit per stage and one per destination host, shared by all
+    pools of a run. Stage limits start at `initial` and grow up to
+    `maximum`; destination limits start at `per_destination`.
+    """
+
+    def __init__(self, initial, maximum=None, per_destination=None):
+        self.initial = max(1, initial)
+        self.maximum = max(self.initial, maximum or self.initial * 4)
+        self.per_destination = per_destination or self.initial
+        self._stages = {}
+        self._destinations = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reporter = None
+
+    def for_stage(self, name, initial=None, maximum=None):
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = AdaptiveLimit(
+                    name,
+                    initial or self.initial,
+                    maximum=maximum or self.maximum,
+                )
+            return self._stages[name]
+
+    def for_destination(self, host):
+        with self._lock:
+            if host not in self._destinations:
+                # Hosts are many; their backoffs show up in snapshot() only.
+                self._destinations[host] = AdaptiveLimit(
+                    host, self.per_destination, maximum=self.maximum, quiet=True
+                )
+            return self._destinations[host]
+
+    def limits_for(self, stage, destination):
+        """
+        The limits a process for `destination` started by `stage` must
+        hold, narrowest first.
+        """
+        limits = []
+        if destination:
+            limits.append(self.for_destination(destination))
+        if stage:
+            limits.append(self.for_stage(stage))
+        return limits
+
+    def snapshot(self):
+        """
+        {"stages": {name: limit snapshot}, "destinations": {...}}; only
+        destinations that were ever backed off are listed.
+        """
+        with self._lock:
+            stages = dict(self._stages)
+            destinations = dict(self._destinations)
+        return {
+            "stages": {name: limit.snapshot() for name, limit in stages.items()},
+            "destinations": {
+                host: limit.snapshot()
+                for host, limit in destinations.items()
+                if limit.backoffs
+            },
+        }
+
+    def summary(self):
+        with self._lock:
+            stages = [limit for limit in self._stages.values() if limit.running]
+        return ", ".join(
+            f"{limit.name} {limit.running}/{limit.limit}" for limit in stages
+        )
+
+    def start_reporting(self, interval=15.0):
+        """
+        Print the limits of the busy stages every `interval` seconds.
+        """
+
+        def report():
+            while not self._stop.wait(interval):
+                line = self.summary()
+                if line:
+                    print(f"[cyan]Concurrency (running/limit):[/cyan] {line}")
+
+        self._reporter = threading.Thread(
+            target=report, name="su6oRecon-concurrency", daemon=True
+        )
+        self._reporter.start()
+        return self
+
+    def stop_reporting(self):
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join()
+
+
+async def acquire_all(limits):
+    """
+    Acquire every limit in order; on failure or cancellation the ones
+    already held are released again.
+    """
+    held = []
+    try:
+        for limit in limits:
+            await limit.acquire()
+            held.append(limit)
+    except BaseException:
+        release_all(held)
+        raise
+
+
+def release_all(limits, ok=None, latency=None, reason=None):
+    """
+    Release limits taken with acquire_all(). Unless `ok` is None the outcome
+    is fed back to the adaptive ones first.
+    """
+    for limit in reversed(limits):
+        if ok is not None and isinstance(limit, AdaptiveLimit):
+            limit.observe(ok, latency, reason=reason)
+        limit.release()
+
+
+def set_controller(controller):
+    """
+    Make `controller` the run's adaptive controller; None turns adaptive
+    concurrency off.
+    """
+    global _controller
+    _controller = controller
+    return controller
+
+
+def get_controller():
+    return _controller
@@ -0,0 +1,394 @@
+"""
+Cross-run result cache for expensive tool invocations.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Hours a cached result stays valid, per tool.
+DEFAULT_TTL_HOURS = {
+    "assetfinder": 24,
+    "subfinder": 24,
+    "amass": 24,
+    "httpx": 6,
+    "gowitness": 24,
+    "nmap": 72,
+    "ffuf": 24,
+    "nuclei": 24,
+    "ParamSpider": 72,
+    "subjack": 24,
+}
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_SIZE_UNITS = {"k": 1024, "m": 1024**2, "g": 1024**3}
+# Rows read per query when iterating a put_items() entry.
+ITEMS_BATCH = 10000
+
+_active = None
+# ToolCache arguments from configure_cache(), or None while disabled.
+_settings = None
+_open_lock = threading.Lock()
+_file_digests = {}
+_versions = {}
+
+
+def parse_ttl(value):
+    """
+    Parse a --cache-ttl value: either hours for every tool ("48") or
+    per-tool overrides ("nmap=96,nuclei=12"; tool names are matched
+    case-insensitively). Returns a dict of tool -> hours. Raises ValueError
+    for unknown tools or hours that are not numbers.
+    """
+    ttl = dict(DEFAULT_TTL_HOURS)
+    if not value:
+        return ttl
+    if "=" not in value:
+        hours = _hours(value)
+        return {tool: hours for tool in ttl}
+    tools = {tool.lower(): tool for tool in ttl}
+    for part in value.split(","):
+        name, _, hours = part.partition("=")
+        tool = tools.get(name.strip().lower())
+        if tool is None:
+            raise ValueError(
+                f"unknown tool '{name.strip()}'; choose from {', '.join(ttl)}"
+            )
+        ttl[tool] = _hours(hours)
+    return ttl
+
+
+def _hours(value):
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"'{value.strip()}' is not a number of hours") from None
+
+
+def parse_size(value):
+    """
+    Bytes in a size such as "1048576", "500K", "512M" or "2G" (powers of
+    1024, case-insensitive, optional trailing "B"). Raises ValueError for
+    anything else.
+    """
+    text = str(value).strip().lower()
+    if text.endswith("b"):
+        text = text[:-1]
+    unit = _SIZE_UNITS.get(text[-1:]) if text else None
+    try:
+        size = int(float(text[:-1] if unit else text) * (unit or 1))
+    except ValueError:
+        raise ValueError(f"'{value}' is not a size such as '512M' or '2G'") from None
+    if size <= 0:
+        raise ValueError(f"size must be positive: {value}")
+    return size
+
+
+def _file_digest(path):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime)
+    if key not in _file_digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _file_digests[key] = digest.hexdigest()
+    return _file_digests[key]
+
+
+def normalize_args(args):
+    """
+    Strip arguments and replace paths to existing files (wordlists, template
+    files) with a digest of their contents.
+    """
+    normalized = []
+    for arg in args:
+        arg = str(arg).strip()
+        if arg and os.path.isfile(arg):
+            arg = f"file:{_file_digest(arg)}"
+        normalized.append(arg)
+    return normalized
+
+
+def tool_version(tool):
+    """
+    Identify the installed build of a tool by its resolved binary path, size
+    and modification time, so an upgrade invalidates earlier results.
+    """
+    if tool not in _versions:
+        path = shutil.which(tool) or shutil.which(tool.lower())
+        if path:
+            path = os.path.realpath(path)
+            stat = os.stat(path)
+            _versions[tool] = f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+        else:
+            _versions[tool] = "missing"
+    return _versions[tool]
+
+
+def cache_key(tool, args, target):
+    data = json.dumps([tool, tool_version(tool), normalize_args(args), target])
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def input_digest(items):
+    """
+    Stable identifier for a batch input such as the domain list fed to httpx.
+    """
+    data = "\n".join(sorted(set(items)))
+    return "batch:" + hashlib.sha256(data.encode()).hexdigest()
+
+
+class ToolCache:
+    """
+    SQLite-backed cache in cache/tool_cache.db. Entries expire after the
+    tool's TTL and the least recently used ones are evicted once the cache
+    grows past `max_bytes`.
+    """
+
+    def __init__(self, path=None, ttl_hours=None, max_bytes=DEFAULT_MAX_BYTES):
+        path = path or os.path.join("cache", "tool_cache.db")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl_hours = ttl_hours or dict(DEFAULT_TTL_HOURS)
+        self.max_bytes = max_bytes
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, tool TEXT, target TEXT, value TEXT, "
+                "size INTEGER, created REAL, accessed REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            # Large name lists are kept one row per name (see put_items).
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items (key TEXT NOT NULL, value TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_key ON items (key)")
+            # Running total of entry sizes, kept in step with every write so
+            # eviction never has to sum the table.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO totals (id, size) "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+            )
+
+    def _ttl_seconds(self, tool):
+        return self.ttl_hours.get(tool, 24) * 3600
+
+    def get(self, tool, args, target):
+        """
+        Return the cached result, or None on a miss or an expired entry.
+        """
+        key = cache_key(tool, args, target)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            # A NULL value is a put_items() entry, read with get_items().
+            if row and row[0] is not None and now - row[1] < self._ttl_seconds(tool):
+                self._conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+                )
+                self.hits[tool] += 1
+                return json.loads(row[0])
+            if row:
+                self._delete(key)
+            self.misses[tool] += 1
+        return None
+
+    def get_items(self, tool, args, target):
+        """
+        Like get(), for an entry stored with put_items(): an iterator over
+        its items, read a batch at a time, or None.
+        """
+        key = cache_key(tool, args, target)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT created FROM entries WHERE key = ? AND value IS NULL", (key,)
+            ).fetchone()
+            if not row or now - row[0] >= self._ttl_seconds(tool):
+                if row:
+                    self._delete(key)
+                self.misses[tool] += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self.hits[tool] += 1
+        return self._read_items(key)
+
+    def _read_items(self, key):
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, value FROM items WHERE key = ? AND rowid > ? "
+                    "ORDER BY rowid LIMIT ?",
+                    (key, last, ITEMS_BATCH),
+                ).fetchall()
+            if not rows:
+                return
+            for _, value in rows:
+                yield value
+            last = rows[-1][0]
+
+    def put_items(self, tool, args, target, items):
+        """
+        Store an iterable of strings one row each, so neither writing nor
+        reading the entry holds the whole list in memory. Nothing is stored
+        for an empty iterable.
+        """
+        if self._ttl_seconds(tool) <= 0:
+            return
+        key = cache_key(tool, args, target)
+        size = 0
+
+        def rows():
+            nonlocal size
+            for item in items:
+                size += len(item) + 1
+                yield key, item
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._delete(key)
+            self._conn.executemany(
+                "INSERT INTO items (key, value) VALUES (?, ?)", rows()
+            )
+            if not size:
+                return
+            self._conn.execute(
+                "INSERT INTO entries "
+                "(key, tool, target, value, size, created, accessed) "
+                "VALUES (?, ?, ?, NULL, ?, ?, ?)",
+                (key, tool, target, size, now, now),
+            )
+            self._grow(size)
+            self._evict()
+
+    def put(self, tool, args, target, value):
+        if self._ttl_seconds(tool) <= 0:
+            return
+        key = cache_key(tool, args, target)
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock, self._conn:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO entries "
+                "(key, tool, target, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tool, target, data, len(data), now, now),
+            )
+            self._grow(len(data))
+            self._evict()
+
+    def _grow(self, size):
+        self._conn.execute("UPDATE totals SET size = size + ? WHERE id = 0", (size,))
+
+    def _delete(self, key):
+        row = self._conn.execute(
+            "SELECT size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM items WHERE key = ?", (key,))
+            self._grow(-row[0])
+
+    def _evict(self):
+        total = self._conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        while total > self.max_bytes:
+            # Oldest entries first, a batch at a time off the accessed index.
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._delete(key)
+                total -= size
+
+    def summary(self):
+        """
+        Returns {tool: (hits, misses)} for this run.
+        """
+        tools = sorted(set(self.hits) | set(self.misses))
+        return {tool: (self.hits[tool], self.misses[tool]) for tool in tools}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def configure_cache(enabled=True, ttl=None, **kwargs):
+    """
+    Set up (or disable) the cache used by all modules for this process.
+    Options are checked here, but the database is only opened once a module
+    asks for it with get_cache(), so commands that never run a tool leave
+    no cache behind.
+    """
+    global _active, _settings
+    ttl_hours = parse_ttl(ttl)
+    with _open_lock:
+        if _active is not None:
+            _active.close()
+        _active = None
+        _settings = dict(kwargs, ttl_hours=ttl_hours) if enabled else None
+
+
+def get_cache(create=True):
+    """
+    The process-wide ToolCache, opened on first use, or None when caching is
+    off. With create=False, None is also returned while it is not open yet.
+    """
+    global _active
+    with _open_lock:
+        if _active is None and _settings is not None and create:
+            _active = ToolCache(**_settings)
+        return _active
+
+
+class Partial:
+    """
+    Wraps a result that is returned but must not be cached, such as the
+    output of a tool that timed out.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+def cached_call(tool, args, target, func):
+    """
+    Return the cached result for (tool, args, target), or call `func()` and
+    cache a non-empty result. A Partial result is unwrapped, not cached.
+    """
+    cache = get_cache()
+    if cache is not None:
+        hit = cache.get(tool, args, target)
+        if hit is not None:
+            return hit
+    result = func()
+    if isinstance(result, Partial):
+        return result.value
+    if cache is not None and result:
+        cache.put(tool, args, target, result)
+    return result
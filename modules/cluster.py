@@ -0,0 +1,141 @@
+"""
+Response fingerprint clustering, so near-identical hosts (parked pages,
+shared SSO logins, CDN error pages) are only scanned once.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from rich import print
+
+# Headers whose presence says nothing about which application answered.
+VOLATILE_HEADERS = {
+    "age",
+    "cf-ray",
+    "content-length",
+    "date",
+    "etag",
+    "expires",
+    "last-modified",
+    "set-cookie",
+    "x-request-id",
+}
+_TOKEN_RE = re.compile(rb"[a-z0-9_]+")
+_NUMBER_RE = re.compile(rb"\d+")
+
+
+def simhash(body):
+    """
+    64-bit simhash of a response body, as 16 hex digits. Numbers are
+    normalised first so timestamps, nonces and IDs do not split clusters.
+    """
+    tokens = Counter(_TOKEN_RE.findall(_NUMBER_RE.sub(b"0", body.lower())))
+    weights = [0] * 64
+    for token, count in tokens.items():
+        value = int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return f"{fingerprint:016x}"
+
+
+def header_fingerprint(headers):
+    """
+    Short hash of the sorted, non-volatile response header names.
+    """
+    names = sorted({name.lower() for name in headers} - VOLATILE_HEADERS)
+    return hashlib.sha256(",".join(names).encode()).hexdigest()[:16]
+
+
+def simhash_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _bands(fingerprint, count):
+    """
+    (index, value) of each of `count` bit bands of a simhash.
+    """
+    value = int(fingerprint, 16)
+    edges = [64 * i // count for i in range(count + 1)]
+    for i in range(count):
+        width = edges[i + 1] - edges[i]
+        yield i, value >> edges[i] & ((1 << width) - 1)
+
+
+def cluster_responses(records, threshold=3):
+    """
+    Group probe records ({url: record} from the native engine) by exact
+    status, title and header fingerprint, then by simhash distance of at most
+    `threshold` bits. The first URL of each cluster is its representative.
+    Returns {representative: {"members", "status", "title", "server"}}.
+    """
+    buckets = {}
+    for url, record in records.items():
+        key = (
+            record.get("status"),
+            (record.get("title") or "").strip().lower(),
+            record.get("headers"),
+        )
+        buckets.setdefault(key, []).append(url)
+
+    # Fingerprints at most `threshold` bits apart agree on at least one of
+    # threshold + 1 bands, so only groups sharing a band are compared.
+    band_count = min(64, max(4, threshold + 1))
+    clusters = {}
+    for urls in buckets.values():
+        groups = []
+        by_band = {}
+        for url in urls:
+            fingerprint = records[url].get("simhash")
+            if not fingerprint:
+                groups.append([url])
+                continue
+            bands = list(_bands(fingerprint, band_count))
+            candidates = sorted(
+                {index for band in bands for index in by_band.get(band, ())}
+            )
+            for index in candidates:
+                group = groups[index]
+                if (
+                    simhash_distance(fingerprint, records[group[0]]["simhash"])
+                    <= threshold
+                ):
+                    group.append(url)
+                    break
+            else:
+                for band in bands:
+                    by_band.setdefault(band, []).append(len(groups))
+                groups.append([url])
+        for group in groups:
+            record = records[group[0]]
+            clusters[group[0]] = {
+                "members": group,
+                "status": record.get("status"),
+                "title": record.get("title"),
+                "server": record.get("server"),
+            }
+    # Keep clusters in input order so the representative list is stable.
+    order = {url: i for i, url in enumerate(records)}
+    return dict(sorted(clusters.items(), key=lambda item: order[item[0]]))
+
+
+def run_clustering(records, threshold=3):
+    """
+    Cluster probe records and report how much scanning the clusters save.
+    Returns {"clusters": {...}, "representatives": [urls]}.
+    """
+    clusters = cluster_responses(records, threshold)
+    duplicates = {rep: c for rep, c in clusters.items() if len(c["members"]) > 1}
+    for rep, cluster in duplicates.items():
+        title = cluster["title"] or "no title"
+        print(
+            f"[cyan]{len(cluster['members'])} hosts share a response "
+            f"({cluster['status']}, {title}); scanning {rep}[/cyan]"
+        )
+    print(
+        f"[green]{len(records)} alive host(s) form {len(clusters)} cluster(s).[/green]"
+    )
+    return {"clusters": clusters, "representatives": list(clusters)}
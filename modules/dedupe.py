@@ -0,0 +1,140 @@
+"""
+Memory-bounded deduplication for very large name lists, such as the output
+of subdomain enumerators on wildcard-heavy scopes. Names are collected in a
+set of at most `chunk` entries; a full set is sorted and spilled to a run
+file in the scratch directory, and iteration merges the runs. Memory stays
+at about one chunk however many names come in, and the output is sorted
+and unique, the same as sorted(set(names)).
+"""
+
+import heapq
+import os
+from rich import print
+
+from modules.scratch import scratch_file
+
+# Names held in memory before a sorted run is written out (~25 MB).
+CHUNK = 250_000
+
+
+def merge_unique(*streams):
+    """
+    Merge sorted iterables into one sorted stream without duplicates.
+    """
+    previous = None
+    for name in heapq.merge(*streams):
+        if name != previous:
+            yield name
+            previous = name
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line[:-1]
+
+
+class DiskDedupe:
+    """
+    A set of names that spills to sorted run files once it holds `chunk`
+    of them. Iterating yields the unique names in sorted order, and can be
+    repeated; close() removes the run files.
+    """
+
+    def __init__(self, chunk=CHUNK, label="names"):
+        self.chunk = max(1, chunk)
+        self.label = label
+        self._buffer = set()
+        self._runs = []
+
+    def add(self, name):
+        self._buffer.add(name)
+        if len(self._buffer) >= self.chunk:
+            self._spill()
+
+    def add_new(self, name):
+        """
+        Add a name; returns False if it is already among the names held in
+        memory. Names spilled to disk are not checked, so a repeat after a
+        spill counts as new again (iteration stays unique either way).
+        """
+        if name in self._buffer:
+            return False
+        self.add(name)
+        return True
+
+    def update(self, names):
+        # Added as a batch, so the chunk may be exceeded by one batch.
+        self._buffer.update(names)
+        if len(self._buffer) >= self.chunk:
+            self._spill()
+
+    def absorb(self, other):
+        """
+        Take over the names of another DiskDedupe, which is left empty.
+        """
+        self._runs.extend(other._runs)
+        other._runs = []
+        self.update(other._buffer)
+        other._buffer = set()
+
+    def _spill(self):
+        path = scratch_file(f"{self.label}.run")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{name}\n" for name in sorted(self._buffer))
+        self._runs.append(path)
+        # A fresh set: clear() would keep the grown hash table allocated.
+        self._buffer = set()
+
+    def __iter__(self):
+        if not self._runs:
+            return iter(sorted(self._buffer))
+        return merge_unique(
+            sorted(self._buffer), *(_read_run(path) for path in self._runs)
+        )
+
+    def close(self):
+        for path in self._runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._runs = []
+        self._buffer = set()
+
+
+def write_names(names, path):
+    """
+    Write names one per line to `path`, through a temporary file moved into
+    place, so an interrupted run never leaves a half-written list behind the
+    previous one.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for name in names:
+            f.write(name + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def read_names(value):
+    """
+    Iterate a names result: the path of a file with one name per line (as
+    run_subdomain_enumeration writes), or a list as older sessions keep.
+    """
+    if isinstance(value, str):
+        try:
+            f = open(value, encoding="utf-8")
+        except FileNotFoundError:
+            print(f"[red]Error:[/red] {value} is missing; run without --resume.")
+            return
+        with f:
+            for line in f:
+                name = line.strip()
+                if name:
+                    yield name
+    else:
+        yield from value or []
+
+
+def count_names(value):
+    return sum(1 for _ in read_names(value))
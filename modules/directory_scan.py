@@ -2,39 +2,81 @@
 Directory brute-forcing module using ffuf.
 """
 
-import subprocess
+import json
 from rich import print
 
+from modules.runner import ToolTimeout, run_pool, stream_tool
+from modules.targets import unique_urls
 
-def run_directory_scan(targets, wordlist=None):
+
+def parse_result(line):
+    """
+    Turn one ffuf -json line into a compact result record, or None.
     """
-    Run ffuf on given targets to brute-force directories.
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return result_record(data)
+
+
+def result_record(data):
+    """
+    Compact record of one decoded ffuf result, or None.
+    """
+    if not isinstance(data, dict) or "url" not in data:
+        return None
+    return {
+        "url": data["url"],
+        "status": data.get("status"),
+        "length": data.get("length"),
+        "words": data.get("words"),
+        "lines": data.get("lines"),
+    }
+
+
+def run_directory_scan(
+    targets, wordlist=None, concurrency=1, completed=None, on_result=None
+):
+    """
+    Run ffuf on given targets to brute-force directories, once per unique
+    URL (see unique_urls); results are keyed by that URL. Hits are parsed
+    from -json output as they stream in (see parse_result).
+    Up to `concurrency` ffuf processes run at the same time.
+    Targets in `completed` are skipped; `on_result` is called per new result.
     """
-    results = {}
     if not wordlist:
         wordlist = "assets/common_wordlist.txt"
-    for target in targets:
+    targets = unique_urls(targets)
+
+    async def scan(target):
         print(f"[yellow]Running ffuf on {target}...[/yellow]")
-        output_file = f"ffuf_{target}.txt"
+        hits = []
+
+        def on_line(line):
+            result = parse_result(line)
+            if result is not None:
+                hits.append(result)
+
         try:
-            subprocess.run(
-                [
-                    "ffuf",
-                    "-u",
-                    f"http://{target}/FUZZ",
-                    "-w",
-                    wordlist,
-                    "-o",
-                    output_file,
-                ],
-                check=True,
+            returncode, _ = await stream_tool(
+                ["ffuf", "-u", f"{target}/FUZZ", "-w", wordlist, "-json", "-s"],
+                on_line,
             )
-            with open(output_file) as f:
-                data = f.read().splitlines()
-            results[target] = data
-        except FileNotFoundError:
-            print("[red]Error:[/red] ffuf not found. Please install it.")
-            break
-        except subprocess.CalledProcessError:
+        except ToolTimeout:
+            # Hits streamed before the kill are kept.
+            return hits
+        if returncode != 0:
             print(f"[red]ffuf scan failed on {target}[/red]")
-    return results
\ No newline at end of file
+            return None
+        return hits
+
+    return run_pool(
+        targets,
+        scan,
+        concurrency,
+        tool="ffuf",
+        cache_args=["-w", wordlist, "-json"],
+        completed=completed,
+        on_result=on_result,
+    )
@@ -0,0 +1,361 @@
+"""
+DNS resolution module with wildcard detection, run between subdomain
+enumeration and HTTP probing.
+"""
+
+import asyncio
+import random
+import secrets
+import socket
+import struct
+import time
+from rich import print
+
+from modules.dedupe import DiskDedupe
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+RCODE_REFUSED = 5
+# Answers that say nothing about the name, so another resolver is asked.
+RETRY_RCODES = {RCODE_SERVFAIL, RCODE_REFUSED}
+FALLBACK_RESOLVERS = ["1.1.1.1", "8.8.8.8"]
+
+
+def system_resolvers():
+    """
+    Nameservers from /etc/resolv.conf, or public fallbacks.
+    """
+    servers = []
+    try:
+        with open("/etc/resolv.conf") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers or list(FALLBACK_RESOLVERS)
+
+
+def parse_resolver(value):
+    """
+    Parse "1.1.1.1", "127.0.0.1:5353" or "[::1]:53" into (host, port).
+    """
+    value = value.strip()
+    if value.startswith("["):
+        host, _, rest = value[1:].partition("]")
+        return host, int(rest.lstrip(":") or 53)
+    if value.count(":") == 1:
+        host, port = value.split(":")
+        return host, int(port)
+    return value, 53
+
+
+def build_query(name, qtype, txid):
+    """
+    Encode a recursive DNS query for `name`.
+    Raises UnicodeError for names that are not valid DNS names.
+    """
+    header = struct.pack("!HHHHHH", txid, 0x0100, 1, 0, 0, 0)
+    qname = b""
+    for label in name.rstrip(".").encode("idna").split(b"."):
+        qname += bytes([len(label)]) + label
+    return header + qname + b"\x00" + struct.pack("!HH", qtype, 1)
+
+
+def _read_name(data, offset):
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(data[offset + 1 : offset + 1 + length].decode("ascii", "replace"))
+        offset += 1 + length
+    else:
+        raise ValueError("DNS name compression loop")
+    return ".".join(labels).lower(), end if end is not None else offset
+
+
+def parse_response(data):
+    """
+    Decode a DNS response into (txid, rcode, [(type, value), ...]) keeping
+    only A, AAAA and CNAME answers.
+    """
+    txid, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+    answers = []
+    for _ in range(ancount):
+        _, offset = _read_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack("!HHIH", data[offset : offset + 10])
+        offset += 10
+        rdata = data[offset : offset + rdlength]
+        if rtype == QTYPE_A and rdlength == 4:
+            answers.append(("A", socket.inet_ntop(socket.AF_INET, rdata)))
+        elif rtype == QTYPE_AAAA and rdlength == 16:
+            answers.append(("AAAA", socket.inet_ntop(socket.AF_INET6, rdata)))
+        elif rtype == QTYPE_CNAME:
+            answers.append(("CNAME", _read_name(data, offset)[0]))
+        offset += rdlength
+    return txid, flags & 0xF, answers
+
+
+class ResolverError(Exception):
+    """
+    No resolver gave a usable answer for a name (timeouts, SERVFAIL or
+    REFUSED), so whether it exists is unknown.
+    """
+
+
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12:
+            return
+        future = self.pending.pop(struct.unpack("!H", data[:2])[0], None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        pass
+
+
+class AsyncResolver:
+    """
+    Minimal UDP stub resolver that spreads queries over several nameservers,
+    with at most `qps` queries per second overall (0 means unlimited).
+    """
+
+    def __init__(self, resolvers=None, qps=0, timeout=2.0, retries=2):
+        self.addresses = [parse_resolver(r) for r in (resolvers or system_resolvers())]
+        self.qps = qps
+        self.timeout = timeout
+        self.retries = retries
+        self.queries = 0
+        self._protocols = []
+        self._next = 0
+        self._next_slot = 0.0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for host, port in self.addresses:
+            _, protocol = await loop.create_datagram_endpoint(
+                _ResolverProtocol, remote_addr=(host, port)
+            )
+            self._protocols.append(protocol)
+
+    def close(self):
+        for protocol in self._protocols:
+            protocol.transport.close()
+
+    async def _throttle(self):
+        if self.qps <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.qps
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def query(self, name, qtype):
+        """
+        Returns (rcode, answers), or None if no resolver answered in time.
+        Each attempt goes to the next resolver, so a SERVFAIL or REFUSED
+        from one of them is retried on another.
+        """
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries + 1):
+            protocol = self._protocols[self._next % len(self._protocols)]
+            self._next += 1
+            txid = random.getrandbits(16)
+            while txid in protocol.pending:
+                txid = random.getrandbits(16)
+            packet = build_query(name, qtype, txid)
+            await self._throttle()
+            future = loop.create_future()
+            protocol.pending[txid] = future
+            protocol.transport.sendto(packet)
+            self.queries += 1
+            try:
+                data = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                protocol.pending.pop(txid, None)
+                continue
+            try:
+                _, rcode, answers = parse_response(data)
+            except (ValueError, IndexError, struct.error):
+                continue
+            if rcode in RETRY_RCODES:
+                continue
+            return rcode, answers
+        return None
+
+    async def resolve(self, name):
+        """
+        Look up A and AAAA records. Returns {"a", "aaaa", "cname"} lists, or
+        None if the name does not resolve (NXDOMAIN, or no address records).
+        Raises ResolverError if that cannot be told because a query got no
+        usable answer.
+        """
+        try:
+            responses = await asyncio.gather(
+                self.query(name, QTYPE_A), self.query(name, QTYPE_AAAA)
+            )
+        except UnicodeError:
+            return None
+        if any(r is not None and r[0] == RCODE_NXDOMAIN for r in responses):
+            return None
+        record = {"a": set(), "aaaa": set(), "cname": set()}
+        for response in responses:
+            if response is None:
+                continue
+            for rtype, value in response[1]:
+                record[rtype.lower()].add(value)
+        if not record["a"] and not record["aaaa"]:
+            if None in responses:
+                raise ResolverError(name)
+            return None
+        return {key: sorted(values) for key, values in record.items()}
+
+
+def _ancestors(name, root=None):
+    """
+    Parent zones of `name`, nearest first, stopping at `root` (inclusive) or
+    at two-label domains.
+    """
+    labels = name.split(".")
+    zones = []
+    for i in range(1, len(labels) - 1):
+        zone = ".".join(labels[i:])
+        zones.append(zone)
+        if zone == root:
+            break
+    return zones
+
+
+async def _resolve_all(names, root, resolvers, qps, concurrency, timeout):
+    resolver = AsyncResolver(resolvers, qps=qps, timeout=timeout)
+    await resolver.start()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    records = {}
+    failed = []
+    pending = iter(names)
+
+    async def work():
+        # Workers pull names off one iterator, so only `concurrency` lookups
+        # are in flight however long the list is.
+        for name in pending:
+            try:
+                record = await resolver.resolve(name)
+            except ResolverError:
+                failed.append(name)
+                continue
+            if record is not None:
+                records[name] = record
+
+    async def probe(zone):
+        # Two random labels, so round-robin wildcards are fully captured.
+        values = set()
+        for _ in range(2):
+            async with semaphore:
+                try:
+                    record = await resolver.resolve(f"{secrets.token_hex(6)}.{zone}")
+                except ResolverError:
+                    continue
+            if record:
+                values.update(record["a"] + record["aaaa"] + record["cname"])
+        return values
+
+    try:
+        started = time.monotonic()
+        await asyncio.gather(*(work() for _ in range(max(1, concurrency))))
+        zones = sorted({z for name in records for z in _ancestors(name, root)})
+        probes = await asyncio.gather(*(probe(zone) for zone in zones))
+        wildcards = {z: sorted(v) for z, v in zip(zones, probes) if v}
+        elapsed = time.monotonic() - started
+        records = dict(sorted(records.items()))
+        return records, sorted(failed), wildcards, resolver.queries, elapsed
+    finally:
+        resolver.close()
+
+
+def _is_wildcard_only(name, record, wildcards, root):
+    values = set(record["a"] + record["aaaa"] + record["cname"])
+    for zone in _ancestors(name, root):
+        if zone in wildcards and values <= set(wildcards[zone]):
+            return True
+    return False
+
+
+def run_dns_resolution(
+    names, root=None, resolvers=None, qps=0, concurrency=200, timeout=2.0
+):
+    """
+    Resolve names concurrently, detect wildcard zones by querying random
+    labels, and drop names that do not resolve or only return the wildcard
+    answer. `names` may be any iterable; it is deduplicated on disk, so long
+    lists are never held in memory. Names no resolver gave a usable answer
+    for are neither kept nor counted as unresolved but listed under
+    "failed". Returns {"records": {name: {"a", "aaaa", "cname"}},
+    "failed": [names], "wildcards": {zone: [answers]},
+    "dropped": {"unresolved", "wildcard"}}.
+    """
+    unique = DiskDedupe(label="dns")
+    try:
+        for name in names:
+            name = name.strip().lower().rstrip(".")
+            if name:
+                unique.add(name)
+        total = sum(1 for _ in unique)
+        if not total:
+            return {"records": {}, "failed": [], "wildcards": {}, "dropped": {}}
+        print(f"[yellow]Resolving {total} name(s)...[/yellow]")
+        records, failed, wildcards, queries, elapsed = asyncio.run(
+            _resolve_all(unique, root, resolvers, qps, concurrency, timeout)
+        )
+    finally:
+        unique.close()
+    for zone in wildcards:
+        print(f"[cyan]Wildcard DNS detected for *.{zone}[/cyan]")
+    kept = {}
+    wildcard_only = 0
+    for name, record in records.items():
+        if name != root and _is_wildcard_only(name, record, wildcards, root):
+            wildcard_only += 1
+        else:
+            kept[name] = record
+    unresolved = total - len(records) - len(failed)
+    print(
+        f"[green]{len(kept)} name(s) kept[/green], {unresolved} unresolved, "
+        f"{wildcard_only} wildcard-only ({queries} queries, "
+        f"{queries / max(elapsed, 1e-6):.0f} q/s)."
+    )
+    if failed:
+        print(
+            f"[yellow]{len(failed)} name(s) got no usable answer from any "
+            "resolver (timeout, SERVFAIL or REFUSED).[/yellow]"
+        )
+    return {
+        "records": kept,
+        "failed": failed,
+        "wildcards": wildcards,
+        "dropped": {"unresolved": unresolved, "wildcard": wildcard_only},
+    }
@@ -2,38 +2,325 @@
 HTTP probing module using httpx to find alive domains.
 """
 
+import asyncio
+import errno
+import hashlib
+import html
+import os
+import re
 import subprocess
+import time
 from rich import print
 
+from modules.adaptive import acquire_all, get_controller, release_all
+from modules.cache import Partial, cached_call, input_digest
+from modules.cluster import header_fingerprint, simhash
+from modules.dedupe import DiskDedupe, write_names
+from modules.metrics import current_stage, get_metrics
+from modules.runner import ToolTimeout, reap, run_tool, spawn
+from modules.subdomain import stream_subdomains
 
-def run_http_probe(domains, proxy=None, tor=False):
-    """
-    Run httpx on a list of domains to probe HTTP services.
-    Returns a list of alive domains/URLs.
-    """
-    alive = []
+TOR_PROXY = "socks5://127.0.0.1:9050"
+USER_AGENT = "Mozilla/5.0 (compatible; su6oRecon)"
+MAX_BODY = 1024 * 1024
+# Leading body bytes the simhash covers; enough to tell pages apart.
+SIMHASH_PREFIX = 64 * 1024
+MAX_REDIRECTS = 5
+# Answers that mean the target wants us to slow down.
+BACKOFF_STATUSES = {429, 503}
+_TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def _httpx_command(proxy=None, tor=False, timeout=None, follow_redirects=False):
     cmd = ["httpx", "-silent"]
     if proxy:
         cmd.extend(["-proxy", proxy])
     if tor:
-        cmd.extend(["-proxy", "socks5://127.0.0.1:9050"])
+        cmd.extend(["-proxy", TOR_PROXY])
+    if timeout:
+        cmd.extend(["-timeout", str(timeout)])
+    if follow_redirects:
+        cmd.append("-follow-redirects")
+    return cmd
+
+
+def run_http_probe(
+    domains, proxy=None, tor=False, timeout=None, follow_redirects=False
+):
+    """
+    Run httpx on a list of domains to probe HTTP services, with httpx's own
+    timeout unless `timeout` (seconds) is given.
+    Returns a list of alive domains/URLs.
+    """
+    cmd = _httpx_command(proxy, tor, timeout, follow_redirects)
+    return cached_call(
+        "httpx", cmd[1:], input_digest(domains), lambda: _probe(cmd, domains)
+    )
+
+
+def _probe(cmd, domains):
+    alive = []
+    started = time.monotonic()
+    input_data = "\n".join(domains)
     try:
-        proc = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        _, stdout, stderr = asyncio.run(run_tool(cmd, input=input_data.encode()))
     except FileNotFoundError:
         print("[red]Error:[/red] httpx not found. Please install it.")
         return alive
-    input_data = "\n".join(domains)
-    stdout, stderr = proc.communicate(input=input_data)
+    except ToolTimeout as e:
+        print(f"[yellow]{e}; keeping the hosts it reported.[/yellow]")
+        get_metrics().record_partial("httpx", str(e))
+        alive = [line.strip() for line in e.stdout.decode().splitlines()]
+        return Partial([line for line in alive if line])
     if stderr:
-        print(f"[red]httpx error:[/red] {stderr.strip()}")
-    for line in stdout.splitlines():
+        print(f"[red]httpx error:[/red] {stderr.decode().strip()}")
+    for line in stdout.decode().splitlines():
         line = line.strip()
         if line:
             alive.append(line)
-    return alive
\ No newline at end of file
+    elapsed = time.monotonic() - started
+    print(
+        f"[green]{len(alive)} alive[/green] of {len(domains)} in {elapsed:.1f}s "
+        f"({len(domains) / max(elapsed, 1e-6):.0f} hosts/sec)."
+    )
+    return alive
+
+
+async def _stream_probe(domain, cmd, module, accept, names):
+    started = time.monotonic()
+    alive = []
+    try:
+        proc = await spawn(cmd, stdin=subprocess.PIPE)
+    except FileNotFoundError:
+        print("[red]Error:[/red] httpx not found. Please install it.")
+        proc = None
+    write_lock = asyncio.Lock()
+    stdin_open = proc is not None
+
+    async def feed(sub):
+        nonlocal stdin_open
+        sub = sub.strip()
+        if not sub or (accept and not accept(sub)) or not names.add_new(sub):
+            return
+        if not stdin_open:
+            return
+        # All enumerators feed the same pipe; writes and drains are serialised.
+        async with write_lock:
+            try:
+                proc.stdin.write((sub + "\n").encode())
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                print("[red]httpx exited early; remaining names are not probed.[/red]")
+                stdin_open = False
+
+    async def collect():
+        async for raw in proc.stdout:
+            line = raw.decode(errors="replace").strip()
+            if not line:
+                continue
+            if not alive:
+                elapsed = time.monotonic() - started
+                print(f"[green]First alive host after {elapsed:.1f}s:[/green] {line}")
+            alive.append(line)
+
+    if proc is None:
+        await stream_subdomains(domain, feed, module=module)
+        return alive
+
+    collector = asyncio.create_task(collect())
+    errors = asyncio.create_task(proc.stderr.read())
+    try:
+        await stream_subdomains(domain, feed, module=module)
+    finally:
+        if stdin_open:
+            proc.stdin.close()
+            try:
+                await proc.stdin.wait_closed()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+    await collector
+    stderr = await errors
+    await reap(proc)
+    if stderr:
+        print(f"[red]httpx error:[/red] {stderr.decode().strip()}")
+    return alive
+
+
+def run_streaming_probe(
+    domain,
+    proxy=None,
+    tor=False,
+    module=None,
+    accept=None,
+    path=None,
+    timeout=None,
+    follow_redirects=False,
+):
+    """
+    Enumerate subdomains and probe them with a single long-lived httpx process.
+    Each new subdomain is written to httpx as soon as an enumerator prints it,
+    and alive URLs are collected as httpx reports them. Names for which
+    `accept(name)` is false are dropped before probing.
+    The names are deduplicated on disk and written, sorted, to `path` (as
+    run_subdomain_enumeration does). Only the names held in memory are
+    checked before probing, so a name repeated after a spill may be probed
+    twice. Returns (path, alive URLs).
+    """
+    path = path or os.path.join("sessions", f"{domain}_subdomains.txt")
+    cmd = _httpx_command(proxy, tor, timeout, follow_redirects)
+    names = DiskDedupe(label="subdomains")
+    try:
+        alive = asyncio.run(_stream_probe(domain, cmd, module, accept, names))
+        write_names(names, path)
+    finally:
+        names.close()
+    return path, alive
+
+
+def _title_of(body):
+    match = _TITLE_RE.search(body)
+    if not match:
+        return None
+    title = html.unescape(match.group(1).decode("utf-8", "replace"))
+    return " ".join(title.split())[:200] or None
+
+
+def _candidates(domain):
+    if "://" in domain:
+        return [domain]
+    # Like httpx: try HTTPS first and fall back to plain HTTP.
+    return [f"https://{domain}", f"http://{domain}"]
+
+
+async def _native_probe(
+    domains, proxy, tor, concurrency, timeout, follow_redirects, fingerprint
+):
+    try:
+        import aiohttp
+    except ImportError:
+        print("[red]Error:[/red] aiohttp not found. Please install it.")
+        return None
+    controller = get_controller()
+    if controller is not None:
+        # The adaptive limit starts at --probe-concurrency and may grow.
+        limit = controller.for_stage(
+            current_stage.get() or "probe",
+            initial=concurrency,
+            maximum=controller.maximum * concurrency // controller.initial,
+        )
+        concurrency = limit.maximum
+    connector_args = {"limit": concurrency, "ssl": False, "ttl_dns_cache": 300}
+    if tor:
+        try:
+            from aiohttp_socks import ProxyConnector
+        except ImportError:
+            print("[red]Error:[/red] aiohttp-socks not found. Please install it.")
+            return None
+        connector = ProxyConnector.from_url(TOR_PROXY, **connector_args)
+        proxy = None
+    else:
+        connector = aiohttp.TCPConnector(**connector_args)
+    semaphore = asyncio.Semaphore(concurrency)
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+    async def fetch(domain):
+        async with semaphore:
+            limits = [limit] if controller is not None else []
+            await acquire_all(limits)
+            started = time.monotonic()
+            # None: the host gave no sign of load either way (DNS failure,
+            # connection refused); such answers do not move the limit.
+            ok, reason = None, None
+            try:
+                for url in _candidates(domain):
+                    try:
+                        async with session.get(
+                            url,
+                            proxy=proxy,
+                            allow_redirects=follow_redirects,
+                            max_redirects=MAX_REDIRECTS,
+                        ) as resp:
+                            body = await resp.content.read(MAX_BODY)
+                            if resp.status in BACKOFF_STATUSES:
+                                ok, reason = False, f"HTTP {resp.status}"
+                            else:
+                                ok = True
+                            return {
+                                "url": url,
+                                "final_url": str(resp.url),
+                                "status": resp.status,
+                                "title": _title_of(body),
+                                "content_length": resp.content_length
+                                if resp.content_length is not None
+                                else len(body),
+                                "body_hash": hashlib.sha256(body).hexdigest(),
+                                "headers": header_fingerprint(resp.headers),
+                                "server": resp.headers.get("Server"),
+                                "location": resp.headers.get("Location"),
+                            }, body
+                    except asyncio.TimeoutError:
+                        ok, reason = False, "timeout"
+                    except aiohttp.ServerDisconnectedError:
+                        ok, reason = False, "connection reset"
+                    except aiohttp.ClientOSError as e:
+                        if e.errno == errno.ECONNRESET:
+                            ok, reason = False, "connection reset"
+                    except (aiohttp.ClientError, ValueError):
+                        continue
+            finally:
+                release_all(limits, ok, time.monotonic() - started, reason)
+        return None, None
+
+    loop = asyncio.get_running_loop()
+
+    async def probe(domain):
+        record, body = await fetch(domain)
+        if record is not None and fingerprint:
+            # Hashed in a worker thread once the request slot is free, so
+            # large bodies do not stall the other requests on the loop.
+            record["simhash"] = await loop.run_in_executor(
+                None, simhash, body[:SIMHASH_PREFIX]
+            )
+        return record
+
+    async with session:
+        return await asyncio.gather(*(probe(domain) for domain in domains))
+
+
+def run_native_probe(
+    domains,
+    proxy=None,
+    tor=False,
+    concurrency=50,
+    timeout=10,
+    follow_redirects=False,
+    fingerprint=False,
+):
+    """
+    Probe domains in-process over pooled keep-alive connections.
+    Returns {url: record} with status, title, content length, body hash,
+    header fingerprint, server header and redirect location for every host
+    that answered. With `fingerprint`, records also carry the simhash of the
+    first SIMHASH_PREFIX bytes of the body (for clustering and monitoring).
+    """
+    domains = list(dict.fromkeys(d.strip() for d in domains if d.strip()))
+    print(f"[yellow]Probing {len(domains)} host(s) natively...[/yellow]")
+    started = time.monotonic()
+    outcomes = asyncio.run(
+        _native_probe(
+            domains, proxy, tor, concurrency, timeout, follow_redirects, fingerprint
+        )
+    )
+    if outcomes is None:
+        return {}
+    elapsed = time.monotonic() - started
+    records = {record["url"]: record for record in outcomes if record}
+    print(
+        f"[green]{len(records)} alive[/green] of {len(domains)} in {elapsed:.1f}s "
+        f"({len(domains) / max(elapsed, 1e-6):.0f} hosts/sec)."
+    )
+    return records
@@ -0,0 +1,291 @@
+"""
+Run metrics: wall time, CPU and peak memory per stage and per external tool
+process, exported as JSON and in the Prometheus text format.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Name of the pipeline stage the current thread or task is working for, so
+# tool processes can be attributed to it.
+current_stage = contextvars.ContextVar("current_stage", default=None)
+
+_active = None
+
+
+def count_items(value):
+    """
+    Number of items in a stage result: the length of a list or dict, 0 for
+    None and 1 for anything else.
+    """
+    if isinstance(value, (list, tuple, set, dict)):
+        return len(value)
+    return 0 if value is None else 1
+
+
+def _self_usage():
+    if resource is None:
+        return {"cpu_user": 0.0, "cpu_sys": 0.0, "peak_rss_kb": 0}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "cpu_user": usage.ru_utime,
+        "cpu_sys": usage.ru_stime,
+        "peak_rss_kb": peak,
+    }
+
+
+class RunMetrics:
+    """
+    Thread-safe collector for one run. Stages report their timings through
+    record_stage(); runner.py reports every tool process it reaps through
+    record_process().
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._clock = time.monotonic()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.processes = []
+        self.partial = {}
+
+    def record_stage(self, name, **fields):
+        with self._lock:
+            self.stages.setdefault(name, {}).update(fields)
+
+    def record_partial(self, item, reason):
+        """
+        Note that `item` of the current stage has an incomplete result, e.g.
+        because its tool timed out.
+        """
+        with self._lock:
+            self.partial.setdefault(current_stage.get(), {})[str(item)] = reason
+
+    def clear_partial(self, item):
+        with self._lock:
+            self.partial.get(current_stage.get(), {}).pop(str(item), None)
+
+    def partial_items(self, stage):
+        """
+        The items of `stage` currently recorded as partial.
+        """
+        with self._lock:
+            return set(self.partial.get(stage, {}))
+
+    def record_process(self, tool, wall, returncode, usage=None):
+        usage = usage or {}
+        with self._lock:
+            self.processes.append(
+                {
+                    "tool": tool,
+                    "stage": current_stage.get(),
+                    "wall": round(wall, 6),
+                    "cpu_user": usage.get("user", 0.0),
+                    "cpu_sys": usage.get("sys", 0.0),
+                    "peak_rss_kb": usage.get("maxrss_kb", 0),
+                    "returncode": returncode,
+                }
+            )
+
+    @staticmethod
+    def _aggregate(processes):
+        return {
+            "processes": len(processes),
+            "failures": sum(1 for p in processes if p["returncode"] != 0),
+            "wall": round(sum(p["wall"] for p in processes), 6),
+            "cpu_user": round(sum(p["cpu_user"] for p in processes), 6),
+            "cpu_sys": round(sum(p["cpu_sys"] for p in processes), 6),
+            "peak_rss_kb": max((p["peak_rss_kb"] for p in processes), default=0),
+        }
+
+    def snapshot(self, processes=True):
+        """
+        Returns {"run", "stages", "tools", "partial"} and, unless `processes`
+        is False, the per-process records. "partial" maps each stage to the
+        items with incomplete results and why. Stage CPU and memory figures
+        cover the tool processes started by that stage; `python_cpu` is the
+        stage thread's own CPU time.
+        """
+        with self._lock:
+            stages = {name: dict(fields) for name, fields in self.stages.items()}
+            records = list(self.processes)
+            partial = {
+                name: dict(items) for name, items in self.partial.items() if items
+            }
+        by_stage = {}
+        by_tool = {}
+        for record in records:
+            by_stage.setdefault(record["stage"], []).append(record)
+            by_tool.setdefault(record["tool"], []).append(record)
+        for name, fields in stages.items():
+            children = self._aggregate(by_stage.get(name, []))
+            del children["wall"]
+            fields.update(children)
+            wall = fields.get("wall") or 0
+            items = fields.get("items_in") or fields.get("items_out") or 0
+            fields["items_per_sec"] = round(items / wall, 3) if wall else 0.0
+            fields["partial"] = len(partial.get(name, ()))
+        run = {
+            "started": self.started,
+            "wall": round(time.monotonic() - self._clock, 6),
+            **_self_usage(),
+        }
+        data = {
+            "run": run,
+            "stages": stages,
+            "tools": {tool: self._aggregate(p) for tool, p in sorted(by_tool.items())},
+            "partial": partial,
+        }
+        if processes:
+            data["processes"] = records
+        return data
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+    def write_prometheus(self, path, labels=None):
+        """
+        Write the stage and tool metrics in the Prometheus text exposition
+        format, e.g. for the node_exporter textfile collector.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(to_prometheus(self.snapshot(processes=False), labels))
+        return path
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(base, **extra):
+    pairs = {**base, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+# (metric, help, source field, scale, extra labels) for each exported series.
+_STAGE_SERIES = [
+    ("stage_wall_seconds", "Wall-clock time per stage.", "wall", 1, {}),
+    (
+        "stage_cpu_seconds",
+        "CPU time per stage.",
+        "cpu_user",
+        1,
+        {"mode": "tools_user"},
+    ),
+    (None, None, "cpu_sys", 1, {"mode": "tools_sys"}),
+    (None, None, "python_cpu", 1, {"mode": "python"}),
+    (
+        "stage_peak_rss_bytes",
+        "Largest peak RSS of a tool process started by the stage.",
+        "peak_rss_kb",
+        1024,
+        {},
+    ),
+    ("stage_items", "Items consumed and produced.", "items_in", 1, {"dir": "in"}),
+    (None, None, "items_out", 1, {"dir": "out"}),
+    (
+        "stage_items_per_second",
+        "Items processed per second of wall time.",
+        "items_per_sec",
+        1,
+        {},
+    ),
+    ("stage_processes", "Tool processes started.", "processes", 1, {}),
+    (
+        "stage_partial_items",
+        "Items left with incomplete results (timeouts, deadline).",
+        "partial",
+        1,
+        {},
+    ),
+    (
+        "stage_concurrency_limit",
+        "Final adaptive concurrency limit.",
+        "concurrency_limit",
+        1,
+        {},
+    ),
+    ("stage_backoffs", "Times the adaptive limit was cut.", "backoffs", 1, {}),
+]
+_TOOL_SERIES = [
+    ("tool_processes_total", "Processes run per tool.", "processes", 1, {}),
+    ("tool_failures_total", "Processes that exited non-zero.", "failures", 1, {}),
+    ("tool_wall_seconds_total", "Summed process wall time.", "wall", 1, {}),
+    (
+        "tool_cpu_seconds_total",
+        "Summed process CPU time.",
+        "cpu_user",
+        1,
+        {"mode": "user"},
+    ),
+    (None, None, "cpu_sys", 1, {"mode": "sys"}),
+    (
+        "tool_peak_rss_bytes",
+        "Largest peak RSS of any process.",
+        "peak_rss_kb",
+        1024,
+        {},
+    ),
+]
+
+
+def _series(lines, series, rows, key, base):
+    for metric, help_text, field, scale, extra in series:
+        if metric:
+            name = f"su6orecon_{metric}"
+            kind = "counter" if metric.endswith("_total") else "gauge"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        for row_name, fields in rows.items():
+            value = (fields.get(field) or 0) * scale
+            lines.append(f"{name}{_labels(base, **{key: row_name}, **extra)} {value}")
+
+
+def to_prometheus(snapshot, labels=None):
+    """
+    Render a snapshot() in the Prometheus text format.
+    """
+    base = dict(labels or {})
+    lines = [
+        "# HELP su6orecon_run_wall_seconds Wall-clock time of the run.",
+        "# TYPE su6orecon_run_wall_seconds gauge",
+        f"su6orecon_run_wall_seconds{_labels(base)} {snapshot['run']['wall']}",
+        "# HELP su6orecon_run_peak_rss_bytes Peak RSS of the su6oRecon process.",
+        "# TYPE su6orecon_run_peak_rss_bytes gauge",
+        f"su6orecon_run_peak_rss_bytes{_labels(base)} "
+        f"{snapshot['run']['peak_rss_kb'] * 1024}",
+    ]
+    _series(lines, _STAGE_SERIES, snapshot["stages"], "stage", base)
+    _series(lines, _TOOL_SERIES, snapshot["tools"], "tool", base)
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """
+    Start a fresh collector for this process and return it.
+    """
+    global _active
+    _active = RunMetrics()
+    return _active
+
+
+def get_metrics():
+    if _active is None:
+        return reset_metrics()
+    return _active
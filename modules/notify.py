@@ -0,0 +1,217 @@
+"""
+Telegram notifications sent from a background thread, so a slow or
+unreachable Bot API never holds up the pipeline.
+"""
+
+import queue
+import threading
+import time
+from rich import print
+
+import requests
+
+TELEGRAM_API = "https://api.telegram.org"
+# Telegram rejects longer messages.
+MAX_MESSAGE = 4096
+
+_STOP = object()
+_notifier = None
+
+
+def _chunks(lines, limit=MAX_MESSAGE):
+    """
+    Join lines into messages of at most `limit` characters, splitting
+    single lines that are longer than that.
+    """
+    chunk = ""
+    for line in lines:
+        while len(line) > limit:
+            if chunk:
+                yield chunk
+                chunk = ""
+            yield line[:limit]
+            line = line[limit:]
+        if chunk and len(chunk) + 1 + len(line) > limit:
+            yield chunk
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
+
+
+class Notifier:
+    """
+    Queue of Telegram messages drained by one worker thread over a pooled
+    session. Messages that arrive within `coalesce` seconds of each other
+    go out as one; failed sends are retried with exponential backoff, and
+    HTTP 429 waits for the retry_after Telegram asks for. When the queue is
+    full new messages are dropped rather than blocking the caller.
+    """
+
+    def __init__(
+        self,
+        bot_token,
+        chat_id,
+        api_url=TELEGRAM_API,
+        queue_size=1000,
+        timeout=10.0,
+        retries=4,
+        backoff=1.0,
+        coalesce=2.0,
+        findings=False,
+    ):
+        self.url = f"{api_url.rstrip('/')}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.coalesce = coalesce
+        self.findings = findings
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._session = requests.Session()
+        self._closing = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._work, name="su6oRecon-notify", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def send(self, text):
+        """
+        Queue a message. Never blocks; returns False if it was dropped.
+        """
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def finding(self, tool, target, detail):
+        """
+        Queue a per-finding alert, if finding alerts are on. `target` may be
+        None when `detail` already names the host.
+        """
+        if self.findings:
+            self.send(f"[{tool}] {f'{target}: ' if target else ''}{detail}")
+
+    def close(self, timeout=15.0):
+        """
+        Send what is still queued, waiting at most `timeout` seconds.
+        """
+        if self._thread is None:
+            return
+        self._closing.set()
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(
+                f"[yellow]Gave up on {self._queue.qsize()} queued Telegram "
+                "message(s).[/yellow]"
+            )
+        self._thread = None
+        self._session.close()
+
+    def _work(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            until = time.monotonic() + self.coalesce
+            while sum(map(len, batch)) < MAX_MESSAGE:
+                # Once closing, only what is already queued is collected.
+                wait = 0 if self._closing.is_set() else until - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(0, wait))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            for message in _chunks(batch):
+                if self._post(message):
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def _post(self, text):
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2**attempt
+            try:
+                resp = self._session.post(
+                    self.url,
+                    json={"chat_id": self.chat_id, "text": text},
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if resp.ok:
+                    return True
+                error = f"HTTP {resp.status_code}"
+                if resp.status_code == 429:
+                    try:
+                        retry_after = resp.json()["parameters"]["retry_after"]
+                        delay = max(delay, float(retry_after))
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                elif resp.status_code < 500:
+                    # Bad token, chat or message: retrying will not help.
+                    break
+            if attempt < self.retries:
+                # Shorter waits once closing so close() is not held up.
+                time.sleep(min(delay, 1.0) if self._closing.is_set() else delay)
+        print(f"[red]Failed to send Telegram message:[/red] {error}")
+        return False
+
+
+def notifier_from_config(config, findings=False):
+    """
+    A started Notifier for the configured bot, or None if Telegram is not
+    set up. "telegram_api_url" points it at another Bot API server.
+    """
+    bot_token = config.get("telegram_bot_token")
+    chat_id = config.get("telegram_chat_id")
+    if not (bot_token and chat_id):
+        return None
+    return Notifier(
+        bot_token,
+        chat_id,
+        api_url=config.get("telegram_api_url") or TELEGRAM_API,
+        findings=findings,
+    ).start()
+
+
+def set_notifier(notifier):
+    """
+    Make `notifier` the run's notifier; None turns notifications off.
+    """
+    global _notifier
+    _notifier = notifier
+    return notifier
+
+
+def get_notifier():
+    return _notifier
+
+
+def notify(text):
+    if _notifier is not None:
+        _notifier.send(text)
+
+
+def notify_finding(tool, target, detail):
+    if _notifier is not None:
+        _notifier.finding(tool, target, detail)
@@ -5,25 +5,42 @@ Parameter discovery module using ParamSpider.
 import subprocess
 from rich import print
 
+from modules.runner import ToolTimeout, run_pool, run_tool
+from modules.scratch import consume, scratch_file
+from modules.targets import safe_name, unique_hosts
 
-def run_param_spider(targets):
+
+def run_param_spider(targets, concurrency=1, completed=None, on_result=None):
     """
-    Run ParamSpider for each target domain to find parameters.
+    Run ParamSpider once per unique hostname of the targets to find
+    parameters; results are keyed by hostname.
+    Up to `concurrency` ParamSpider processes run at the same time.
+    Targets in `completed` are skipped; `on_result` is called per new result.
     """
-    results = {}
-    for target in targets:
+
+    async def spider(target):
         print(f"[yellow]Running ParamSpider on {target}...[/yellow]")
-        output_file = f"params_{target}.txt"
+        output_file = scratch_file(f"params_{safe_name(target)}.txt")
         try:
-            subprocess.run(
-                ["paramspider", "--domain", target, "--output", output_file], check=True
+            returncode, _, _ = await run_tool(
+                ["paramspider", "--domain", target, "--output", output_file],
+                stdout=subprocess.DEVNULL,
             )
-            with open(output_file) as f:
-                data = f.read().splitlines()
-            results[target] = data
-        except FileNotFoundError:
-            print("[red]Error:[/red] ParamSpider not found. Please install it.")
-            break
-        except subprocess.CalledProcessError:
+        except ToolTimeout:
+            output = consume(output_file)
+            return output.splitlines() if output is not None else None
+        output = consume(output_file)
+        if returncode != 0:
             print(f"[red]ParamSpider failed on {target}[/red]")
-    return results
\ No newline at end of file
+            return None
+        return output.splitlines() if output else []
+
+    return run_pool(
+        unique_hosts(targets),
+        spider,
+        concurrency,
+        tool="ParamSpider",
+        cache_args=[],
+        completed=completed,
+        on_result=on_result,
+    )
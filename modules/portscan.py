@@ -2,26 +2,451 @@
 Port scanning module using nmap.
 """
 
-import subprocess
+import asyncio
+import os
+import re
+import socket
+import time
+import xml.etree.ElementTree as ET
 from rich import print
 
+from modules.cache import get_cache
+from modules.runner import ToolTimeout, run_pool, stream_tool
+from modules.scratch import scratch_file
+from modules.targets import Target, unique_hosts
 
-def run_port_scan(targets):
+# Ports checked by the connect pre-scan unless a port list is given.
+DEFAULT_PORTS = (
+    "21,22,23,25,53,80,81,110,111,135,139,143,443,445,465,587,993,995,1433,"
+    "1521,2049,2375,3000,3306,3389,4443,5000,5432,5601,5900,6379,7001,8000,"
+    "8008,8080,8081,8088,8443,8888,9000,9090,9200,9443,10000,11211,27017"
+)
+
+
+PRESCAN_CONCURRENCY = 500
+PRESCAN_TIMEOUT = 1.0
+# Enough for a fully filtered host on a few thousand ports.
+PRESCAN_HOST_TIMEOUT = 60.0
+# Connects in flight to any one host.
+PER_HOST = 100
+
+
+def parse_ports(spec):
     """
-    Run nmap port scan (service detection) on target hosts.
+    Expand a port spec such as "80,443,8000-8010" into a sorted list.
     """
+    ports = set()
+    for part in (spec or DEFAULT_PORTS).split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ports.update(range(int(start), int(end) + 1))
+        elif part:
+            ports.add(int(part))
+    return sorted(p for p in ports if 0 < p < 65536)
+
+
+async def _connect_scan(hosts, ports, concurrency, timeout, host_timeout):
+    # Hosts are scanned a few at a time with up to `per_host` connects each,
+    # so a host's time limit only runs while it is actually being scanned.
+    per_host = max(1, min(len(ports), PER_HOST, concurrency))
+    pending = iter(hosts)
     results = {}
-    for target in targets:
+
+    async def probe(host, port, semaphore):
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), timeout
+                )
+            except (OSError, asyncio.TimeoutError):
+                return False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return True
+
+    async def scan_host(host):
+        found = []
+        semaphore = asyncio.Semaphore(per_host)
+
+        async def check(port):
+            if await probe(host, port, semaphore):
+                found.append(port)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(check(port) for port in ports)), host_timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"[red]Connect scan of {host} hit its time limit.[/red]")
+        results[host] = sorted(found)
+
+    async def work():
+        for host in pending:
+            await scan_host(host)
+
+    await asyncio.gather(*(work() for _ in range(max(1, concurrency // per_host))))
+    return {host: results[host] for host in hosts}
+
+
+def run_connect_scan(
+    hosts,
+    ports=None,
+    concurrency=PRESCAN_CONCURRENCY,
+    timeout=PRESCAN_TIMEOUT,
+    host_timeout=PRESCAN_HOST_TIMEOUT,
+):
+    """
+    TCP connect scan of `ports` on every host with at most `concurrency`
+    sockets open at once. Each connect gets `timeout` seconds and each host
+    `host_timeout` seconds in total (ports found before then are kept; None
+    means no limit).
+    Returns {host: [open ports]}.
+    """
+    hosts = sorted(set(hosts))
+    ports = parse_ports(ports) if isinstance(ports, str) or ports is None else ports
+    if not hosts:
+        return {}
+    print(
+        f"[yellow]Connect scan of {len(ports)} port(s) on "
+        f"{len(hosts)} host(s)[/yellow]"
+    )
+    started = time.monotonic()
+    results = asyncio.run(
+        _connect_scan(hosts, ports, concurrency, timeout, host_timeout)
+    )
+    elapsed = time.monotonic() - started
+    checked = len(hosts) * len(ports)
+    open_count = sum(len(found) for found in results.values())
+    print(
+        f"[green]Connect scan done:[/green] {open_count} open port(s), "
+        f"{checked / max(elapsed, 1e-6):.0f} ports/sec."
+    )
+    return results
+
+
+def run_port_scan(
+    targets,
+    concurrency=1,
+    prescan_ports=None,
+    completed=None,
+    on_result=None,
+    prescan_options=None,
+):
+    """
+    Run nmap port scan (service detection) on target hosts, once per unique
+    hostname; results are keyed by hostname. nmap's XML is parsed from its
+    stdout as it streams in, into {"ip": ..., "ports": [port records]}.
+    Up to `concurrency` nmap processes run at the same time.
+    With `prescan_ports`, a connect scan runs first: nmap only service-detects
+    the ports found open, and hosts with none open are not given to nmap;
+    `prescan_options` are passed on to run_connect_scan (concurrency,
+    timeout, host_timeout).
+    Targets in `completed` are skipped; `on_result` is called per new result.
+    """
+    targets = unique_hosts(targets)
+    open_ports = {}
+    if prescan_ports:
+        todo = [t for t in targets if t not in (completed or {})]
+        open_ports = run_connect_scan(todo, prescan_ports, **(prescan_options or {}))
+
+    async def scan(target):
+        port_args = []
+        if prescan_ports:
+            found = open_ports.get(target)
+            if not found:
+                # Nothing open for nmap to look at.
+                return {"ip": None, "ports": []}
+            port_args = ["-p", ",".join(map(str, found))]
         print(f"[yellow]Running nmap on {target}...[/yellow]")
+        stream = NmapXmlStream()
+        result = {"ip": None, "ports": []}
+
+        def on_line(line):
+            for ip, ports in stream.feed(line):
+                result.update(ip=ip, ports=ports)
+
         try:
-            output_file = f"nmap_{target}.txt"
-            subprocess.run(["nmap", "-sV", "-oN", output_file, target], check=True)
-            with open(output_file) as f:
-                data = f.read()
-            results[target] = data
-        except FileNotFoundError:
-            print("[red]Error:[/red] nmap not found. Please install it.")
-            break
-        except subprocess.CalledProcessError:
+            returncode, _ = await stream_tool(
+                ["nmap", "-sV"] + port_args + ["-oX", "-", target], on_line
+            )
+        except ToolTimeout:
+            # Set only if nmap had finished the host before it was killed.
+            return result if result["ip"] else None
+        if returncode != 0:
             print(f"[red]nmap scan failed on {target}[/red]")
-    return results
\ No newline at end of file
+            return None
+        return result
+
+    cache_args = ["-sV", "-oX", "-"] + (["-p", prescan_ports] if prescan_ports else [])
+    return run_pool(
+        targets,
+        scan,
+        concurrency,
+        tool="nmap",
+        cache_args=cache_args,
+        completed=completed,
+        on_result=on_result,
+    )
+
+
+async def _resolve_all(hosts, concurrency):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(host):
+        async with semaphore:
+            try:
+                infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            except OSError:
+                return host, []
+        return host, sorted({info[4][0] for info in infos})
+
+    return dict(await asyncio.gather(*(resolve(host) for host in hosts)))
+
+
+def resolve_hosts(hosts, concurrency=50):
+    """
+    Resolve hostnames concurrently. Returns {host: [sorted addresses]}.
+    """
+    return asyncio.run(_resolve_all(sorted(set(hosts)), concurrency))
+
+
+def _host_records(host):
+    """
+    (address, [port records]) of a finished <host> element, or None.
+    """
+    address = host.find("address[@addrtype='ipv4']")
+    if address is None:
+        address = host.find("address[@addrtype='ipv6']")
+    if address is None:
+        return None
+    records = []
+    for port in host.iter("port"):
+        state = port.find("state")
+        service = port.find("service")
+        service = service.attrib if service is not None else {}
+        records.append(
+            {
+                "port": int(port.get("portid")),
+                "protocol": port.get("protocol"),
+                "state": state.get("state") if state is not None else None,
+                "service": service.get("name"),
+                "product": service.get("product"),
+                "version": service.get("version"),
+            }
+        )
+    return address.get("addr"), records
+
+
+class NmapXmlStream:
+    """
+    Incremental parser for nmap -oX output read from a pipe. feed() takes
+    the next piece of the document and returns the (address, records) of the
+    hosts it completed; finished elements are dropped, so memory stays flat
+    however many hosts the run covers. A killed nmap leaves the hosts it
+    had finished.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._broken = False
+
+    def feed(self, text):
+        hosts = []
+        if self._broken:
+            return hosts
+        try:
+            self._parser.feed(text + "\n")
+            for event, element in self._parser.read_events():
+                if event == "start":
+                    if self._root is None:
+                        self._root = element
+                    continue
+                if element.tag != "host":
+                    continue
+                parsed = _host_records(element)
+                if parsed:
+                    hosts.append(parsed)
+                self._root.remove(element)
+        except ET.ParseError:
+            # Garbage in the output; keep the hosts parsed before it.
+            self._broken = True
+        return hosts
+
+
+def parse_nmap_xml(text):
+    """
+    Parse nmap -oX output into {ip: [port records]}. Truncated output, as
+    left by a killed nmap, gives the hosts it had finished.
+    """
+    stream = NmapXmlStream()
+    return dict(stream.feed(text))
+
+
+_NMAP_PORT_LINE = re.compile(
+    r"^(\d+)/(tcp|udp|sctp)\s+(\S+)\s+(\S+)(?:\s+(.*))?$"
+)
+
+
+def parse_nmap_text(text):
+    """
+    Port records from nmap's normal (-oN) output, which sessions of older
+    versions stored as one string per host.
+    """
+    records = []
+    for line in text.splitlines():
+        match = _NMAP_PORT_LINE.match(line.strip())
+        if not match:
+            continue
+        port, protocol, state, service, detail = match.groups()
+        # "Apache httpd 2.4.41": the version is the last word, if numeric.
+        product, _, version = (detail or "").rpartition(" ")
+        if not version[:1].isdigit():
+            product, version = detail, None
+        records.append(
+            {
+                "port": int(port),
+                "protocol": protocol,
+                "state": state,
+                "service": service,
+                "product": product or None,
+                "version": version or None,
+            }
+        )
+    return records
+
+
+def run_batched_port_scan(
+    targets,
+    shard_size=256,
+    concurrency=1,
+    prescan_ports=None,
+    completed=None,
+    on_result=None,
+    prescan_options=None,
+):
+    """
+    Resolve the unique hostnames of the targets, collapse them to unique IPs
+    and scan those with a few `nmap -sV -iL` processes of up to `shard_size`
+    IPs each.
+    With `prescan_ports`, a connect scan runs first: IPs with nothing open are
+    not given to nmap, and each nmap run only covers the ports found open;
+    `prescan_options` are passed on to run_connect_scan.
+    Every hostname gets {"ip": ..., "ports": [...]} for the IP it resolved to.
+    Targets in `completed` are skipped; `on_result` is called per new result.
+    """
+    completed = completed or {}
+    targets = [Target.parse(host) for host in unique_hosts(targets)]
+    todo = [target for target in targets if target.host not in completed]
+    # IP literals need no lookup.
+    addresses = resolve_hosts(target.host for target in todo if not target.ip)
+    ip_by_target = {}
+    for target in todo:
+        target.ip = target.ip or (addresses.get(target.host) or [None])[0]
+        if target.ip:
+            ip_by_target[target.host] = target.ip
+        else:
+            print(f"[red]Could not resolve {target.host}; skipping port scan.[/red]")
+    targets_by_ip = {}
+    for target, ip in ip_by_target.items():
+        targets_by_ip.setdefault(ip, []).append(target)
+    print(
+        f"[cyan]{len(ip_by_target)} target(s) collapse to "
+        f"{len(targets_by_ip)} unique IP(s).[/cyan]"
+    )
+
+    cache = get_cache()
+    cache_args = ["-sV", "-oX", "-"] + (["-p", prescan_ports] if prescan_ports else [])
+    records = {}
+    for ip in targets_by_ip:
+        hit = cache.get("nmap", cache_args, ip) if cache else None
+        if hit is not None:
+            records[ip] = hit
+    pending = sorted(ip for ip in targets_by_ip if ip not in records)
+    open_ports = {}
+    if prescan_ports:
+        open_ports = run_connect_scan(
+            pending, prescan_ports, **(prescan_options or {})
+        )
+        for ip in pending:
+            if not open_ports.get(ip):
+                records[ip] = []
+                if cache:
+                    cache.put("nmap", cache_args, ip, [])
+        # IPs with the same open ports end up in the same shard, so each
+        # shard's -p list stays close to what its hosts actually expose.
+        pending = sorted(
+            (ip for ip in pending if open_ports.get(ip)),
+            key=lambda ip: (open_ports[ip], ip),
+        )
+    shards = [
+        pending[i : i + shard_size] for i in range(0, len(pending), shard_size)
+    ]
+
+    def publish(ip):
+        for target in targets_by_ip[ip]:
+            if on_result:
+                on_result(target, {"ip": ip, "ports": records[ip]})
+
+    def keep(ip, ports):
+        records[ip] = ports
+        if cache:
+            cache.put("nmap", cache_args, ip, ports)
+        publish(ip)
+
+    for ip in records:
+        publish(ip)
+
+    async def scan(index):
+        shard = shards[index]
+        list_file = scratch_file(f"nmap_batch_{index}.txt", shard)
+        port_args = []
+        if prescan_ports:
+            ports = sorted({port for ip in shard for port in open_ports[ip]})
+            port_args = ["-p", ",".join(map(str, ports))]
+        print(f"[yellow]Running nmap on {len(shard)} IP(s) (batch {index})[/yellow]")
+        stream = NmapXmlStream()
+        reported = set()
+
+        def on_line(line):
+            # Each host is kept as soon as nmap has finished it.
+            for ip, ports in stream.feed(line):
+                if ip in targets_by_ip and ip not in reported:
+                    reported.add(ip)
+                    keep(ip, ports)
+
+        try:
+            returncode, _ = await stream_tool(
+                ["nmap", "-sV"] + port_args + ["-oX", "-", "-iL", list_file],
+                on_line,
+            )
+        except ToolTimeout:
+            # Only the hosts nmap finished before it was killed are known.
+            return True
+        finally:
+            os.remove(list_file)
+        if returncode != 0:
+            print(f"[red]nmap batch {index} failed[/red]")
+            return None
+        for ip in shard:
+            # Hosts nmap reports nothing for were scanned and had no ports.
+            if ip not in reported:
+                keep(ip, [])
+        return True
+
+    run_pool(range(len(shards)), scan, concurrency, tool="nmap")
+
+    results = {}
+    for target in targets:
+        host = target.host
+        if host in completed:
+            results[host] = completed[host]
+        elif ip_by_target.get(host) in records:
+            ip = ip_by_target[host]
+            results[host] = {"ip": ip, "ports": records[ip]}
+    return results
@@ -0,0 +1,88 @@
+"""
+Low-overhead sampling profiler for the Python side of a run (parsing,
+scheduling, the native probe and DNS engines).
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+
+# Leaf frames that mean a thread is blocked rather than doing work.
+_IDLE_FILES = {"threading.py", "selectors.py", "queue.py", "base_events.py"}
+
+
+def _label(code):
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _file_of(label):
+    return label.rsplit("(", 1)[-1].split(":")[0]
+
+
+class SamplingProfiler:
+    """
+    Records the Python stack of every thread each `interval` seconds from a
+    background thread. Output is in the collapsed-stack format understood by
+    flamegraph.pl, speedscope and similar viewers.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="su6oRecon-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def top(self, limit=15):
+        """
+        Busiest functions as [(label, self samples, total samples)], ignoring
+        samples where the thread was only waiting.
+        """
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or _file_of(frames[-1]) in _IDLE_FILES:
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        return [
+            (label, count, total[label]) for label, count in own.most_common(limit)
+        ]
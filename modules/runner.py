@@ -0,0 +1,638 @@
+"""
+Shared asyncio subprocess pool used by the per-target tool modules.
+"""
+
+import asyncio
+import contextvars
+import errno
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from rich import print
+
+from modules.adaptive import (
+    ToolBudget,
+    acquire_all,
+    current_destination,
+    get_controller,
+    release_all,
+)
+from modules.cache import get_cache
+from modules.metrics import current_stage, get_metrics
+from modules.targets import host_of
+
+# Live child processes across all pools, so an interrupt can kill them
+# no matter which stage thread started them. Maps each process to
+# (command, rusage report fd, start time, concurrency limits held).
+_children = {}
+_children_lock = threading.Lock()
+_stopping = threading.Event()
+# Longest stdout line stream_tool accepts (JSON records can be large).
+_LINE_LIMIT = 16 * 1024 * 1024
+# Bytes stream_tool reads at a time in batched mode.
+_BLOCK_SIZE = 256 * 1024
+_RUSAGE_EXEC = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "rusage_exec.py"
+)
+
+
+class PoolCancelled(Exception):
+    """Raised inside a pool once terminate_all() has been called."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting a tool once the stage or run is out of time."""
+
+
+class ToolTimeout(Exception):
+    """
+    Raised by run_tool() and stream_tool() when a command ran past its time
+    limit and was killed with its process group. `stdout` and `stderr` hold
+    what it printed until then (None if not piped).
+    """
+
+    def __init__(self, cmd, timeout, stdout=None, stderr=None):
+        super().__init__(
+            f"{os.path.basename(cmd[0])} timed out after {round(timeout, 1):g}s"
+        )
+        self.cmd = cmd
+        self.timeout = timeout
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+# Seconds a tool process may run, by tool name ("*" for all others).
+_tool_timeouts = {}
+# Monotonic time by which the whole run has to finish.
+_deadline = None
+# Monotonic time by which the current stage has to finish.
+stage_deadline = contextvars.ContextVar("stage_deadline", default=None)
+# Items that timed out, kept for run_stragglers() when deferring is on.
+_stragglers = []
+_defer_stragglers = False
+# Per-process limit while run_stragglers() re-runs items (None: no limit).
+_tail_timeout = None
+_in_tail = contextvars.ContextVar("in_tail", default=False)
+# State of the pool item the current task works on; run_tool() flags it
+# when a process of the item times out.
+_item_state = contextvars.ContextVar("item_state", default=None)
+# Seconds between SIGTERM and SIGKILL for a timed-out process group, so
+# tools get a chance to flush their output files.
+_KILL_GRACE = 2.0
+
+
+_budgets = {}
+_budget_limits = {}
+_budgets_lock = threading.Lock()
+
+
+def parse_limits(value, default=None, cast=int):
+    """
+    Parse a per-name option value ("nmap=4,nuclei=2", "8" for every name,
+    or both: "8,nmap=4") into {name: limit}, converting each limit with
+    `cast`. "*" holds the limit for names without their own entry.
+    """
+    limits = {} if default is None else {"*": default}
+    for part in (value or "").split(","):
+        if not part.strip():
+            continue
+        name, _, limit = part.rpartition("=")
+        limits[name.strip() or "*"] = cast(limit)
+    return limits
+
+
+def set_tool_budgets(limits):
+    """
+    Cap concurrently running processes per tool across the whole run.
+    `limits` maps command names (as on PATH) to limits; "*" applies to all
+    other tools. An empty dict removes every cap.
+    """
+    with _budgets_lock:
+        _budget_limits.clear()
+        _budget_limits.update(limits)
+        _budgets.clear()
+
+
+def _budget_for(tool):
+    with _budgets_lock:
+        if tool not in _budgets:
+            limit = _budget_limits.get(tool, _budget_limits.get("*"))
+            _budgets[tool] = ToolBudget(limit) if limit else None
+        return _budgets[tool]
+
+
+def set_tool_timeouts(limits, defer=False):
+    """
+    Limit how long each tool process may run, in seconds per command name
+    ("*" for all others); an empty dict removes the limits. With `defer`,
+    pool items that time out are also queued for run_stragglers().
+    """
+    global _defer_stragglers
+    _tool_timeouts.clear()
+    _tool_timeouts.update(limits)
+    _defer_stragglers = defer
+    _stragglers.clear()
+
+
+def set_deadline(seconds):
+    """
+    Finish the run within `seconds` from now: later tool processes get only
+    the remaining time and none start once it is used up. None removes it.
+    """
+    global _deadline
+    _deadline = time.monotonic() + seconds if seconds else None
+
+
+def time_left(tool=None):
+    """
+    Seconds a process of `tool` started now may run: the smallest of its
+    per-tool timeout and the time left for the stage and the run. None if
+    nothing limits it.
+    """
+    if _in_tail.get():
+        per_process = _tail_timeout
+    else:
+        per_process = _tool_timeouts.get(tool, _tool_timeouts.get("*"))
+    limits = [per_process] if per_process else []
+    left = deadline_left()
+    if left is not None:
+        limits.append(left)
+    return min(limits) if limits else None
+
+
+def deadline_left():
+    """
+    Seconds until the stage or the run deadline, whichever comes first;
+    None if neither is set.
+    """
+    now = time.monotonic()
+    left = [d - now for d in (_deadline, stage_deadline.get()) if d is not None]
+    return min(left) if left else None
+
+
+def _kill(proc):
+    if proc.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _stop_group(proc):
+    # SIGTERM first so the tool can write out what it has, then SIGKILL.
+    if proc.returncode is None and hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            await asyncio.wait_for(proc.wait(), _KILL_GRACE)
+        except asyncio.TimeoutError:
+            pass
+    _kill(proc)
+
+
+def _timed_out(cmd, timeout, stdout, stderr):
+    error = ToolTimeout(cmd, timeout, stdout, stderr)
+    state = _item_state.get()
+    if state is not None:
+        state["timeout"] = str(error)
+    return error
+
+
+def terminate_all():
+    """
+    Stop every pool and kill all running child processes (and their children).
+    """
+    _stopping.set()
+    with _children_lock:
+        procs = list(_children)
+    for proc in procs:
+        _kill(proc)
+
+
+async def spawn(
+    cmd,
+    stdin=subprocess.DEVNULL,
+    stdout=subprocess.PIPE,
+    stderr=subprocess.PIPE,
+    limit=_LINE_LIMIT,
+):
+    """
+    Start an external command in its own process group. Where os.wait4 is
+    available the command runs under rusage_exec.py so its CPU time and peak
+    memory can be recorded. Every spawned process must be passed to reap().
+    When the tool has a budget (see set_tool_budgets), or adaptive
+    concurrency is on, this first waits for a free slot of the tool, the
+    current destination and the current stage.
+    Raises FileNotFoundError if the tool is not installed and
+    DeadlineExceeded if the stage or run has no time left.
+    """
+    if _stopping.is_set():
+        raise PoolCancelled()
+    if shutil.which(cmd[0]) is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), cmd[0])
+    budget = _budget_for(os.path.basename(cmd[0]))
+    limits = [budget] if budget is not None else []
+    controller = get_controller()
+    if controller is not None:
+        limits += controller.limits_for(current_stage.get(), current_destination.get())
+    await acquire_all(limits)
+    left = time_left(os.path.basename(cmd[0]))
+    if left is not None and left <= 0:
+        release_all(limits)
+        raise DeadlineExceeded(f"no time left to start {os.path.basename(cmd[0])}")
+    try:
+        proc, report_fd = await _launch(cmd, stdin, stdout, stderr, limit)
+    except BaseException:
+        release_all(limits)
+        raise
+    with _children_lock:
+        _children[proc] = (list(cmd), report_fd, time.monotonic(), limits)
+    return proc
+
+
+async def _launch(cmd, stdin, stdout, stderr, limit):
+    if _stopping.is_set():
+        raise PoolCancelled()
+    argv = list(cmd)
+    report_fd = None
+    pass_fds = ()
+    if hasattr(os, "wait4"):
+        report_fd, write_fd = os.pipe()
+        argv = [sys.executable, "-I", "-S", _RUSAGE_EXEC, str(write_fd)] + argv
+        pass_fds = (write_fd,)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            start_new_session=True,
+            limit=limit,
+            pass_fds=pass_fds,
+        )
+    except BaseException:
+        if report_fd is not None:
+            os.close(report_fd)
+        raise
+    finally:
+        for fd in pass_fds:
+            os.close(fd)
+    return proc, report_fd
+
+
+def _read_report(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(fd)
+    try:
+        return json.loads(b"".join(chunks) or b"null")
+    except ValueError:
+        return None
+
+
+async def reap(proc, timed_out=False):
+    """
+    Wait for a spawned process to exit and record its wall time and resource
+    usage in the run metrics. A non-zero exit or a timeout backs off the
+    adaptive limits the process held.
+    """
+    await proc.wait()
+    with _children_lock:
+        entry = _children.pop(proc, None)
+    if entry is None:
+        return
+    cmd, report_fd, started, limits = entry
+    wall = time.monotonic() - started
+    tool = os.path.basename(cmd[0])
+    usage = _read_report(report_fd) if report_fd is not None else None
+    missing = bool(usage and usage.get("missing"))
+    if timed_out:
+        reason = f"{tool} timed out"
+    else:
+        reason = f"{tool} exited with {proc.returncode}"
+    release_all(
+        limits,
+        ok=None if missing or _stopping.is_set() else proc.returncode == 0,
+        latency=wall,
+        reason=reason,
+    )
+    if missing:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), cmd[0])
+    get_metrics().record_process(tool, wall, proc.returncode, usage)
+
+
+async def _drain(stream, chunks):
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+
+async def _communicate(proc, input, out, err):
+    # Like proc.communicate(), but output read so far stays in `out` and
+    # `err` when this is cancelled.
+
+    async def feed():
+        try:
+            proc.stdin.write(input)
+            await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        proc.stdin.close()
+
+    tasks = []
+    if input is not None:
+        tasks.append(feed())
+    if proc.stdout is not None:
+        tasks.append(_drain(proc.stdout, out))
+    if proc.stderr is not None:
+        tasks.append(_drain(proc.stderr, err))
+    await asyncio.gather(*tasks)
+    await proc.wait()
+
+
+async def run_tool(cmd, input=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE):
+    """
+    Run a single external command.
+    Returns (returncode, stdout, stderr); output is bytes or None if not piped.
+    Raises FileNotFoundError if the tool is not installed, and ToolTimeout
+    if it runs past its time limit (see set_tool_timeouts and set_deadline).
+    """
+    proc = await spawn(
+        cmd,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=stdout,
+        stderr=stderr,
+    )
+    timeout = time_left(os.path.basename(cmd[0]))
+    out, err = [], []
+    timed_out = False
+    try:
+        await asyncio.wait_for(_communicate(proc, input, out, err), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        await _stop_group(proc)
+    except BaseException:
+        _kill(proc)
+        raise
+    finally:
+        await reap(proc, timed_out=timed_out)
+    if _stopping.is_set():
+        raise PoolCancelled()
+    out = b"".join(out) if proc.stdout is not None else None
+    err = b"".join(err) if proc.stderr is not None else None
+    if timed_out:
+        raise _timed_out(cmd, timeout, out, err)
+    return proc.returncode, out, err
+
+
+async def stream_tool(cmd, on_line, stderr=subprocess.PIPE, batched=False):
+    """
+    Run an external command and call `on_line(line)` for every stdout line
+    as soon as it is printed; coroutine callbacks are awaited. With
+    `batched`, `on_line` gets the list of lines of each block read instead,
+    which costs far less per line for tools that print millions of them.
+    Returns (returncode, stderr).
+    Raises FileNotFoundError if the tool is not installed, and ToolTimeout
+    if it runs past its time limit; lines printed until then have already
+    been passed to `on_line`.
+    """
+    proc = await spawn(cmd, stderr=stderr)
+    timeout = time_left(os.path.basename(cmd[0]))
+    err = []
+
+    async def deliver(value):
+        result = on_line(value)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def read_stdout():
+        if not batched:
+            async for raw in proc.stdout:
+                line = raw.decode(errors="replace").strip()
+                if line:
+                    await deliver(line)
+            return
+        rest = b""
+        while True:
+            block = await proc.stdout.read(_BLOCK_SIZE)
+            if not block:
+                break
+            # Only whole lines are passed on; the rest waits for the next block.
+            block, _, rest = (rest + block).rpartition(b"\n")
+            text = block.decode(errors="replace")
+            lines = [line for line in map(str.strip, text.split("\n")) if line]
+            if lines:
+                await deliver(lines)
+        if rest.strip():
+            await deliver([rest.decode(errors="replace").strip()])
+
+    async def read_all():
+        tasks = [read_stdout()]
+        if proc.stderr is not None:
+            tasks.append(_drain(proc.stderr, err))
+        await asyncio.gather(*tasks)
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(read_all(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        await _stop_group(proc)
+    except BaseException:
+        _kill(proc)
+        raise
+    finally:
+        await reap(proc, timed_out=timed_out)
+    if _stopping.is_set():
+        raise PoolCancelled()
+    err = b"".join(err) if proc.stderr is not None else None
+    if timed_out:
+        raise _timed_out(cmd, timeout, None, err)
+    return proc.returncode, err
+
+
+async def _run_item(job, target):
+    """
+    Run one pool job. Returns (result, partial); partial is True when a
+    tool of the job timed out or could not start before the deadline.
+    Either way the item is recorded as partial in the run metrics.
+    """
+    if isinstance(target, str):
+        current_destination.set(host_of(target))
+    state = {"timeout": None}
+    _item_state.set(state)
+    try:
+        result = await job(target)
+    except DeadlineExceeded as e:
+        get_metrics().record_partial(target, str(e))
+        return None, True
+    except ToolTimeout:
+        result = None
+    if state["timeout"] is None:
+        if _in_tail.get():
+            get_metrics().clear_partial(target)
+        return result, False
+    kept = "partial result kept" if result is not None else "no output kept"
+    print(f"[yellow]{state['timeout']} on {target}; {kept}.[/yellow]")
+    get_metrics().record_partial(target, state["timeout"])
+    return result, True
+
+
+async def _run_pool(targets, job, concurrency):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    stop = asyncio.Event()
+
+    async def bounded(target):
+        async with semaphore:
+            if stop.is_set():
+                return None
+            try:
+                return await job(target)
+            except BaseException:
+                stop.set()
+                raise
+
+    tasks = [asyncio.create_task(bounded(target)) for target in targets]
+    try:
+        outcomes = await asyncio.gather(*tasks)
+    except BaseException:
+        # A missing tool, an interrupt or a bug in one job stops the rest.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return outcomes
+
+
+def run_pool(
+    targets,
+    job,
+    concurrency=1,
+    tool=None,
+    completed=None,
+    on_result=None,
+    cache_args=None,
+):
+    """
+    Run the coroutine function `job(target)` for every target with at most
+    `concurrency` jobs in flight.
+    Jobs whose tools time out keep whatever result they return (None if they
+    let ToolTimeout through) and are recorded as partial; with deferring on
+    (see set_tool_timeouts) they are also queued for run_stragglers().
+    Targets found in `completed` (target -> earlier result) are not run again
+    and keep their earlier result. `on_result(target, result)` is called as
+    soon as each new complete result is available, so callers can checkpoint
+    it; partial results are only returned.
+    When `cache_args` is given, results are looked up in and saved to the
+    cross-run tool cache keyed by (tool, cache_args, target).
+    Returns a dict of target -> result in the original target order; targets
+    whose job returned None are left out. If the tool is missing, an error
+    naming `tool` is printed and only the completed results are returned.
+    """
+    targets = list(targets)
+    completed = completed or {}
+    todo = [target for target in targets if target not in completed]
+    if len(todo) < len(targets):
+        print(
+            f"[cyan]Skipping {len(targets) - len(todo)} target(s) "
+            f"with results from a previous run.[/cyan]"
+        )
+
+    cache = get_cache() if tool and cache_args is not None else None
+
+    def finish(target, result, partial):
+        if result is None or partial:
+            return
+        if cache:
+            cache.put(tool, cache_args, target, result)
+        if on_result:
+            on_result(target, result)
+
+    async def tracked(target):
+        result = cache.get(tool, cache_args, target) if cache else None
+        if result is not None:
+            if on_result:
+                on_result(target, result)
+            return result
+        result, partial = await _run_item(job, target)
+        if partial and _defer_stragglers and not _in_tail.get():
+            _stragglers.append((current_stage.get(), job, target, finish))
+        finish(target, result, partial)
+        return result
+
+    controller = get_controller()
+    if controller is not None:
+        # The adaptive stage limit decides; the pool only caps it.
+        concurrency = max(concurrency, controller.maximum)
+    try:
+        outcomes = asyncio.run(_run_pool(todo, tracked, concurrency))
+    except FileNotFoundError:
+        if tool is None:
+            raise
+        print(f"[red]Error:[/red] {tool} not found. Please install it.")
+        outcomes = [None] * len(todo)
+    fresh = dict(zip(todo, outcomes))
+    results = {}
+    for target in targets:
+        result = completed[target] if target in completed else fresh[target]
+        if result is not None:
+            results[target] = result
+    return results
+
+
+def run_stragglers(concurrency=1, timeout=None):
+    """
+    Re-run the pool items deferred after timing out, `concurrency` at a time,
+    with `timeout` seconds per process (None: only the run deadline limits
+    them). New results reach the callers' on_result callbacks and replace
+    the partial ones. Returns the number of items re-run.
+    """
+    global _tail_timeout
+    entries = list(_stragglers)
+    _stragglers.clear()
+    if not entries:
+        return 0
+    left = time_left()
+    if left is not None and left <= 0:
+        print(f"[red]No time left to retry {len(entries)} timed-out item(s).[/red]")
+        return 0
+    print(f"[yellow]Retrying {len(entries)} timed-out item(s)...[/yellow]")
+    _tail_timeout = timeout
+    by_stage = {}
+    for stage, job, target, finish in entries:
+        by_stage.setdefault(stage, []).append((job, target, finish))
+
+    async def rerun(entry):
+        job, target, finish = entry
+        result, partial = await _run_item(job, target)
+        finish(target, result, partial)
+        return result
+
+    for stage, items in by_stage.items():
+        stage_token = current_stage.set(stage)
+        tail_token = _in_tail.set(True)
+        try:
+            asyncio.run(_run_pool(items, rerun, concurrency))
+        except FileNotFoundError:
+            pass
+        finally:
+            _in_tail.reset(tail_token)
+            current_stage.reset(stage_token)
+    return len(entries)
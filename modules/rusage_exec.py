@@ -0,0 +1,45 @@
+"""
+Launcher used by modules/runner.py to measure an external tool.
+
+Usage: python rusage_exec.py <report fd> <command...>
+
+Runs the command, waits for it with os.wait4 and writes its resource usage
+as JSON to the report fd. Exits with the command's exit code, or 127 if the
+command does not exist.
+"""
+
+import json
+import os
+import sys
+
+
+def main():
+    report_fd = int(sys.argv[1])
+    cmd = sys.argv[2:]
+    # The tool itself must not hold the report pipe open.
+    os.set_inheritable(report_fd, False)
+    try:
+        pid = os.posix_spawnp(cmd[0], cmd, os.environ)
+    except FileNotFoundError:
+        os.write(report_fd, json.dumps({"missing": True}).encode())
+        return 127
+    _, status, usage = os.wait4(pid, 0)
+    maxrss_kb = usage.ru_maxrss
+    if sys.platform == "darwin":
+        maxrss_kb //= 1024
+    os.write(
+        report_fd,
+        json.dumps(
+            {
+                "user": usage.ru_utime,
+                "sys": usage.ru_stime,
+                "maxrss_kb": maxrss_kb,
+            }
+        ).encode(),
+    )
+    code = os.waitstatus_to_exitcode(status)
+    return code if code >= 0 else 128 - code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
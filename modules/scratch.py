@@ -0,0 +1,109 @@
+"""
+Per-run scratch directory for the files some tools cannot do without
+(target lists, results of tools that only write to files). Every run gets
+its own directory with unique file names, so runs sharing a working
+directory never touch each other's files, and it is removed when the run
+ends.
+"""
+
+import atexit
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+from rich import print
+
+# Memory-backed filesystem used with tmpfs=True where it exists.
+TMPFS = "/dev/shm"
+
+_scratch = None
+_lock = threading.Lock()
+
+
+class Scratch:
+    """
+    A private temporary directory under `base` (default: the system temp
+    directory, or TMPFS with `tmpfs`). Removed by cleanup() or at exit
+    unless `keep` is set.
+    """
+
+    def __init__(self, base=None, tmpfs=False, keep=False):
+        if tmpfs and base is None:
+            if os.path.isdir(TMPFS) and os.access(TMPFS, os.W_OK):
+                base = TMPFS
+            else:
+                print(
+                    f"[yellow]{TMPFS} is not available; "
+                    f"using {tempfile.gettempdir()}.[/yellow]"
+                )
+        if base is not None:
+            os.makedirs(base, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="su6oRecon-", dir=base)
+        self.keep = keep
+        self._ids = itertools.count()
+        atexit.register(self.cleanup)
+
+    def file(self, name, lines=None):
+        """
+        A new path in the directory ending in `name`; with `lines`, the
+        file is written one line per item.
+        """
+        path = os.path.join(self.path, f"{next(self._ids)}-{name}")
+        if lines is not None:
+            with open(path, "w") as f:
+                for line in lines:
+                    f.write(f"{line}\n")
+        return path
+
+    def cleanup(self):
+        if self.keep:
+            print(f"[cyan]Scratch files kept in {self.path}[/cyan]")
+        else:
+            shutil.rmtree(self.path, ignore_errors=True)
+        atexit.unregister(self.cleanup)
+
+
+def set_scratch(scratch):
+    """
+    Make `scratch` the run's scratch directory, cleaning up the previous one.
+    """
+    global _scratch
+    with _lock:
+        previous, _scratch = _scratch, scratch
+    if previous is not None:
+        previous.cleanup()
+    return scratch
+
+
+def get_scratch():
+    """
+    The run's scratch directory, created in the system temp directory on
+    first use if none was set.
+    """
+    global _scratch
+    with _lock:
+        if _scratch is None:
+            _scratch = Scratch()
+        return _scratch
+
+
+def scratch_file(name, lines=None):
+    return get_scratch().file(name, lines)
+
+
+def consume(path):
+    """
+    Contents of a scratch file, which is removed, or None if the tool did
+    not write it. Also used for what a killed tool left behind.
+    """
+    try:
+        with open(path, errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -2,33 +2,56 @@
 Screenshot module using gowitness to capture screenshots of domains.
 """
 
-import subprocess
+import os
+import shutil
 from rich import print
 
+from modules.cache import get_cache
+from modules.runner import run_pool, run_tool
+from modules.scratch import scratch_file
+from modules.targets import unique_urls
 
-def run_screenshot(domains):
+
+def run_screenshot(domains, concurrency=1):
     """
-    Run gowitness screenshot for each domain.
+    Run gowitness screenshot for each unique URL of the domains.
+    Up to `concurrency` gowitness processes run at the same time.
+    Each URL's result is the list of screenshot files it produced; a cached
+    result only counts while those files are still there.
     """
     output_dir = "screenshots"
-    try:
-        subprocess.run(["mkdir", "-p", output_dir], check=True)
-    except Exception:
-        pass
-    for domain in domains:
-        url = f"http://{domain}"
+    os.makedirs(output_dir, exist_ok=True)
+    cache = get_cache()
+    cache_args = ["--destination", output_dir]
+
+    async def capture(url):
+        cached = cache.get("gowitness", cache_args, url) if cache else None
+        if isinstance(cached, list) and cached and all(map(os.path.exists, cached)):
+            return cached
         print(f"[yellow]Capturing screenshot of {url}...[/yellow]")
+        # A directory of its own, so the files of this URL are known even
+        # with several gowitness processes running.
+        staging = scratch_file("gowitness")
+        os.makedirs(staging)
         try:
-            subprocess.run(
-                ["gowitness", "single", "--url", url, "--destination", output_dir],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            returncode, _, stderr = await run_tool(
+                ["gowitness", "single", "--url", url, "--destination", staging]
             )
-        except FileNotFoundError:
-            print("[red]Error:[/red] gowitness not found. Please install it.")
-            return
-        except subprocess.CalledProcessError as e:
-            print(
-                f"[red]gowitness failed for {domain}:[/red] {e.stderr.decode().strip()}"
-            )
\ No newline at end of file
+            if returncode != 0:
+                print(
+                    f"[red]gowitness failed for {url}:[/red] "
+                    f"{stderr.decode().strip()}"
+                )
+                return None
+            files = []
+            for name in sorted(os.listdir(staging)):
+                path = os.path.join(output_dir, name)
+                shutil.move(os.path.join(staging, name), path)
+                files.append(path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        if cache and files:
+            cache.put("gowitness", cache_args, url, files)
+        return files
+
+    run_pool(unique_urls(domains), capture, concurrency, tool="gowitness")
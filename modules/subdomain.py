@@ -3,95 +3,137 @@ Subdomain enumeration module integrating assetfinder, subfinder, and amass.
 """
 
 import asyncio
-import subprocess
+import os
 from rich import print
 
+from modules.cache import get_cache
+from modules.dedupe import CHUNK, DiskDedupe, write_names
+from modules.metrics import get_metrics
+from modules.runner import ToolTimeout, stream_tool
+
+
+_STREAM_COMMANDS = {
+    "assetfinder": lambda domain: ["assetfinder", "--subs-only", domain],
+    "subfinder": lambda domain: ["subfinder", "-d", domain, "-silent"],
+    "amass": lambda domain: ["amass", "enum", "-d", domain, "-passive"],
+}
+
+
+async def _stream_tool(name, cmd, on_subdomain):
+    print(f"[yellow]Running {name} (streaming)...[/yellow]")
+
+    async def on_line(line):
+        for sub in line.split():
+            await on_subdomain(sub)
 
-async def run_assetfinder(domain):
-    print(f"[yellow]Running assetfinder for {domain}...[/yellow]")
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "assetfinder",
-            "--subs-only",
-            domain,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-        if stderr:
-            print(f"[red]assetfinder error:[/red] {stderr.decode().strip()}")
-        subs = stdout.decode().split()
-        return subs
+        _, stderr = await stream_tool(cmd, on_line)
     except FileNotFoundError:
-        print("[red]Error:[/red] assetfinder not found. Please install it.")
-        return []
+        print(f"[red]Error:[/red] {name} not found. Please install it.")
+        return
+    except ToolTimeout as e:
+        print(f"[yellow]{e}; keeping the names it found.[/yellow]")
+        get_metrics().record_partial(name, str(e))
+        return
+    if stderr:
+        print(f"[red]{name} error:[/red] {stderr.decode().strip()}")
 
 
-async def run_subfinder(domain):
-    print(f"[yellow]Running subfinder for {domain}...[/yellow]")
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            "subfinder",
-            "-d",
-            domain,
-            "-silent",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+async def stream_subdomains(domain, on_subdomain, module=None):
+    """
+    Run the enumerators concurrently and await `on_subdomain(name)` for every
+    line as soon as a tool prints it. Names are not deduplicated here.
+    """
+    tools = [name for name in _STREAM_COMMANDS if module in (None, name)]
+    if not tools:
+        print("[red]No valid subdomain module selected.[/red]")
+        return
+    await asyncio.gather(
+        *(
+            _stream_tool(name, _STREAM_COMMANDS[name](domain), on_subdomain)
+            for name in tools
         )
-        stdout, stderr = await proc.communicate()
-        if stderr:
-            print(f"[red]subfinder error:[/red] {stderr.decode().strip()}")
-        subs = stdout.decode().split()
-        return subs
-    except FileNotFoundError:
-        print("[red]Error:[/red] subfinder not found. Please install it.")
-        return []
+    )
 
 
-async def run_amass(domain):
-    print(f"[yellow]Running amass for {domain}...[/yellow]")
+async def _run_enumerator(name, cmd, names):
+    """
+    Stream the tool's output into `names` line by line, so its full output
+    is never held in memory. Returns True if the tool ran to completion.
+    """
+
+    def on_lines(lines):
+        for line in lines:
+            names.update(line.split())
+
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "amass",
-            "enum",
-            "-d",
-            domain,
-            "-passive",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-        if stderr:
-            print(f"[red]amass error:[/red] {stderr.decode().strip()}")
-        subs = stdout.decode().split()
-        return subs
+        _, stderr = await stream_tool(cmd, on_lines, batched=True)
     except FileNotFoundError:
-        print("[red]Error:[/red] amass not found. Please install it.")
-        return []
+        print(f"[red]Error:[/red] {name} not found. Please install it.")
+        return False
+    except ToolTimeout as e:
+        print(f"[yellow]{e}; keeping the names it found.[/yellow]")
+        get_metrics().record_partial(name, str(e))
+        return False
+    if stderr:
+        print(f"[red]{name} error:[/red] {stderr.decode().strip()}")
+    return True
+
+
+async def _cached(tool, domain, chunk):
+    # Cache entries are stored and read one name per row, so a hit or a
+    # write never holds a tool's whole output in memory either.
+    names = DiskDedupe(chunk, label=tool)
+    cache = get_cache()
+    if cache is not None:
+        hit = cache.get_items(tool, [], domain)
+        if hit is not None:
+            print(f"[cyan]Using cached {tool} results for {domain}.[/cyan]")
+            for name in hit:
+                names.add(name)
+            return names
+    print(f"[yellow]Running {tool} for {domain}...[/yellow]")
+    complete = await _run_enumerator(tool, _STREAM_COMMANDS[tool](domain), names)
+    if complete and cache is not None:
+        cache.put_items(tool, [], domain, names)
+    return names
 
 
-def run_subdomain_enumeration(domain, proxy=None, tor=False, module=None):
+async def _gather(tasks):
+    return await asyncio.gather(*tasks)
+
+
+def enumerate_subdomains(domain, proxy=None, tor=False, module=None, chunk=CHUNK):
+    """
+    Run subdomain enumeration using assetfinder, subfinder, and amass (or
+    only `module`), deduplicating their output on disk as it streams in.
+    Returns a DiskDedupe that iterates the unique names in sorted order
+    without loading them all; close it when done.
+    """
+    names = DiskDedupe(chunk, label="subdomains")
+    tools = [name for name in _STREAM_COMMANDS if module in (None, name)]
+    if not tools:
+        print("[red]No valid subdomain module selected.[/red]")
+        return names
+    for found in asyncio.run(_gather([_cached(t, domain, chunk) for t in tools])):
+        names.absorb(found)
+    return names
+
+
+def run_subdomain_enumeration(
+    domain, proxy=None, tor=False, module=None, path=None, accept=None
+):
     """
     Run subdomain enumeration using assetfinder, subfinder, and amass.
     If module is specified, run only that tool.
-    Returns a deduplicated list of subdomains.
+    The deduplicated, sorted subdomains for which `accept(name)` holds (all
+    by default) are written to `path`, one per line, without being held in
+    memory; returns the path. Read it back with read_names().
     """
-    loop = asyncio.get_event_loop()
-    tasks = []
-    if module == "assetfinder" or module is None:
-        tasks.append(run_assetfinder(domain))
-    if module == "subfinder" or module is None:
-        tasks.append(run_subfinder(domain))
-    if module == "amass" or module is None:
-        tasks.append(run_amass(domain))
-    if not tasks:
-        print("[red]No valid subdomain module selected.[/red]")
-        return []
-    results = loop.run_until_complete(asyncio.gather(*tasks))
-    subdomains = set()
-    for res in results:
-        for sub in res:
-            sub = sub.strip()
-            if sub:
-                subdomains.add(sub)
-    return sorted(subdomains)
\ No newline at end of file
+    path = path or os.path.join("sessions", f"{domain}_subdomains.txt")
+    names = enumerate_subdomains(domain, proxy=proxy, tor=tor, module=module)
+    try:
+        write_names((n for n in names if accept is None or accept(n)), path)
+    finally:
+        names.close()
+    return path
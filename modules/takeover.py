@@ -2,41 +2,156 @@
 Subdomain takeover detection using subjack.
 """
 
-import subprocess
+import asyncio
+import os
+import re
+import time
 from rich import print
 
+from modules.adaptive import get_controller
+from modules.cache import Partial, cached_call, input_digest
+from modules.metrics import current_stage, get_metrics
+from modules.notify import notify_finding
+from modules.runner import DeadlineExceeded, ToolTimeout, run_tool
+from modules.scratch import consume, scratch_file
+from modules.targets import unique_hosts
 
-def run_subjack(targets, timeout=30):
+
+# subjack threads when adaptive concurrency is off, and the starting point
+# when it is on.
+DEFAULT_THREADS = 50
+# Targets per subjack run in adaptive mode; each run uses the thread count
+# the controller settled on after the previous one.
+ADAPTIVE_CHUNK = 500
+# "[Service] host" or "[Vulnerable] host (service)", depending on the version.
+_SUBJACK_LINE = re.compile(r"^\[([^\]]+)\]\s+(\S+)(?:\s+\(([^)]*)\))?")
+
+
+def parse_takeover(line):
+    """
+    {"host", "service"} of one subjack result line, or None.
+    """
+    match = _SUBJACK_LINE.match(line.strip())
+    if not match:
+        return None
+    tag, host, service = match.groups()
+    if tag.lower() == "not vulnerable":
+        return None
+    if not service and tag.lower() != "vulnerable":
+        service = tag
+    return {"host": host.lower(), "service": (service or "").lower() or None}
+
+
+def run_subjack(targets, timeout=30, threads=None):
     """
-    Run subjack to detect subdomain takeover.
+    Run subjack on the unique hostnames of the targets to detect subdomain
+    takeover.
+    `threads` fixes subjack's thread count. By default it is DEFAULT_THREADS,
+    or adjusted between runs over chunks of the targets when adaptive
+    concurrency is on.
     """
+    targets = unique_hosts(targets)
+    return cached_call(
+        "subjack",
+        ["-timeout", str(timeout)],
+        input_digest(targets),
+        lambda: _subjack(targets, timeout, threads),
+    )
+
+
+def _subjack(targets, timeout, threads):
     results = {}
-    temp_file = "subjack_targets.txt"
-    with open(temp_file, "w") as f:
-        for target in targets:
-            f.write(target + "\n")
+    controller = get_controller()
+    limit = None
+    if threads is None and controller is not None:
+        limit = controller.for_stage(
+            f"{current_stage.get() or 'takeover'}/subjack-threads",
+            initial=DEFAULT_THREADS,
+            maximum=DEFAULT_THREADS * 4,
+        )
+    chunk = ADAPTIVE_CHUNK if limit is not None else max(1, len(targets))
     print("[yellow]Running subjack...[/yellow]")
-    output_file = "subjack_results.txt"
+    vulnerabilities = []
+    partial = False
+    out_of_time = None
+    for start in range(0, max(1, len(targets)), chunk):
+        batch = targets[start : start + chunk]
+        # In adaptive mode a failed chunk is retried once with the reduced
+        # thread count.
+        for _ in range(2 if limit is not None else 1):
+            count = limit.limit if limit is not None else threads or DEFAULT_THREADS
+            started = time.monotonic()
+            output_file = scratch_file("subjack_results.txt")
+            try:
+                found = _run_subjack(batch, timeout, count, output_file)
+            except FileNotFoundError:
+                print("[red]Error:[/red] subjack not found. Please install it.")
+                return results
+            except ToolTimeout as e:
+                print(f"[yellow]{e}; keeping the takeovers found so far.[/yellow]")
+                get_metrics().record_partial("subjack", str(e))
+                output = consume(output_file)
+                found = output.splitlines() if output else []
+                partial = True
+                break
+            except DeadlineExceeded as e:
+                out_of_time = e
+                break
+            if limit is not None:
+                limit.observe(
+                    found is not None,
+                    time.monotonic() - started,
+                    weight=max(1, len(batch)),
+                    reason="subjack failed",
+                )
+            if found is not None:
+                break
+        if out_of_time is not None:
+            # Hosts not checked before the deadline are left as partial,
+            # like the per-target stages leave their unstarted targets.
+            print(
+                f"[yellow]{out_of_time}; keeping the takeovers found so far.[/yellow]"
+            )
+            for host in targets[start:]:
+                get_metrics().record_partial(host, str(out_of_time))
+            partial = True
+            break
+        if found is None:
+            print("[red]subjack scan failed[/red]")
+            if limit is None:
+                return results
+            continue
+        for line in found:
+            notify_finding("subjack", None, line)
+        vulnerabilities.extend(found)
+    results["vulnerabilities"] = vulnerabilities
+    return Partial(results) if partial else results
+
+
+def _run_subjack(targets, timeout, threads, output_file):
+    list_file = scratch_file("subjack_targets.txt", targets)
     try:
-        subprocess.run(
-            [
-                "subjack",
-                "-w",
-                temp_file,
-                "-t",
-                "50",
-                "-timeout",
-                str(timeout),
-                "-o",
-                output_file,
-            ],
-            check=True,
+        returncode, _, _ = asyncio.run(
+            run_tool(
+                [
+                    "subjack",
+                    "-w",
+                    list_file,
+                    "-t",
+                    str(threads),
+                    "-timeout",
+                    str(timeout),
+                    "-o",
+                    output_file,
+                ],
+                stdout=None,
+                stderr=None,
+            )
         )
-        with open(output_file) as f:
-            data = f.read().splitlines()
-        results["vulnerabilities"] = data
-    except FileNotFoundError:
-        print("[red]Error:[/red] subjack not found. Please install it.")
-    except subprocess.CalledProcessError:
-        print("[red]subjack scan failed[/red]")
-    return results
\ No newline at end of file
+    finally:
+        os.remove(list_file)
+    output = consume(output_file)
+    if returncode != 0:
+        return None
+    # subjack only writes the file when it found something.
+    return output.splitlines() if output else []
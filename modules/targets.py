@@ -0,0 +1,150 @@
+"""
+Canonical targets. Stages pass targets around as strings: bare hosts,
+host:port pairs or URLs. Modules parse them into Target records and work on
+the unique units their tool needs, as plain strings that double as session
+and cache keys: hostnames for nmap, ParamSpider and subjack, and one URL per
+web origin for ffuf, Nuclei and gowitness.
+"""
+
+import ipaddress
+import re
+import sys
+
+SCHEME_PORTS = {"http": 80, "https": 443}
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _is_ip(host):
+    # Most hosts are names; only try to parse what could be an address.
+    if not (host[:1].isdigit() or ":" in host):
+        return False
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _split(value):
+    """
+    (scheme, host, port, path) of a bare host, host:port pair or URL. Plain
+    string splitting, since urlsplit() is several times slower and targets
+    come by the million.
+    """
+    scheme, sep, rest = value.partition("://")
+    if not sep:
+        scheme, rest = None, value
+    rest = rest.split("#", 1)[0].split("?", 1)[0]
+    netloc, slash, path = rest.partition("/")
+    netloc = netloc.rpartition("@")[2]
+    port = None
+    if netloc.startswith("["):
+        host, _, tail = netloc[1:].partition("]")
+        port = tail[1:]
+    elif netloc.count(":") == 1:
+        host, port = netloc.split(":")
+    else:
+        host = netloc
+    port = int(port) if port and port.isdigit() else None
+    return scheme, host, port, f"/{path}".rstrip("/") if slash else ""
+
+
+class Target:
+    """
+    One host, optionally with a scheme, a non-default port and a path.
+    Hostnames are lower-cased and interned, so the many records of a large
+    session share one string per host.
+    """
+
+    __slots__ = ("scheme", "host", "port", "path", "ip")
+
+    def __init__(self, host, scheme=None, port=None, path="", ip=None):
+        self.host = sys.intern(host.lower().rstrip("."))
+        self.scheme = sys.intern(scheme.lower()) if scheme else None
+        # The scheme's own port is implied rather than stored, so
+        # https://x and https://x:443 are the same target.
+        self.port = None if port == SCHEME_PORTS.get(self.scheme) else port
+        self.path = path
+        self.ip = ip
+
+    @classmethod
+    def parse(cls, value):
+        """
+        A Target from a bare host, host:port, IP or URL string.
+        """
+        if isinstance(value, cls):
+            return value
+        scheme, host, port, path = _split(value.strip())
+        return cls(
+            host or value,
+            scheme=scheme,
+            port=port,
+            path=path,
+            ip=host if _is_ip(host) else None,
+        )
+
+    @property
+    def netloc(self):
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"{host}:{self.port}" if self.port else host
+
+    @property
+    def url(self):
+        """
+        The target as a URL; bare hosts are taken to be plain HTTP.
+        """
+        return f"{self.scheme or 'http'}://{self.netloc}{self.path}"
+
+    @property
+    def name(self):
+        """
+        The target as a string that is safe to use in a filename.
+        """
+        return _UNSAFE.sub("_", str(self)).strip("_")
+
+    def _key(self):
+        return (self.scheme, self.host, self.port, self.path)
+
+    def __eq__(self, other):
+        return isinstance(other, Target) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        return self.url if self.scheme else f"{self.netloc}{self.path}"
+
+    def __repr__(self):
+        return f"Target({str(self)!r})"
+
+
+def host_of(target):
+    """
+    Hostname (or IP) of a bare host, a host:port pair or a URL.
+    """
+    return Target.parse(target).host
+
+
+def safe_name(target):
+    return Target.parse(target).name
+
+
+def unique_hosts(targets):
+    """
+    The hostnames of `targets`, once each, in order of first appearance.
+    """
+    return list(dict.fromkeys(host_of(target) for target in targets))
+
+
+def unique_urls(targets):
+    """
+    One URL per host, port and path, in order of first appearance. The http
+    and https variants of a host collapse into one, preferring https.
+    """
+    best = {}
+    for target in map(Target.parse, targets):
+        key = (target.host, target.port, target.path)
+        known = best.get(key)
+        if known is None or (target.scheme == "https" and known.scheme != "https"):
+            best[key] = target
+    return [target.url for target in best.values()]
@@ -2,38 +2,238 @@
 Vulnerability scanning module using Nuclei.
 """
 
-import subprocess
+import json
+import os
 from rich import print
 
+from modules.cache import get_cache
+from modules.metrics import get_metrics
+from modules.notify import notify_finding
+from modules.runner import ToolTimeout, run_pool, stream_tool
+from modules.scratch import scratch_file
+from modules.targets import Target, host_of, unique_urls
 
-def run_vulnerability_scan(targets, templates=None):
+SEVERITY_COLORS = {
+    "critical": "bold red",
+    "high": "red",
+    "medium": "yellow",
+    "low": "green",
+    "info": "cyan",
+}
+
+
+def _filter_args(templates=None, tags=None, severity=None):
+    """
+    Template selection flags shared by the per-target and batch modes.
+    Without `templates`, nuclei uses its own installed template tree.
+    """
+    args = []
+    if templates:
+        args.extend(["-t", templates])
+    if tags:
+        args.extend(["-tags", tags])
+    if severity:
+        args.extend(["-severity", severity])
+    return args
+
+
+def format_finding(finding):
+    """
+    One-line summary of a finding record; older sessions stored text lines.
+    """
+    if isinstance(finding, str):
+        return finding
+    return f"[{finding['severity']}] {finding['template']} {finding['matched_at']}"
+
+
+def _report(target, finding):
+    notify_finding("nuclei", target, format_finding(finding))
+    color = SEVERITY_COLORS.get(finding["severity"], "white")
+    print(
+        f"[{color}]\\[{finding['severity']}][/{color}] "
+        f"{finding['template']} {finding['matched_at']}"
+    )
+
+
+def run_vulnerability_scan(
+    targets,
+    templates=None,
+    tags=None,
+    severity=None,
+    concurrency=1,
+    completed=None,
+    on_result=None,
+):
     """
-    Run Nuclei scanning on given targets.
+    Run Nuclei scanning on given targets, once per unique URL (see
+    unique_urls); results are keyed by that URL. Findings are parsed from
+    -jsonl output as they stream in (see parse_finding).
+    Up to `concurrency` nuclei processes run at the same time.
+    Targets in `completed` are skipped; `on_result` is called per new result.
     """
+    filters = _filter_args(templates, tags, severity)
+    targets = unique_urls(targets)
+
+    async def scan(target):
+        print(f"[yellow]Running Nuclei on {target}...[/yellow]")
+        findings = []
+
+        def on_line(line):
+            finding = parse_finding(line)
+            if finding is not None:
+                findings.append(finding)
+                _report(target, finding)
+
+        try:
+            returncode, stderr = await stream_tool(
+                ["nuclei", "-u", target, "-jsonl", "-silent", "-omit-raw"]
+                + filters,
+                on_line,
+            )
+        except ToolTimeout:
+            # Findings streamed before the kill are kept.
+            return findings
+        if returncode != 0:
+            print(
+                f"[red]Nuclei scan failed on {target}:[/red] "
+                f"{stderr.decode().strip()}"
+            )
+            return None
+        return findings
+
+    return run_pool(
+        targets,
+        scan,
+        concurrency,
+        tool="nuclei",
+        cache_args=["-jsonl"] + filters,
+        completed=completed,
+        on_result=on_result,
+    )
+
+
+def parse_finding(line):
+    """
+    Turn one nuclei -jsonl line into a compact finding record, or None.
+    """
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    info = data.get("info", {})
+    return {
+        "template": data.get("template-id"),
+        "name": info.get("name"),
+        "severity": info.get("severity", "unknown"),
+        "host": data.get("host"),
+        "url": data.get("url"),
+        "matched_at": data.get("matched-at"),
+    }
+
+
+def run_batched_vulnerability_scan(
+    targets,
+    templates=None,
+    tags=None,
+    severity=None,
+    shards=1,
+    completed=None,
+    on_result=None,
+):
+    """
+    Scan all targets with `shards` parallel nuclei processes reading their
+    targets from a -l list, so templates are loaded once per process instead
+    of once per target. Findings are parsed from -jsonl output as they stream
+    in and attributed to the target they were found on.
+    Targets are scanned once per unique URL, and every scanned URL gets a
+    list of findings (possibly empty).
+    Targets in `completed` are skipped; `on_result` is called per new result.
+    """
+    completed = completed or {}
+    targets = unique_urls(targets)
+    filters = _filter_args(templates, tags, severity)
+    cache = get_cache()
+    cache_args = ["-jsonl"] + filters
     results = {}
-    nuclei_templates = templates or "/path/to/nuclei-templates"
+    todo = []
     for target in targets:
-        print(f"[yellow]Running Nuclei on {target}...[/yellow]")
-        output_file = f"nuclei_{target}.txt"
+        if target in completed:
+            continue
+        hit = cache.get("nuclei", cache_args, target) if cache else None
+        if hit is not None:
+            results[target] = hit
+            if on_result:
+                on_result(target, hit)
+        else:
+            todo.append(target)
+
+    shards = max(1, min(shards, len(todo) or 1))
+    groups = [todo[i::shards] for i in range(shards)]
+
+    async def scan(index):
+        group = groups[index]
+        if not group:
+            return None
+        by_host = {}
+        for target in group:
+            by_host.setdefault(host_of(target), target)
+        findings = {target: [] for target in group}
+
+        def on_line(line):
+            finding = parse_finding(line)
+            if finding is None:
+                return
+            # Depending on the nuclei version, "host" is the input URL or just
+            # the hostname; fall back to the hostname when the URL is unknown.
+            url = finding["url"] or finding["host"]
+            if not url:
+                return
+            target = Target.parse(url).url
+            if target not in findings:
+                target = by_host.get(host_of(url))
+            if target is None:
+                return
+            findings[target].append(finding)
+            _report(target, finding)
+
+        list_file = scratch_file(f"nuclei_batch_{index}.txt", group)
+        print(
+            f"[yellow]Running Nuclei on {len(group)} target(s) "
+            f"(shard {index})[/yellow]"
+        )
         try:
-            subprocess.run(
-                [
-                    "nuclei",
-                    "-u",
-                    f"http://{target}",
-                    "-o",
-                    output_file,
-                    "-t",
-                    nuclei_templates,
-                ],
-                check=True,
+            returncode, stderr = await stream_tool(
+                ["nuclei", "-l", list_file, "-jsonl", "-silent", "-omit-raw"]
+                + filters,
+                on_line,
             )
-            with open(output_file) as f:
-                data = f.read().splitlines()
-            results[target] = data
-        except FileNotFoundError:
-            print("[red]Error:[/red] nuclei not found. Please install it.")
-            break
-        except subprocess.CalledProcessError:
-            print(f"[red]Nuclei scan failed on {target}[/red]")
-    return results
\ No newline at end of file
+        except ToolTimeout as e:
+            # Findings streamed before the kill are kept, but no target of
+            # the shard is known to be fully scanned, so none is cached or
+            # checkpointed, and all of them are scanned again on --resume.
+            for target in group:
+                get_metrics().record_partial(target, str(e))
+                if findings[target]:
+                    results[target] = findings[target]
+            return True
+        finally:
+            os.remove(list_file)
+        if returncode != 0:
+            print(
+                f"[red]Nuclei shard {index} failed:[/red] {stderr.decode().strip()}"
+            )
+            return None
+        for target in group:
+            results[target] = findings[target]
+            if cache:
+                cache.put("nuclei", cache_args, target, findings[target])
+            if on_result:
+                on_result(target, findings[target])
+        return True
+
+    run_pool(range(shards), scan, shards, tool="nuclei")
+    return {
+        target: completed[target] if target in completed else results[target]
+        for target in targets
+        if target in completed or target in results
+    }
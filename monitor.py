@@ -0,0 +1,314 @@
+"""
+Continuous monitoring: a persistent per-target index of known subdomains,
+alive URLs and their response fingerprints, so each cycle only sends what is
+new or changed through the expensive scans.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from rich import print
+
+from modules.cluster import simhash_distance
+from modules.dedupe import count_names, read_names
+from modules.directory_scan import run_directory_scan
+from modules.portscan import run_port_scan
+from modules.subdomain import run_subdomain_enumeration
+from modules.takeover import run_subjack
+from modules.vulnscan import format_finding, run_vulnerability_scan
+from pipeline import Stage
+
+SCAN_STAGES = ("port_scan", "directory_scan", "vulnerability_scan", "takeover")
+
+# Probe record fields compared between cycles; "simhash" is compared by
+# distance so small dynamic parts of a page do not count as a change.
+FINGERPRINT_FIELDS = ("status", "title", "headers", "server", "location", "simhash")
+SIMHASH_THRESHOLD = 6
+
+
+def fingerprint(record):
+    """
+    The parts of a native probe record that say what a URL serves, or None
+    for httpx results, which carry no response details.
+    """
+    if not record:
+        return None
+    return {field: record.get(field) for field in FINGERPRINT_FIELDS}
+
+
+def changed_fields(before, after, threshold=SIMHASH_THRESHOLD):
+    """
+    Names of the fingerprint fields that differ between two cycles.
+    """
+    if before is None or after is None:
+        return []
+    fields = []
+    for field in FINGERPRINT_FIELDS:
+        old, new = before.get(field), after.get(field)
+        if field == "simhash" and old and new:
+            if simhash_distance(old, new) > threshold:
+                fields.append(field)
+        elif old != new:
+            fields.append(field)
+    return fields
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class MonitorIndex:
+    """
+    What earlier cycles saw for one target, in
+    sessions/<target>_monitor_index.db (SQLite). Items that disappear are
+    flagged gone rather than deleted, and count as new if they come back.
+    """
+
+    def __init__(self, target):
+        os.makedirs("sessions", exist_ok=True)
+        self.target = target
+        self.path = os.path.join("sessions", f"{target}_monitor_index.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS subdomains ("
+                "name TEXT PRIMARY KEY, first_seen TEXT, last_seen TEXT, "
+                "gone INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                "url TEXT PRIMARY KEY, fingerprint TEXT, first_seen TEXT, "
+                "last_seen TEXT, changed TEXT, gone INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cycles ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT, "
+                "finished TEXT, summary TEXT)"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM subdomains LIMIT 1").fetchone()
+        return row is None
+
+    def cycle_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cycles").fetchone()[0]
+
+    def diff(self, subdomains, records):
+        """
+        Compare this cycle's subdomains and probe records ({url: record})
+        with the index. Returns the delta; "scan" lists the URLs that are
+        new or changed and need the expensive stages.
+        """
+        with self._lock:
+            known_names = {
+                name
+                for (name,) in self._conn.execute(
+                    "SELECT name FROM subdomains WHERE gone = 0"
+                )
+            }
+            known_urls = {
+                url: json.loads(value) if value else None
+                for url, value in self._conn.execute(
+                    "SELECT url, fingerprint FROM urls WHERE gone = 0"
+                )
+            }
+        names = set(subdomains)
+        changed = {}
+        for url in sorted(set(records) & set(known_urls)):
+            after = fingerprint(records[url])
+            fields = changed_fields(known_urls[url], after)
+            if fields:
+                changed[url] = {
+                    "fields": fields,
+                    "before": known_urls[url],
+                    "after": after,
+                }
+        new_alive = sorted(set(records) - set(known_urls))
+        return {
+            "new_subdomains": sorted(names - known_names),
+            "gone_subdomains": sorted(known_names - names),
+            "new_alive": new_alive,
+            "gone_alive": sorted(set(known_urls) - set(records)),
+            "changed": changed,
+            "scan": sorted(new_alive + list(changed)),
+        }
+
+    def commit(self, subdomains, records, started, summary):
+        """
+        Make this cycle's view the new baseline. Called only once the
+        cycle's scans are done, so an interrupted cycle is redone in full.
+        """
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE subdomains SET gone = 1")
+            self._conn.executemany(
+                "INSERT INTO subdomains (name, first_seen, last_seen) "
+                "VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "last_seen = excluded.last_seen, gone = 0",
+                ((name, now, now) for name in subdomains),
+            )
+            self._conn.execute("UPDATE urls SET gone = 1")
+            self._conn.executemany(
+                "INSERT INTO urls (url, fingerprint, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                "changed = CASE WHEN urls.fingerprint IS NOT excluded.fingerprint "
+                "THEN excluded.last_seen ELSE urls.changed END, "
+                "fingerprint = excluded.fingerprint, "
+                "last_seen = excluded.last_seen, gone = 0",
+                [
+                    (url, json.dumps(fingerprint(record)), now, now)
+                    for url, record in records.items()
+                ],
+            )
+            self._conn.execute(
+                "INSERT INTO cycles (started, finished, summary) VALUES (?, ?, ?)",
+                (started, now, json.dumps(summary)),
+            )
+
+
+def cycle_stages(target, index, probe, concurrency=1, nuclei_filters=None, scan=True):
+    """
+    Stages of one monitoring cycle. `probe(names)` returns {url: record}.
+    Without `scan`, the cycle only records a baseline.
+    """
+    stages = [
+        Stage(
+            "subdomains",
+            lambda r: run_subdomain_enumeration(
+                target,
+                path=os.path.join("sessions", f"{target}_monitor_subdomains.txt"),
+            ),
+            count=count_names,
+        ),
+        Stage(
+            "http_probe",
+            lambda r: probe(list(read_names(r["subdomains"]))),
+            deps=["subdomains"],
+        ),
+        Stage(
+            "delta",
+            lambda r: index.diff(read_names(r["subdomains"]), r["http_probe"]),
+            deps=["subdomains", "http_probe"],
+            count=lambda delta: len(delta["scan"]),
+        ),
+    ]
+    if not scan:
+        return stages
+    return stages + [
+        Stage(
+            "port_scan",
+            lambda r, **kw: run_port_scan(
+                r["delta"]["scan"], concurrency=concurrency, **kw
+            ),
+            deps=["delta"],
+            per_target=True,
+        ),
+        Stage(
+            "directory_scan",
+            lambda r, **kw: run_directory_scan(
+                r["delta"]["scan"], concurrency=concurrency, **kw
+            ),
+            deps=["delta"],
+            per_target=True,
+        ),
+        Stage(
+            "vulnerability_scan",
+            lambda r, **kw: run_vulnerability_scan(
+                r["delta"]["scan"],
+                concurrency=concurrency,
+                **(nuclei_filters or {}),
+                **kw,
+            ),
+            deps=["delta"],
+            per_target=True,
+        ),
+        Stage(
+            "takeover",
+            lambda r: run_subjack(r["delta"]["new_subdomains"]),
+            deps=["delta"],
+            count=lambda result: len(result.get("vulnerabilities", [])),
+        ),
+    ]
+
+
+def summarize(results):
+    """
+    Counts for the notification and the cycles table.
+    """
+    delta = results.get("delta", {})
+    nuclei = results.get("vulnerability_scan", {})
+    findings = sum(len(found) for found in nuclei.values())
+    return {
+        "new_subdomains": len(delta.get("new_subdomains", [])),
+        "gone_subdomains": len(delta.get("gone_subdomains", [])),
+        "new_alive": len(delta.get("new_alive", [])),
+        "gone_alive": len(delta.get("gone_alive", [])),
+        "changed": len(delta.get("changed", {})),
+        "scanned": len(delta.get("scan", [])),
+        "nuclei_findings": findings,
+        "takeovers": len(results.get("takeover", {}).get("vulnerabilities", [])),
+    }
+
+
+def write_cycle_report(target, timestamp, results, summary):
+    """
+    Write the cycle's diff report to reports/ as JSON and text. Returns the
+    paths.
+    """
+    os.makedirs("reports", exist_ok=True)
+    prefix = os.path.join("reports", f"{target}_monitor_{timestamp}")
+    delta = results.get("delta", {})
+    report = {
+        "target": target,
+        "timestamp": timestamp,
+        "summary": summary,
+        "delta": delta,
+        "scans": {name: results[name] for name in SCAN_STAGES if name in results},
+    }
+    with open(prefix + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    with open(prefix + ".txt", "w") as f:
+        f.write(f"Monitoring cycle for {target} - {timestamp}\n\n")
+        for key, value in summary.items():
+            f.write(f"{key.replace('_', ' ')}: {value}\n")
+        sections = [
+            ("NEW SUBDOMAINS", delta.get("new_subdomains", [])),
+            ("GONE SUBDOMAINS", delta.get("gone_subdomains", [])),
+            ("NEW ALIVE URLS", delta.get("new_alive", [])),
+            ("GONE ALIVE URLS", delta.get("gone_alive", [])),
+            (
+                "CHANGED URLS",
+                [
+                    f"{url} ({', '.join(change['fields'])})"
+                    for url, change in delta.get("changed", {}).items()
+                ],
+            ),
+            (
+                "NUCLEI FINDINGS",
+                [
+                    format_finding(finding)
+                    for found in results.get("vulnerability_scan", {}).values()
+                    for finding in found
+                ],
+            ),
+            (
+                "TAKEOVERS",
+                results.get("takeover", {}).get("vulnerabilities", []),
+            ),
+        ]
+        for title, items in sections:
+            f.write(f"\n=== {title} ===\n")
+            for item in items:
+                f.write(f"{item}\n")
+    print(f"[green]Diff report written to {prefix}.json and {prefix}.txt[/green]")
+    return prefix + ".json", prefix + ".txt"
@@ -0,0 +1,241 @@
+"""
+Stage scheduler that runs the recon pipeline as a dependency graph.
+"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from rich import print
+
+from modules.metrics import count_items, current_stage, get_metrics
+from modules.runner import stage_deadline
+
+
+class Stage:
+    """
+    A single pipeline stage.
+    `func` receives a dict of upstream results keyed by stage name.
+    Per-target stages also get `completed` (target -> earlier result) and
+    `on_result(target, result)` keyword arguments so partial work survives
+    an interrupted run.
+    Stages with `save=False` still run but are not written to the session.
+    `count(result)` gives the number of items a result holds for the run
+    metrics; it defaults to the length of a list or dict.
+    With a `timeout` (seconds), tool processes the stage starts are killed
+    once that much time has passed since it began and no new ones start.
+    """
+
+    def __init__(
+        self,
+        name,
+        func,
+        deps=(),
+        save=True,
+        per_target=False,
+        count=count_items,
+        timeout=None,
+    ):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.save = save
+        self.per_target = per_target
+        self.count = count
+        self.timeout = timeout
+
+
+def prefix_stages(stages, prefix):
+    """
+    Copy `stages` with `prefix` added to every name and dependency, so the
+    stages of several targets can share one scheduler. Stage functions still
+    see their upstream results under the unprefixed names.
+    """
+
+    def wrap(func):
+        def call(upstream, **kwargs):
+            plain = {name[len(prefix) :]: value for name, value in upstream.items()}
+            return func(plain, **kwargs)
+
+        return call
+
+    return [
+        Stage(
+            prefix + stage.name,
+            wrap(stage.func),
+            deps=[prefix + dep for dep in stage.deps],
+            save=stage.save,
+            per_target=stage.per_target,
+            count=stage.count,
+            timeout=stage.timeout,
+        )
+        for stage in stages
+    ]
+
+
+def input_fingerprint(upstream):
+    """
+    Stable hash of a stage's upstream results.
+    """
+    data = json.dumps(upstream, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _call(stage, upstream, **kwargs):
+    if stage.per_target:
+        kwargs.setdefault("completed", {})
+        kwargs.setdefault("on_result", None)
+        return stage.func(upstream, **kwargs)
+    return stage.func(upstream)
+
+
+def _run_stage(stage, upstream, store):
+    """
+    Returns (result, fresh); fresh is False when the result was restored.
+    Wall time and the stage thread's CPU time go to the run metrics, and
+    tool processes started meanwhile are attributed to the stage and limited
+    by its timeout.
+    """
+    token = current_stage.set(stage.name)
+    started = time.monotonic()
+    cpu = time.thread_time()
+    deadline = stage_deadline.set(started + stage.timeout if stage.timeout else None)
+    try:
+        result, fresh = _restore_or_run(stage, upstream, store)
+    finally:
+        stage_deadline.reset(deadline)
+        current_stage.reset(token)
+        get_metrics().record_stage(
+            stage.name,
+            wall=round(time.monotonic() - started, 6),
+            python_cpu=round(time.thread_time() - cpu, 6),
+        )
+    return result, fresh
+
+
+def _restore_or_run(stage, upstream, store):
+    if store is None:
+        return _call(stage, upstream), True
+    fingerprint = input_fingerprint(upstream)
+    done, previous = store.stage_status(stage.name)
+    if done and previous == fingerprint:
+        print(f"[cyan]Skipping {stage.name}: completed in a previous run.[/cyan]")
+        return store.load_stage(stage.name), False
+    if done:
+        print(f"[yellow]Input of {stage.name} changed; running it again.[/yellow]")
+    store.begin_stage(stage.name, fingerprint)
+    if not stage.per_target:
+        return _call(stage, upstream), True
+    # Results of targets that dropped out of the input are simply not reused.
+    result = _call(
+        stage,
+        upstream,
+        completed=store.load_items(stage.name),
+        on_result=lambda target, value: store.save_item(stage.name, target, value),
+    )
+    return result, True
+
+
+def _check_graph(stages):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("Duplicate stage names in pipeline")
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in names:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown '{dep}'")
+    # Kahn's algorithm to reject cycles before anything is started
+    remaining = {s.name: set(s.deps) for s in stages}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle in pipeline stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(
+    stages, max_parallel=4, store=None, on_complete=None, on_interrupt=None
+):
+    """
+    Run stages as soon as their dependencies have finished, with at most
+    `max_parallel` stages in flight.
+    With a SessionStore, finished stages are checkpointed into it and stages
+    already completed for the same input are restored instead of rerun.
+    `on_complete(stage, result)` is called from the calling thread as each
+    stage finishes. `on_interrupt()` is called on Ctrl-C before waiting for
+    the running stages to wind down.
+    Returns a dict of results keyed by stage name. Stages that fail, or whose
+    dependencies failed, are left out.
+    """
+    _check_graph(stages)
+    by_name = {s.name: s for s in stages}
+    metrics = get_metrics()
+    pending = dict(by_name)
+    results = {}
+    failed = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        while pending or running:
+            for stage in list(pending.values()):
+                if any(dep in failed for dep in stage.deps):
+                    print(
+                        f"[red]Skipping {stage.name}:[/red] an upstream stage failed"
+                    )
+                    metrics.record_stage(stage.name, status="skipped")
+                    failed.add(stage.name)
+                    del pending[stage.name]
+                elif all(dep in results for dep in stage.deps):
+                    upstream = {dep: results[dep] for dep in stage.deps}
+                    metrics.record_stage(
+                        stage.name,
+                        items_in=sum(
+                            by_name[dep].count(value) for dep, value in upstream.items()
+                        ),
+                    )
+                    future = pool.submit(_run_stage, stage, upstream, store)
+                    running[future] = stage
+                    del pending[stage.name]
+            if not running:
+                continue
+            try:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                if on_interrupt:
+                    on_interrupt()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    result, fresh = future.result()
+                except Exception as e:
+                    print(f"[red]Stage {stage.name} failed:[/red] {e}")
+                    metrics.record_stage(stage.name, status="failed")
+                    failed.add(stage.name)
+                    continue
+                metrics.record_stage(
+                    stage.name,
+                    status="done" if fresh else "restored",
+                    items_out=stage.count(result),
+                )
+                results[stage.name] = result
+                if store is not None and fresh:
+                    # Items cut short by a timeout or the deadline are kept for
+                    # the reports, but the stage stays unfinished so --resume
+                    # runs them (and only them, for per-target stages) again.
+                    partial = metrics.partial_items(stage.name)
+                    if partial:
+                        print(
+                            f"[yellow]{stage.name} is incomplete ({len(partial)} "
+                            "partial item(s)); --resume runs them again.[/yellow]"
+                        )
+                    if stage.save:
+                        store.save_stage(stage.name, result, partial=partial)
+                    elif not partial:
+                        store.mark_done(stage.name)
+                if on_complete:
+                    on_complete(stage, result)
+    return results
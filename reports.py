@@ -0,0 +1,366 @@
+"""
+Report generation in JSON, TXT, CSV, HTML and PDF. Each writer streams the
+session section by section straight to its file, reading per-target stages
+row by row from the session database, and the chosen formats are written in
+parallel processes.
+"""
+
+import csv
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from rich import print
+
+from modules.dedupe import count_names, read_names
+from utils import MultiSessionStore, get_timestamp, merge_results
+
+FORMATS = ("json", "txt", "csv", "html", "pdf")
+# The PDF lists at most this many entries per section, each cut to one
+# line, and points to the other formats for the rest.
+PDF_ITEMS = 200
+
+
+def parse_formats(value):
+    """
+    Report formats from a comma-separated list ('json,html'); None or 'all'
+    selects every format. Raises ValueError for unknown names.
+    """
+    if not value or value == "all":
+        return list(FORMATS)
+    formats = [name.strip().lower() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        raise ValueError(
+            f"unknown report format(s) {', '.join(unknown)}; "
+            f"choose from {', '.join(FORMATS)}"
+        )
+    return list(dict.fromkeys(formats))
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return "dict", iter(value.items())
+    if isinstance(value, list):
+        return "list", iter(value)
+    return "scalar", value
+
+
+class DictReader:
+    """
+    Report source for a session dict ({"target", "timestamp", "results"}).
+    """
+
+    def __init__(self, session):
+        self.target = session.get("target")
+        self.timestamp = session.get("timestamp") or get_timestamp()
+        self.results = session.get("results", {})
+
+    def sections(self):
+        for name, value in self.results.items():
+            yield (name, *_shape(value))
+
+
+class SessionReader:
+    """
+    Read-only report source over one or more session databases. Every call
+    to sections() opens its own connections, so writers in other processes
+    can read the same session at once. Per-target stages are yielded row by
+    row; with several roots their rows follow each other and the other
+    stages are merged as in MultiSessionStore.to_dict().
+    """
+
+    def __init__(self, target, timestamp, paths, roots=False):
+        self.target = target
+        self.timestamp = timestamp or get_timestamp()
+        self.paths = paths
+        self.roots = roots
+
+    @classmethod
+    def from_store(cls, store):
+        timestamp = store.get_meta("timestamp")
+        if isinstance(store, MultiSessionStore):
+            paths = {root: s.path for root, s in store.stores.items()}
+            return cls(store.target, timestamp, paths, roots=True)
+        return cls(store.target, timestamp, {store.target: store.path})
+
+    def sections(self):
+        conns = {
+            root: sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            for root, path in self.paths.items()
+        }
+        try:
+            stages = {}
+            for root, conn in conns.items():
+                for stage, kind in conn.execute(
+                    "SELECT stage, kind FROM stages WHERE kind != 'marker' "
+                    "ORDER BY rowid"
+                ):
+                    stages.setdefault(stage, {})[root] = kind
+            if self.roots:
+                yield ("roots", *_shape(self._root_counts(conns)))
+            for stage, kinds in stages.items():
+                if all(kind == "dict" for kind in kinds.values()):
+                    yield stage, "dict", self._rows(conns, stage, kinds)
+                    continue
+                if stage == "subdomains":
+                    # A names file per root, read line by line (read_names).
+                    parts = [
+                        self._read(conns[root], stage, kind)
+                        for root, kind in kinds.items()
+                    ]
+                    names = itertools.chain.from_iterable(map(read_names, parts))
+                    yield stage, "list", names
+                    continue
+                value = None
+                for root, kind in kinds.items():
+                    part = self._read(conns[root], stage, kind)
+                    value = part if value is None else merge_results(value, part)
+                yield (stage, *_shape(value))
+        finally:
+            for conn in conns.values():
+                conn.close()
+
+    def _root_counts(self, conns):
+        counts = {}
+        for root, conn in conns.items():
+            counts[root] = {
+                "subdomains": count_names(self._read(conn, "subdomains", "value")),
+                "alive": len(self._read(conn, "alive_domains", "value") or []),
+            }
+        return counts
+
+    @staticmethod
+    def _read(conn, stage, kind):
+        rows = conn.execute(
+            "SELECT item, value FROM results WHERE stage = ? ORDER BY rowid",
+            (stage,),
+        )
+        if kind == "dict":
+            return {item: json.loads(value) for item, value in rows}
+        row = rows.fetchone()
+        return json.loads(row[1]) if row else None
+
+    @staticmethod
+    def _rows(conns, stage, kinds):
+        for root in kinds:
+            for item, value in conns[root].execute(
+                "SELECT item, value FROM results WHERE stage = ? ORDER BY rowid",
+                (stage,),
+            ):
+                yield item, json.loads(value)
+
+
+def _entry(item):
+    return json.dumps(item) if isinstance(item, (list, dict)) else str(item)
+
+
+def write_json(reader, prefix):
+    path = prefix + ".json"
+    with open(path, "w") as f:
+        f.write(
+            f'{{\n  "target": {json.dumps(reader.target)},\n'
+            f'  "timestamp": {json.dumps(reader.timestamp)},\n  "results": {{'
+        )
+        sep = "\n"
+        for name, shape, entries in reader.sections():
+            f.write(f"{sep}    {json.dumps(name)}: ")
+            sep = ",\n"
+            if shape == "scalar":
+                f.write(json.dumps(entries))
+                continue
+            open_, close = ("{", "}") if shape == "dict" else ("[", "]")
+            f.write(open_)
+            item_sep = "\n"
+            for entry in entries:
+                if shape == "dict":
+                    entry = f"{json.dumps(entry[0])}: {json.dumps(entry[1])}"
+                else:
+                    entry = json.dumps(entry)
+                f.write(f"{item_sep}      {entry}")
+                item_sep = ",\n"
+            f.write(f"\n    {close}" if item_sep != "\n" else close)
+        f.write("\n  }\n}\n")
+    return [path]
+
+
+def write_txt(reader, prefix):
+    path = prefix + ".txt"
+    with open(path, "w") as f:
+        f.write(f"Report for {reader.target} - {reader.timestamp}\n\n")
+        for name, shape, entries in reader.sections():
+            f.write(f"=== {name.upper()} ===\n")
+            if shape == "dict":
+                for key, value in entries:
+                    f.write(f"{key}: {value}\n")
+            elif shape == "list":
+                for item in entries:
+                    f.write(str(item) + "\n")
+            else:
+                f.write(str(entries) + "\n")
+            f.write("\n")
+    return [path]
+
+
+def write_csv(reader, prefix):
+    """
+    One CSV file per section.
+    """
+    paths = []
+    for name, shape, entries in reader.sections():
+        path = f"{prefix}_{name}.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            if shape == "dict":
+                writer.writerow(["Key", "Value"])
+                for key, value in entries:
+                    writer.writerow([key, _entry(value)])
+            elif shape == "list":
+                for item in entries:
+                    writer.writerow([_entry(item)])
+            else:
+                writer.writerow([entries])
+        paths.append(path)
+    return paths
+
+
+def write_html(reader, prefix):
+    path = prefix + ".html"
+    target = html.escape(str(reader.target))
+    logo_tag = ""
+    if os.path.exists(os.path.join("assets", "logo.jpeg")):
+        logo_tag = (
+            '<img src="../assets/logo.jpeg" alt="Logo" style="max-width:200px;"><br>'
+        )
+    with open(path, "w") as f:
+        f.write(
+            f"<html><head><title>su6oRecon Report - {target}</title></head><body>\n"
+            f"{logo_tag}\n<h1>su6oRecon Report for {target}</h1>\n"
+            f"<p><strong>Generated:</strong> {html.escape(reader.timestamp)}</p>\n"
+        )
+        for name, shape, entries in reader.sections():
+            f.write(f"<h2>{html.escape(name.capitalize())}</h2>\n<ul>")
+            if shape == "dict":
+                for key, value in entries:
+                    f.write(
+                        f"<li><strong>{html.escape(str(key))}:</strong> "
+                        f"{html.escape(str(value))}</li>\n"
+                    )
+            elif shape == "list":
+                for item in entries:
+                    f.write(f"<li>{html.escape(str(item))}</li>\n")
+            else:
+                f.write(f"<li>{html.escape(str(entries))}</li>\n")
+            f.write("</ul>\n")
+        f.write("</body></html>\n")
+    return [path]
+
+
+def _pdf_text(text):
+    # The core fonts only cover latin-1.
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def _pdf_line(pdf, text):
+    """
+    `text` cut to fit on one line. Wrapping with multi_cell() costs far more
+    per entry than measuring once.
+    """
+    text = _pdf_text(text)
+    room = pdf.epw
+    width = pdf.get_string_width(text)
+    while width > room:
+        text = text[: max(1, int(len(text) * room / width) - 4)] + "..."
+        width = pdf.get_string_width(text)
+    return text
+
+
+def write_pdf(reader, prefix):
+    """
+    A summary PDF: each section lists its first PDF_ITEMS entries.
+    """
+    path = prefix + ".pdf"
+    pdf = FPDF()
+    pdf.add_page()
+    logo_path = os.path.join("assets", "logo.jpeg")
+    if os.path.exists(logo_path):
+        pdf.image(logo_path, x=10, y=8, w=30)
+    pdf.set_font("helvetica", "B", 16)
+    line = {"new_x": XPos.LMARGIN, "new_y": YPos.NEXT}
+    pdf.cell(0, 10, _pdf_text(f"su6oRecon Report for {reader.target}"), **line)
+    pdf.set_font("helvetica", "", 12)
+    pdf.cell(0, 10, f"Generated: {reader.timestamp}", **line)
+    pdf.ln(5)
+    for name, shape, entries in reader.sections():
+        pdf.set_font("helvetica", "B", 14)
+        pdf.cell(0, 10, _pdf_text(name.capitalize()), **line)
+        pdf.set_font("helvetica", "", 10)
+        if shape == "scalar":
+            entries = iter([entries])
+        for entry in itertools.islice(entries, PDF_ITEMS):
+            text = f"{entry[0]}: {entry[1]}" if shape == "dict" else str(entry)
+            pdf.cell(0, 6, _pdf_line(pdf, text), **line)
+        rest = sum(1 for _ in entries)
+        if rest:
+            pdf.set_font("helvetica", "I", 10)
+            pdf.cell(0, 6, f"... and {rest} more; see the JSON or TXT report.", **line)
+        pdf.ln(3)
+    pdf.output(path)
+    return [path]
+
+
+WRITERS = {
+    "json": write_json,
+    "txt": write_txt,
+    "csv": write_csv,
+    "html": write_html,
+    "pdf": write_pdf,
+}
+
+
+def _write(fmt, reader, prefix):
+    started = time.monotonic()
+    paths = WRITERS[fmt](reader, prefix)
+    return fmt, paths, time.monotonic() - started
+
+
+def generate_reports(source, output_prefix=None, formats=None, parallel=True):
+    """
+    Write the chosen report formats (default: all) for a session under
+    reports/. `source` is a SessionStore, MultiSessionStore, SessionReader
+    or session dict. Returns {format: [paths]}.
+    """
+    if isinstance(source, dict):
+        reader = DictReader(source)
+    elif isinstance(source, (DictReader, SessionReader)):
+        reader = source
+    else:
+        reader = SessionReader.from_store(source)
+    formats = formats or list(FORMATS)
+    os.makedirs("reports", exist_ok=True)
+    prefix = os.path.join(
+        "reports", output_prefix or f"{reader.target}_recon_{reader.timestamp}"
+    )
+    written = {}
+    if parallel and len(formats) > 1:
+        # Separate processes, since the writers are CPU-bound Python.
+        with ProcessPoolExecutor(
+            max_workers=len(formats), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [pool.submit(_write, fmt, reader, prefix) for fmt in formats]
+            results = [future.result() for future in futures]
+    else:
+        results = [_write(fmt, reader, prefix) for fmt in formats]
+    for fmt, paths, seconds in results:
+        written[fmt] = paths
+        where = paths[0] if len(paths) == 1 else f"{len(paths)} files"
+        print(
+            f"[green]{fmt.upper()} report written to {where} ({seconds:.1f}s)[/green]"
+        )
+    return written
@@ -0,0 +1,96 @@
+"""
+Program scope files: root domains, wildcards and out-of-scope exclusions.
+
+    # one entry per line
+    example.com           root domain, its subdomains are enumerated
+    *.example.org         the same, written as a wildcard
+    !dev.example.com      out of scope: this host only
+    !*.corp.example.com   out of scope: every host below corp.example.com
+
+A leading "-" works like "!".
+"""
+
+import os
+import threading
+
+
+def _normalize(name):
+    name = name.strip().lower().rstrip(".")
+    if "://" in name:
+        name = name.split("://", 1)[1]
+    return name.split("/", 1)[0]
+
+
+def _within(host, zone):
+    return host == zone or host.endswith("." + zone)
+
+
+class Scope:
+    """
+    A set of root domains plus exclusions. Each in-scope host is claimed by
+    the first root whose enumeration reports it, so hosts found under
+    several roots are only scanned once.
+    """
+
+    def __init__(self, roots, exclusions=(), name="scope"):
+        self.name = name
+        self.roots = sorted({_normalize(root) for root in roots})
+        self.exclusions = sorted({e.strip().lower().rstrip(".") for e in exclusions})
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def is_excluded(self, host):
+        host = _normalize(host)
+        for rule in self.exclusions:
+            if rule.startswith("*."):
+                if host.endswith(rule[1:]):
+                    return True
+            elif host == rule:
+                return True
+        return False
+
+    def root_of(self, host):
+        """
+        The most specific root covering `host`, or None.
+        """
+        host = _normalize(host)
+        matches = [root for root in self.roots if _within(host, root)]
+        return max(matches, key=len) if matches else None
+
+    def claim(self, root, hosts):
+        """
+        Assign in-scope hosts to `root` unless another root already claimed
+        them. Returns the hosts that belong to `root`, in input order.
+        """
+        kept = []
+        with self._lock:
+            for host in hosts:
+                name = _normalize(host)
+                if self.is_excluded(name) or self.root_of(name) is None:
+                    continue
+                if self._owners.setdefault(name, root) == root:
+                    kept.append(host)
+        return kept
+
+
+def load_scope(path):
+    """
+    Read a scope file. Raises ValueError if it lists no root domains.
+    """
+    roots = []
+    exclusions = []
+    with open(path) as f:
+        for line in f:
+            entry = line.split("#", 1)[0].strip()
+            if not entry:
+                continue
+            if entry[0] in "!-":
+                exclusions.append(entry[1:].strip())
+            elif entry.startswith("*."):
+                roots.append(entry[2:])
+            else:
+                roots.append(entry)
+    if not roots:
+        raise ValueError(f"No root domains in scope file {path}")
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Scope(roots, exclusions, name=name)
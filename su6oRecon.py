@@ -4,30 +4,78 @@ su6oRecon: A cross-platform CLI bug bounty reconnaissance tool.
 """
 import os
 import asyncio
+import json
+import time
 import typer
+from datetime import datetime, timedelta
 from rich.console import Console
+from rich.markup import escape
 from rich.table import Table
 
 from config_wizard import run_setup_wizard
 from utils import (
     load_config,
     save_config,
-    save_state,
-    load_state,
-    send_telegram,
-    get_timestamp,
+    MultiSessionStore,
+    SessionBusy,
+    SessionStore,
+    parse_duration,
+)
+from pipeline import Stage, prefix_stages, run_stages
+from reports import generate_reports, parse_formats
+from findings import DB_PATH, STAGES, FindingsDB, parse_ports
+from scope import load_scope
+from monitor import (
+    SCAN_STAGES,
+    MonitorIndex,
+    cycle_stages,
+    summarize,
+    write_cycle_report,
+)
+from distributed import BATCH_CHUNK, Coordinator, run_worker
+from modules.adaptive import ConcurrencyController, set_controller
+from modules.runner import (
+    parse_limits,
+    run_stragglers,
+    set_deadline,
+    set_tool_budgets,
+    set_tool_timeouts,
+    terminate_all,
+)
+from modules.cache import configure_cache, get_cache, parse_size
+from modules.metrics import reset_metrics
+from modules.notify import get_notifier, notifier_from_config, notify, set_notifier
+from modules.profiler import SamplingProfiler
+from modules.scratch import Scratch, set_scratch
+from modules.dedupe import count_names, read_names
+from modules.subdomain import enumerate_subdomains, run_subdomain_enumeration
+from modules.cluster import run_clustering
+from modules.dns_resolve import run_dns_resolution
+from modules.http_probe import (
+    run_http_probe,
+    run_native_probe,
+    run_streaming_probe,
 )
-from modules.subdomain import run_subdomain_enumeration
-from modules.http_probe import run_http_probe
 from modules.screenshot import run_screenshot
-from modules.portscan import run_port_scan
+from modules.portscan import (
+    DEFAULT_PORTS,
+    PRESCAN_CONCURRENCY,
+    run_batched_port_scan,
+    run_port_scan,
+)
 from modules.directory_scan import run_directory_scan
-from modules.vulnscan import run_vulnerability_scan
+from modules.vulnscan import run_batched_vulnerability_scan, run_vulnerability_scan
 from modules.param_finder import run_param_spider
 from modules.takeover import run_subjack
+from modules.targets import unique_hosts, unique_urls
 
 app = typer.Typer()
 console = Console()
+# Longest subdomain list the subdomain command prints as a table.
+TABLE_ROWS = 1000
+# Stages in flight by default, and at most by default with a scope file.
+DEFAULT_PARALLEL = 4
+SCOPE_MAX_PARALLEL = 16
 
 
 def print_banner():
@@ -48,17 +96,192 @@ def print_banner():
     console.print()
 
 
+def read_list(value):
+    """
+    Split a comma-separated option value, or read one entry per line if it
+    names a file. Returns None for an empty value.
+    """
+    if not value:
+        return None
+    if os.path.isfile(value):
+        with open(value) as f:
+            return [line.strip() for line in f if line.strip()]
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def probe_options(timeout, follow_redirects):
+    """
+    Keyword arguments for both probe engines from --probe-timeout and
+    --follow-redirects; an unset timeout keeps the engine's default.
+    """
+    if timeout is not None and timeout < 1:
+        raise typer.BadParameter("The probe timeout must be at least 1 second")
+    options = {"follow_redirects": follow_redirects}
+    if timeout:
+        options["timeout"] = timeout
+    return options
+
+
+def prescan_options(concurrency, timeout, host_timeout):
+    """
+    run_connect_scan keyword arguments from the --prescan-* options; unset
+    durations keep the module defaults.
+    """
+    if concurrency < 1:
+        raise typer.BadParameter("--prescan-concurrency must be at least 1")
+    options = {"concurrency": concurrency}
+    try:
+        if timeout:
+            options["timeout"] = parse_duration(timeout)
+        if host_timeout:
+            options["host_timeout"] = parse_duration(host_timeout)
+    except ValueError as e:
+        raise typer.BadParameter(f"Invalid duration: {e}")
+    return options
+
+
+def print_cache_summary():
+    cache = get_cache(create=False)
+    if cache is None:
+        return
+    table = Table(title="Tool cache")
+    table.add_column("Tool", style="cyan")
+    table.add_column("Hits", justify="right")
+    table.add_column("Misses", justify="right")
+    for tool, (hits, misses) in cache.summary().items():
+        table.add_row(tool, str(hits), str(misses))
+    console.print(table)
+
+
+def stop_notifier():
+    notifier = get_notifier()
+    set_notifier(None)
+    if notifier is not None:
+        notifier.close()
+
+
+def stop_run(coordinator=None):
+    terminate_all()
+    if coordinator is not None:
+        coordinator.stop()
+
+
+def save_findings(store, target=None):
+    """
+    Add the run's scan results to the local findings database.
+    """
+    db = FindingsDB()
+    try:
+        count = db.ingest_session(store, target)
+    finally:
+        db.close()
+    console.print(f"[green]{count} finding record(s) saved to {db.path}[/green]")
+
+
+def export_metrics(metrics, store, prefix, profiler=None, controller=None):
+    """
+    Store the run metrics in the session, write them to reports/ as JSON and
+    Prometheus text, and print a per-stage summary.
+    """
+    if controller is not None:
+        for name, limit in controller.snapshot()["stages"].items():
+            if name not in metrics.stages:
+                continue
+            metrics.record_stage(
+                name, concurrency_limit=limit["limit"], backoffs=limit["backoffs"]
+            )
+    snapshot = metrics.snapshot(processes=False)
+    store.set_meta("metrics", snapshot)
+    json_path = metrics.write_json(os.path.join("reports", f"{prefix}_metrics.json"))
+    prom_path = metrics.write_prometheus(
+        os.path.join("reports", f"{prefix}_metrics.prom"), {"target": store.target}
+    )
+    table = Table(title="Stage metrics")
+    table.add_column("Stage", style="cyan", no_wrap=True)
+    table.add_column("Status")
+    table.add_column("Wall s", justify="right")
+    table.add_column("Tool CPU s", justify="right")
+    table.add_column("Py CPU s", justify="right")
+    table.add_column("Peak RSS MB", justify="right")
+    table.add_column("In", justify="right")
+    table.add_column("Out", justify="right")
+    table.add_column("Items/s", justify="right")
+    if snapshot["partial"]:
+        table.add_column("Partial", justify="right")
+    if controller is not None:
+        table.add_column("Limit", justify="right")
+        table.add_column("Backoffs", justify="right")
+    for name, stage in snapshot["stages"].items():
+        extra = [str(stage["partial"])] if snapshot["partial"] else []
+        if controller is not None:
+            extra += [
+                str(stage.get("concurrency_limit", "-")),
+                str(stage.get("backoffs", "-")),
+            ]
+        table.add_row(
+            name,
+            stage.get("status", "interrupted"),
+            f"{stage.get('wall', 0):.1f}",
+            f"{stage['cpu_user'] + stage['cpu_sys']:.1f}",
+            f"{stage.get('python_cpu', 0):.1f}",
+            f"{stage['peak_rss_kb'] / 1024:.0f}",
+            str(stage.get("items_in", 0)),
+            str(stage.get("items_out", 0)),
+            f"{stage['items_per_sec']:.1f}",
+            *extra,
+        )
+    console.print(table)
+    console.print(f"[green]Metrics written to {json_path} and {prom_path}[/green]")
+    if profiler is None:
+        return
+    profiler.stop()
+    path = profiler.write_collapsed(os.path.join("reports", f"{prefix}_profile.txt"))
+    table = Table(title=f"Python profile ({profiler.samples} samples)")
+    table.add_column("Function", style="cyan")
+    table.add_column("Self", justify="right")
+    table.add_column("Total", justify="right")
+    for label, own, total in profiler.top():
+        table.add_row(label, str(own), str(total))
+    console.print(table)
+    console.print(f"[green]Collapsed stacks written to {path}[/green]")
+
+
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
     setup: bool = typer.Option(
         False, "--setup", help="Run the interactive setup wizard"
     ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Do not reuse or store cached tool results"
+    ),
+    cache_ttl: str = typer.Option(
+        None,
+        "--cache-ttl",
+        help="Cache lifetime in hours, for all tools ('48') or per tool "
+        "('nmap=96,nuclei=12')",
+    ),
+    cache_max_size: str = typer.Option(
+        "512M",
+        "--cache-max-size",
+        help="Evict the least recently used cache entries beyond this size "
+        "('512M', '2G')",
+    ),
 ):
     """
     su6oRecon main entrypoint. Displays banner and handles setup or subcommands.
     """
-    print_banner()
+    # Query output is meant to be read or piped on its own.
+    if ctx.invoked_subcommand != "query":
+        print_banner()
+    try:
+        max_bytes = parse_size(cache_max_size)
+    except ValueError as e:
+        raise typer.BadParameter(f"Invalid --cache-max-size: {e}")
+    try:
+        configure_cache(enabled=not no_cache, ttl=cache_ttl, max_bytes=max_bytes)
+    except ValueError as e:
+        raise typer.BadParameter(f"Invalid --cache-ttl: {e}")
     if setup:
         run_setup_wizard()
         raise typer.Exit()
@@ -70,89 +293,807 @@ def main(
 @app.command()
 def full(
     target: str = typer.Argument(
-        ..., help="Target domain or IP for full reconnaissance"
+        ...,
+        help="Target domain or IP, or a scope file of root domains, wildcards "
+        "and !exclusions",
     ),
     proxy: str = typer.Option(
         None, "--proxy", help="HTTP proxy (e.g. http://127.0.0.1:8080)"
     ),
     tor: bool = typer.Option(False, "--tor", help="Route traffic through Tor"),
     resume: bool = typer.Option(
-        False, "--resume", help="Resume from last saved session"
+        False,
+        "--resume",
+        help="Resume the last session, skipping work that already finished",
     ),
     output: str = typer.Option(
         None, "--output", help="Custom prefix for report filenames"
     ),
+    report_formats: str = typer.Option(
+        None,
+        "--formats",
+        help="Report formats to write, e.g. 'json,html' (default: json, txt, "
+        "csv, html and pdf)",
+    ),
+    parallel: int = typer.Option(
+        None,
+        "--parallel",
+        help="Maximum number of stages to run at the same time, across all "
+        f"roots (default: {DEFAULT_PARALLEL}; with a scope file "
+        f"{DEFAULT_PARALLEL} per root, at most {SCOPE_MAX_PARALLEL})",
+    ),
+    concurrency: int = typer.Option(
+        1,
+        "--concurrency",
+        help="Parallel tool processes per per-target stage",
+    ),
+    budget: str = typer.Option(
+        None,
+        "--budget",
+        help="Per-tool process limits for the whole run, e.g. "
+        "'nmap=4,nuclei=2', or one number for every tool (default: none for "
+        "one target; with a scope file, --concurrency times the number of "
+        "roots, at most twice the CPU count but never below --concurrency)",
+    ),
+    adaptive: bool = typer.Option(
+        False,
+        "--adaptive",
+        help="Start each stage at --concurrency and adjust it while running: "
+        "grow while tools succeed at stable latency, halve on failures, "
+        "timeouts, resets and HTTP 429/503",
+    ),
+    max_concurrency: int = typer.Option(
+        None,
+        "--max-concurrency",
+        help="Upper limit for --adaptive (default: four times --concurrency)",
+    ),
+    item_timeout: str = typer.Option(
+        None,
+        "--item-timeout",
+        help="Kill a tool process after this long and keep its partial "
+        "output, for all tools ('10m') or per tool ('nmap=15m,ffuf=5m')",
+    ),
+    stage_timeout: str = typer.Option(
+        None,
+        "--stage-timeout",
+        help="Time budget per stage, for all stages ('1h') or per stage "
+        "('port_scan=2h,vulnerability_scan=3h')",
+    ),
+    deadline: str = typer.Option(
+        None,
+        "--deadline",
+        help="Finish the scans within this time (e.g. '6h'), doing as much "
+        "as fits; reports are generated afterwards",
+    ),
+    defer_stragglers: bool = typer.Option(
+        False,
+        "--defer-stragglers",
+        help="Retry items that timed out once the pipeline is done instead "
+        "of leaving them partial",
+    ),
+    tail_timeout: str = typer.Option(
+        None,
+        "--tail-timeout",
+        help="Per-process time limit for --defer-stragglers retries "
+        "(default: only --deadline)",
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Feed subdomains to httpx while enumeration is still running",
+    ),
+    nmap_batch: bool = typer.Option(
+        False,
+        "--nmap-batch",
+        help="Scan each unique IP once with batched nmap runs and XML parsing",
+    ),
+    probe_engine: str = typer.Option(
+        "httpx", "--probe-engine", help="HTTP probing engine: 'httpx' or 'native'"
+    ),
+    probe_concurrency: int = typer.Option(
+        50, "--probe-concurrency", help="Parallel requests for the native engine"
+    ),
+    probe_timeout: int = typer.Option(
+        None,
+        "--probe-timeout",
+        help="Seconds to wait for each probe request (default: 10)",
+    ),
+    follow_redirects: bool = typer.Option(
+        False, "--follow-redirects", help="Follow redirects when probing"
+    ),
+    cluster: bool = typer.Option(
+        False,
+        "--cluster",
+        help="Only fuzz, Nuclei-scan and screenshot one host per group of "
+        "identical responses (rerun with --resume and no --cluster to expand)",
+    ),
+    cluster_threshold: int = typer.Option(
+        3, "--cluster-threshold", help="Maximum simhash distance within a cluster"
+    ),
+    prescan: bool = typer.Option(
+        False,
+        "--prescan",
+        help="TCP connect scan first so nmap only service-detects open ports",
+    ),
+    ports: str = typer.Option(
+        None, "--ports", help="Ports for the connect pre-scan, e.g. 80,443,8000-8100"
+    ),
+    prescan_concurrency: int = typer.Option(
+        PRESCAN_CONCURRENCY,
+        "--prescan-concurrency",
+        help="Connections the pre-scan keeps open at once",
+    ),
+    prescan_timeout: str = typer.Option(
+        None, "--prescan-timeout", help="Connect timeout per port (default: 1s)"
+    ),
+    prescan_host_timeout: str = typer.Option(
+        None,
+        "--prescan-host-timeout",
+        help="Pre-scan time limit per host; open ports found so far are kept "
+        "(default: 60s)",
+    ),
+    resolve: bool = typer.Option(
+        False,
+        "--resolve",
+        help="Resolve subdomains and drop dead and wildcard-only names before "
+        "probing",
+    ),
+    resolvers: str = typer.Option(
+        None,
+        "--resolvers",
+        help="Comma-separated resolvers or a file of them (default: system)",
+    ),
+    dns_qps: int = typer.Option(
+        0, "--dns-qps", help="Maximum DNS queries per second (0 = unlimited)"
+    ),
+    nuclei_batch: bool = typer.Option(
+        False,
+        "--nuclei-batch",
+        help="Run Nuclei as --concurrency processes over target lists",
+    ),
+    templates: str = typer.Option(
+        None,
+        "--templates",
+        help="Nuclei templates path (defaults to config, then nuclei's own)",
+    ),
+    tags: str = typer.Option(
+        None, "--tags", help="Only run Nuclei templates with these tags"
+    ),
+    severity: str = typer.Option(
+        None, "--severity", help="Only run Nuclei templates of these severities"
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Sample the Python stacks and write a collapsed-stack profile",
+    ),
+    notify_findings: bool = typer.Option(
+        False,
+        "--notify-findings",
+        help="Send a Telegram alert for each Nuclei finding and takeover",
+    ),
+    distribute: str = typer.Option(
+        None,
+        "--distribute",
+        help="Serve port, directory, Nuclei, parameter and takeover scans to "
+        "'su6oRecon worker' processes on this host:port instead of running "
+        "them locally",
+    ),
+    token: str = typer.Option(
+        None, "--token", help="Shared secret workers must present"
+    ),
+    scratch_dir: str = typer.Option(
+        None,
+        "--scratch-dir",
+        help="Where to create the run's scratch directory for tool input and "
+        "output files (default: the system temp directory)",
+    ),
+    tmpfs: bool = typer.Option(
+        False, "--tmpfs", help="Keep scratch files in memory under /dev/shm"
+    ),
+    keep_scratch: bool = typer.Option(
+        False, "--keep-scratch", help="Keep the scratch directory after the run"
+    ),
 ):
     """
-    Run the full recon pipeline on the target.
+    Run the full recon pipeline on the target, or on every root domain of a
+    scope file with one shared scheduler.
     """
+    metrics = reset_metrics()
+    profiler = SamplingProfiler().start() if profile else None
     config = load_config()
-    bot_token = config.get("telegram_bot_token")
-    chat_id = config.get("telegram_chat_id")
-
-    # Load or initialize session
-    session = (
-        load_state(target)
-        if resume
-        else {"target": target, "timestamp": get_timestamp(), "results": {}}
+
+    if os.path.isfile(target):
+        try:
+            scope = load_scope(target)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        label = scope.name
+    else:
+        scope = None
+        label = target
+
+    if resolve and tor:
+        console.print(
+            "[yellow]--resolve sends DNS queries outside Tor; "
+            "skipping resolution.[/yellow]"
+        )
+        resolve = False
+    if probe_engine not in ("httpx", "native"):
+        raise typer.BadParameter("--probe-engine must be 'httpx' or 'native'")
+    try:
+        formats = parse_formats(report_formats)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    try:
+        set_deadline(parse_duration(deadline) if deadline else None)
+        item_timeouts = parse_limits(item_timeout, cast=parse_duration)
+        stage_timeouts = parse_limits(stage_timeout, cast=parse_duration)
+        tail_timeout = parse_duration(tail_timeout) if tail_timeout else None
+    except ValueError as e:
+        raise typer.BadParameter(f"Invalid duration: {e}")
+    set_tool_timeouts(item_timeouts, defer=defer_stragglers)
+    prescan_kwargs = prescan_options(
+        prescan_concurrency, prescan_timeout, prescan_host_timeout
+    )
+    probe_kwargs = probe_options(probe_timeout, follow_redirects)
+    if stream and probe_engine == "native":
+        console.print(
+            "[yellow]--stream always probes with httpx; "
+            "--probe-engine native is ignored.[/yellow]"
+        )
+    if resolve and stream:
+        console.print(
+            "[yellow]--resolve does not apply to --stream; "
+            "names go straight to httpx.[/yellow]"
+        )
+
+    def build_stages(target, scope=None):
+        """
+        Pipeline stages for one root domain. With a scope, only subdomains
+        that are in scope and not claimed by another root are kept.
+        """
+
+        def keep(names):
+            return scope.claim(target, names) if scope else names
+
+        def accept(name):
+            return bool(keep([name]))
+
+        if stream:
+            # Enumeration and probing happen in one pass; the alive_domains stage
+            # just hands over what the streaming probe already collected, or
+            # probes the stored subdomains when enumeration was restored.
+            streamed = {}
+
+            def enumerate_and_probe(r):
+                subdomains, streamed["alive"] = run_streaming_probe(
+                    target,
+                    proxy=proxy,
+                    tor=tor,
+                    accept=accept if scope else None,
+                    **probe_kwargs,
+                )
+                return subdomains
+
+            discovery = [
+                Stage("subdomains", enumerate_and_probe, count=count_names),
+                Stage(
+                    "alive_domains",
+                    lambda r: streamed["alive"]
+                    if "alive" in streamed
+                    else run_http_probe(
+                        list(read_names(r["subdomains"])),
+                        proxy=proxy,
+                        tor=tor,
+                        **probe_kwargs,
+                    ),
+                    deps=["subdomains"],
+                ),
+            ]
+        else:
+            # The names go to a file next to the session rather than into
+            # memory; the stages below read them back with read_names().
+            discovery = [
+                Stage(
+                    "subdomains",
+                    lambda r: run_subdomain_enumeration(
+                        target, accept=accept if scope else None
+                    ),
+                    count=count_names,
+                )
+            ]
+            probe_input = "subdomains"
+            if resolve:
+                discovery.append(
+                    Stage(
+                        "dns",
+                        lambda r: run_dns_resolution(
+                            read_names(r["subdomains"]),
+                            root=target,
+                            resolvers=read_list(resolvers),
+                            qps=dns_qps,
+                        ),
+                        deps=["subdomains"],
+                        count=lambda result: len(result["records"]),
+                    )
+                )
+                probe_input = "dns"
+
+            def probe_names(r):
+                if probe_input == "dns":
+                    # Names no resolver answered for may still be alive.
+                    return list(r["dns"]["records"]) + r["dns"].get("failed", [])
+                return list(read_names(r["subdomains"]))
+
+            if probe_engine == "native":
+                # Full response records are kept under http_probe; alive_domains
+                # stays the plain URL list the later stages work on.
+                discovery += [
+                    Stage(
+                        "http_probe",
+                        lambda r: run_native_probe(
+                            probe_names(r),
+                            proxy=proxy,
+                            tor=tor,
+                            concurrency=probe_concurrency,
+                            fingerprint=cluster,
+                            **probe_kwargs,
+                        ),
+                        deps=[probe_input],
+                    ),
+                    Stage(
+                        "alive_domains",
+                        lambda r: list(r["http_probe"]),
+                        deps=["http_probe"],
+                    ),
+                ]
+            else:
+                discovery.append(
+                    Stage(
+                        "alive_domains",
+                        lambda r: run_http_probe(
+                            probe_names(r), proxy=proxy, tor=tor, **probe_kwargs
+                        ),
+                        deps=[probe_input],
+                    )
+                )
+
+        port_scanner = run_batched_port_scan if nmap_batch else run_port_scan
+        prescan_ports = (ports or DEFAULT_PORTS) if prescan else None
+        nuclei_filters = {
+            "templates": templates or config.get("nuclei_templates"),
+            "tags": tags,
+            "severity": severity,
+        }
+
+        # With --cluster, the heavy per-URL stages only see one representative
+        # of each group of identical responses. The full membership is kept in
+        # the session, and a later --resume without --cluster scans the rest.
+        if cluster:
+            has_records = any(stage.name == "http_probe" for stage in discovery)
+
+            def cluster_hosts(r):
+                records = r.get("http_probe")
+                # Records from a resumed run without --cluster have no simhash.
+                if records is None or any(
+                    "simhash" not in record for record in records.values()
+                ):
+                    records = run_native_probe(
+                        r["alive_domains"],
+                        proxy=proxy,
+                        tor=tor,
+                        concurrency=probe_concurrency,
+                        fingerprint=True,
+                        **probe_kwargs,
+                    )
+                return run_clustering(records, threshold=cluster_threshold)
+
+            discovery.append(
+                Stage(
+                    "clusters",
+                    cluster_hosts,
+                    deps=["alive_domains"] + (["http_probe"] if has_records else []),
+                    count=lambda result: len(result["representatives"]),
+                )
+            )
+            heavy_deps = ["clusters"]
+
+            def heavy_targets(r):
+                return r["clusters"]["representatives"]
+
+        else:
+            heavy_deps = ["alive_domains"]
+
+            def heavy_targets(r):
+                return r["alive_domains"]
+
+        # Work handed to --distribute workers is reduced to the units each
+        # tool runs on, so results come back under the same keys.
+        def alive_hosts(r):
+            return unique_hosts(r["alive_domains"])
+
+        def heavy_urls(r):
+            return unique_urls(heavy_targets(r))
+
+        def remote(name, targets_of, local, options=None, batch=False):
+            # With --distribute, per-host work goes to the workers instead.
+            if coordinator is None:
+                return local
+            if name == "takeover":
+                return lambda r: coordinator.gather(name, targets_of(r), options)
+            chunk = BATCH_CHUNK if batch else 1
+            return lambda r, **kw: coordinator.map(
+                name, targets_of(r), options, chunk=chunk, **kw
+            )
+
+        def vulnerability_scan(r, **kw):
+            if nuclei_batch:
+                return run_batched_vulnerability_scan(
+                    heavy_targets(r), shards=concurrency, **nuclei_filters, **kw
+                )
+            return run_vulnerability_scan(
+                heavy_targets(r), concurrency=concurrency, **nuclei_filters, **kw
+            )
+
+        # Everything after HTTP probing only needs the alive hosts, so those
+        # stages run side by side instead of one after another.
+        stages = discovery + [
+            Stage(
+                "screenshots",
+                lambda r: run_screenshot(heavy_targets(r), concurrency=concurrency),
+                deps=heavy_deps,
+                save=False,
+            ),
+            Stage(
+                "port_scan",
+                remote(
+                    "port_scan",
+                    alive_hosts,
+                    lambda r, **kw: port_scanner(
+                        r["alive_domains"],
+                        concurrency=concurrency,
+                        prescan_ports=prescan_ports,
+                        prescan_options=prescan_kwargs,
+                        **kw,
+                    ),
+                    {
+                        "batch": nmap_batch,
+                        "prescan_ports": prescan_ports,
+                        "prescan_options": prescan_kwargs,
+                    },
+                    batch=nmap_batch,
+                ),
+                deps=["alive_domains"],
+                per_target=True,
+            ),
+            Stage(
+                "directory_scan",
+                remote(
+                    "directory_scan",
+                    heavy_urls,
+                    lambda r, **kw: run_directory_scan(
+                        heavy_targets(r), concurrency=concurrency, **kw
+                    ),
+                ),
+                deps=heavy_deps,
+                per_target=True,
+            ),
+            Stage(
+                "vulnerability_scan",
+                remote(
+                    "vulnerability_scan",
+                    heavy_urls,
+                    vulnerability_scan,
+                    {"batch": nuclei_batch, **nuclei_filters},
+                    batch=nuclei_batch,
+                ),
+                deps=heavy_deps,
+                per_target=True,
+            ),
+            Stage(
+                "parameters",
+                remote(
+                    "parameters",
+                    alive_hosts,
+                    lambda r, **kw: run_param_spider(
+                        r["alive_domains"], concurrency=concurrency, **kw
+                    ),
+                ),
+                deps=["alive_domains"],
+                per_target=True,
+            ),
+            Stage(
+                "takeover",
+                remote(
+                    "takeover", alive_hosts, lambda r: run_subjack(r["alive_domains"])
+                ),
+                deps=["alive_domains"],
+                count=lambda result: len(result.get("vulnerabilities", [])),
+            ),
+        ]
+        return stages
+
+    def claim_restored(stage, result):
+        # Subdomains restored from a session claim their hosts too, so other
+        # roots do not scan them again.
+        root, _, name = stage.name.partition("/")
+        if scope and name == "subdomains" and result:
+            scope.claim(root, read_names(result))
+
+    try:
+        if scope is None:
+            store = SessionStore(target, resume=resume)
+        else:
+            store = MultiSessionStore(label, scope.roots, resume=resume)
+    except SessionBusy as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+    coordinator = Coordinator(distribute, token=token).start() if distribute else None
+
+    if scope is None:
+        stages = build_stages(target)
+    else:
+        console.print(
+            f"[cyan]Scope {scope.name}: {len(scope.roots)} root domain(s), "
+            f"{len(scope.exclusions)} exclusion(s).[/cyan]"
+        )
+        stages = []
+        for root in scope.roots:
+            stages += prefix_stages(
+                build_stages(root, scope=scope),
+                f"{root}/",
+            )
+    if parallel is None:
+        # One scheduler runs the stages of every root; by default it gets
+        # more room per root, up to a fixed cap. An explicit --parallel is
+        # the global limit.
+        parallel = DEFAULT_PARALLEL
+        if scope:
+            parallel = min(DEFAULT_PARALLEL * len(scope.roots), SCOPE_MAX_PARALLEL)
+    # In scope mode every root may run --concurrency processes of a tool, but
+    # all roots together stay within a CPU-bound cap per tool.
+    default_budget = None
+    if scope:
+        default_budget = max(
+            concurrency,
+            min(concurrency * len(scope.roots), 2 * (os.cpu_count() or 1)),
+        )
+    set_tool_budgets(parse_limits(budget, default=default_budget))
+    for stage in stages:
+        name = stage.name.rsplit("/", 1)[-1]
+        stage.timeout = stage_timeouts.get(name, stage_timeouts.get("*"))
+    controller = set_controller(
+        ConcurrencyController(concurrency, maximum=max_concurrency).start_reporting()
+        if adaptive
+        else None
     )
+
     typer.secho(
-        f"Starting full recon on [cyan]{target}[/cyan]...", fg=typer.colors.GREEN
+        f"Starting full recon on [cyan]{label}[/cyan]...", fg=typer.colors.GREEN
     )
-    if bot_token and chat_id:
-        send_telegram(bot_token, chat_id, f"su6oRecon: Starting recon on {target}")
-
-    # 1) Subdomain enumeration
-    subdomains = run_subdomain_enumeration(target)
-    session["results"]["subdomains"] = subdomains
-    save_state(target, session)
-
-    # 2) HTTP probing
-    alive = run_http_probe(subdomains, proxy=proxy, tor=tor)
-    session["results"]["alive_domains"] = alive
-    save_state(target, session)
-
-    # 3) Screenshot capture
-    run_screenshot(alive)
-
-    # 4) Port scanning
-    port_results = run_port_scan(alive)
-    session["results"]["port_scan"] = port_results
-    save_state(target, session)
-
-    # 5) Directory brute-forcing
-    dir_results = run_directory_scan(alive)
-    session["results"]["directory_scan"] = dir_results
-    save_state(target, session)
-
-    # 6) Vulnerability scanning (Nuclei)
-    vuln_results = run_vulnerability_scan(alive)
-    session["results"]["vulnerability_scan"] = vuln_results
-    save_state(target, session)
-
-    # 7) Parameter discovery
-    params = run_param_spider(alive)
-    session["results"]["parameters"] = params
-    save_state(target, session)
-
-    # 8) Subdomain takeover detection
-    takeover_results = run_subjack(alive)
-    session["results"]["takeover"] = takeover_results
-    save_state(target, session)
+    set_notifier(notifier_from_config(config, findings=notify_findings))
+    notify(f"su6oRecon: Starting recon on {label}")
+    # Tool input and output files live in a directory of this run's own, so
+    # runs sharing a working directory never see each other's files.
+    set_scratch(Scratch(base=scratch_dir, tmpfs=tmpfs, keep=keep_scratch))
+    prefix = output or f"{label}_recon_{store.get_meta('timestamp')}"
+    try:
+        run_stages(
+            stages,
+            max_parallel=parallel,
+            store=store,
+            on_complete=claim_restored,
+            on_interrupt=lambda: stop_run(coordinator),
+        )
+        if defer_stragglers:
+            run_stragglers(concurrency=concurrency, timeout=tail_timeout)
+    finally:
+        if coordinator is not None:
+            coordinator.stop()
+        if controller is not None:
+            controller.stop_reporting()
+        set_scratch(None)
+        export_metrics(metrics, store, prefix, profiler, controller)
 
     typer.secho("Recon pipeline completed.", fg=typer.colors.GREEN)
-    if bot_token and chat_id:
-        send_telegram(
-            bot_token,
-            chat_id,
-            f"su6oRecon: Recon completed for {target}. Generating reports.",
-        )
+    print_cache_summary()
+    notify(f"su6oRecon: Recon completed for {label}. Generating reports.")
 
-    from utils import generate_reports
+    try:
+        save_findings(store, label)
+        generate_reports(store, output_prefix=output, formats=formats)
+        notify(f"su6oRecon: Reports generated for {label}.")
+    finally:
+        store.close()
+        # Waits briefly for queued messages to go out.
+        stop_notifier()
 
-    generate_reports(session, output_prefix=output)
-    if bot_token and chat_id:
-        send_telegram(bot_token, chat_id, f"su6oRecon: Reports generated for {target}.")
+
+@app.command()
+def monitor(
+    target: str = typer.Argument(..., help="Target domain to monitor"),
+    interval: str = typer.Option(
+        None,
+        "--interval",
+        help="Time between cycles, e.g. '6h' (default: run one cycle and exit)",
+    ),
+    cycles: int = typer.Option(
+        0, "--cycles", help="Stop after this many cycles (0 = keep running)"
+    ),
+    proxy: str = typer.Option(
+        None, "--proxy", help="HTTP proxy (e.g. http://127.0.0.1:8080)"
+    ),
+    tor: bool = typer.Option(False, "--tor", help="Route traffic through Tor"),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted cycle instead of starting it over",
+    ),
+    baseline: bool = typer.Option(
+        False,
+        "--baseline",
+        help="Only record what the first cycle of a new index finds, without "
+        "scanning it",
+    ),
+    parallel: int = typer.Option(
+        DEFAULT_PARALLEL,
+        "--parallel",
+        help="Maximum number of stages to run at the same time",
+    ),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Parallel tool processes per per-target stage"
+    ),
+    probe_engine: str = typer.Option(
+        "native",
+        "--probe-engine",
+        help="HTTP probing engine: 'native' (detects changed responses) or "
+        "'httpx' (only new and gone URLs)",
+    ),
+    probe_concurrency: int = typer.Option(
+        50, "--probe-concurrency", help="Parallel requests for the native engine"
+    ),
+    probe_timeout: int = typer.Option(
+        None,
+        "--probe-timeout",
+        help="Seconds to wait for each probe request (default: 10)",
+    ),
+    follow_redirects: bool = typer.Option(
+        False, "--follow-redirects", help="Follow redirects when probing"
+    ),
+    notify_findings: bool = typer.Option(
+        False,
+        "--notify-findings",
+        help="Send a Telegram alert for each Nuclei finding and takeover",
+    ),
+    templates: str = typer.Option(
+        None,
+        "--templates",
+        help="Nuclei templates path (defaults to config, then nuclei's own)",
+    ),
+    tags: str = typer.Option(
+        None, "--tags", help="Only run Nuclei templates with these tags"
+    ),
+    severity: str = typer.Option(
+        None, "--severity", help="Only run Nuclei templates of these severities"
+    ),
+):
+    """
+    Re-run discovery on the target every --interval and send only new or
+    changed hosts through the port, directory, Nuclei and takeover scans.
+    """
+    config = load_config()
+    if probe_engine not in ("httpx", "native"):
+        raise typer.BadParameter("--probe-engine must be 'httpx' or 'native'")
+    try:
+        interval = parse_duration(interval) if interval else None
+    except ValueError as e:
+        raise typer.BadParameter(f"Invalid duration: {e}")
+    probe_kwargs = probe_options(probe_timeout, follow_redirects)
+    # Cached enumeration and probe results would hide what changed.
+    configure_cache(enabled=False)
+    nuclei_filters = {
+        "templates": templates or config.get("nuclei_templates"),
+        "tags": tags,
+        "severity": severity,
+    }
+
+    def probe(names):
+        if probe_engine == "native":
+            # Fingerprinted, so a changed page shows up between cycles.
+            return run_native_probe(
+                names,
+                proxy=proxy,
+                tor=tor,
+                concurrency=probe_concurrency,
+                fingerprint=True,
+                **probe_kwargs,
+            )
+        alive = run_http_probe(names, proxy=proxy, tor=tor, **probe_kwargs)
+        return {url: None for url in alive}
+
+    index = MonitorIndex(target)
+    set_notifier(notifier_from_config(config, findings=notify_findings))
+    cycle = 0
+    try:
+        while True:
+            cycle += 1
+            reset_metrics()
+            scan = not (baseline and index.is_empty())
+            try:
+                store = SessionStore(
+                    f"{target}_monitor", resume=resume and cycle == 1
+                )
+            except SessionBusy as e:
+                console.print(f"[red]Error:[/red] {e}")
+                raise typer.Exit(1)
+            timestamp = store.get_meta("timestamp")
+            started = datetime.now().isoformat(timespec="seconds")
+            typer.secho(
+                f"Monitoring cycle {index.cycle_count() + 1} on "
+                f"[cyan]{target}[/cyan]...",
+                fg=typer.colors.GREEN,
+            )
+            results = run_stages(
+                cycle_stages(
+                    target,
+                    index,
+                    probe,
+                    concurrency=concurrency,
+                    nuclei_filters=nuclei_filters,
+                    scan=scan,
+                ),
+                max_parallel=parallel,
+                store=store,
+                on_interrupt=terminate_all,
+            )
+            if "delta" in results:
+                save_findings(store, target)
+            store.close()
+            if "delta" not in results or (
+                scan and not all(name in results for name in SCAN_STAGES)
+            ):
+                # The index only moves on once a cycle is complete, so the
+                # next one sees the same delta again.
+                console.print(
+                    "[red]Error:[/red] Cycle incomplete; the index was not "
+                    "updated."
+                )
+            else:
+                summary = summarize(results)
+                index.commit(
+                    read_names(results["subdomains"]),
+                    results["http_probe"],
+                    started,
+                    summary,
+                )
+                write_cycle_report(target, timestamp, results, summary)
+                table = Table(title=f"Changes on {target}")
+                table.add_column("Change", style="cyan")
+                table.add_column("Count", justify="right")
+                for key, value in summary.items():
+                    table.add_row(key.replace("_", " "), str(value))
+                console.print(table)
+                changes = ", ".join(
+                    f"{value} {key.replace('_', ' ')}"
+                    for key, value in summary.items()
+                    if value
+                )
+                notify(
+                    f"su6oRecon: Monitoring cycle on {target}: "
+                    f"{changes or 'no changes'}."
+                )
+            if interval is None or (cycles and cycle >= cycles):
+                break
+            console.print(
+                f"[cyan]Next cycle in {interval:g}s (Ctrl-C to stop).[/cyan]"
+            )
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("[yellow]Monitoring stopped.[/yellow]")
+    finally:
+        index.close()
+        stop_notifier()
 
 
 @app.command()
@@ -165,35 +1106,119 @@ def subdomain(
     """
     Run subdomain enumeration (assetfinder, subfinder, amass).
     """
-    subdomains = run_subdomain_enumeration(target, module=module)
-    table = Table(title=f"Subdomains for {target}", show_lines=True)
-    table.add_column("Subdomain", style="cyan")
-    for s in subdomains:
-        table.add_row(s)
-    console.print(table)
-    # Save to file
-    with open(f"{target}_subdomains.txt", "w") as f:
-        for s in subdomains:
-            f.write(s + "\n")
+    names = enumerate_subdomains(target, module=module)
+    # Names go from the on-disk dedupe straight to the file; only a short
+    # list is shown as a table.
+    count = 0
+    shown = []
+    try:
+        with open(f"{target}_subdomains.txt", "w") as f:
+            for s in names:
+                f.write(s + "\n")
+                count += 1
+                if count <= TABLE_ROWS:
+                    shown.append(s)
+    finally:
+        names.close()
+    if count <= TABLE_ROWS:
+        table = Table(title=f"Subdomains for {target}", show_lines=True)
+        table.add_column("Subdomain", style="cyan")
+        for s in shown:
+            table.add_row(s)
+        console.print(table)
+    else:
+        console.print(f"[cyan]{count} unique subdomains found.[/cyan]")
     typer.secho(f"Subdomains saved to {target}_subdomains.txt", fg=typer.colors.GREEN)
 
 
+@app.command()
+def resolve(
+    target: str = typer.Argument(..., help="Domain or file of domains to resolve"),
+    resolvers: str = typer.Option(
+        None,
+        "--resolvers",
+        help="Comma-separated resolvers or a file of them (default: system)",
+    ),
+    qps: int = typer.Option(
+        0, "--qps", help="Maximum DNS queries per second (0 = unlimited)"
+    ),
+    root: str = typer.Option(
+        None, "--root", help="Root domain; wildcard checks stop at this zone"
+    ),
+):
+    """
+    Resolve names, detect wildcard DNS and keep only real hosts.
+    """
+    if os.path.isfile(target):
+        with open(target) as f:
+            domains = [line.strip() for line in f if line.strip()]
+    else:
+        domains = [target]
+    result = run_dns_resolution(
+        domains, root=root, resolvers=read_list(resolvers), qps=qps
+    )
+    table = Table(title="Resolved hosts", show_lines=True)
+    table.add_column("Host", style="cyan")
+    table.add_column("Addresses")
+    table.add_column("CNAME")
+    for host, record in result["records"].items():
+        table.add_row(
+            host, ", ".join(record["a"] + record["aaaa"]), ", ".join(record["cname"])
+        )
+    console.print(table)
+    with open("resolved.txt", "w") as f:
+        for host in result["records"]:
+            f.write(host + "\n")
+    typer.secho("Resolved hosts saved to resolved.txt", fg=typer.colors.GREEN)
+
+
 @app.command()
 def httpx(
-    target: str = typer.Argument(..., help="Domain or file of domains for HTTP probing")
+    target: str = typer.Argument(
+        ..., help="Domain or file of domains for HTTP probing"
+    ),
+    engine: str = typer.Option(
+        "httpx", "--engine", help="Probing engine: 'httpx' or 'native'"
+    ),
+    concurrency: int = typer.Option(
+        50, "--concurrency", help="Parallel requests for the native engine"
+    ),
+    timeout: int = typer.Option(
+        None, "--timeout", help="Seconds to wait for each request (default: 10)"
+    ),
+    follow_redirects: bool = typer.Option(
+        False, "--follow-redirects", help="Follow redirects when probing"
+    ),
 ):
     """
-    Run httpx to check for alive hosts.
+    Run httpx (or the native engine) to check for alive hosts.
     """
+    options = probe_options(timeout, follow_redirects)
     if os.path.isfile(target):
         with open(target) as f:
             domains = [line.strip() for line in f if line.strip()]
     else:
         domains = [target]
-    alive = run_http_probe(domains)
-    console.print("[green]Alive domains:[/green]")
-    for url in alive:
-        console.print(f" - {url}")
+    if engine == "native":
+        records = run_native_probe(domains, concurrency=concurrency, **options)
+        table = Table(title="Alive hosts", show_lines=True)
+        for column in ("URL", "Status", "Title", "Length", "Server"):
+            table.add_column(column, style="cyan" if column == "URL" else None)
+        for url, record in records.items():
+            table.add_row(
+                url,
+                str(record["status"]),
+                record["title"] or "",
+                str(record["content_length"]),
+                record["server"] or "",
+            )
+        console.print(table)
+        alive = list(records)
+    else:
+        alive = run_http_probe(domains, **options)
+        console.print("[green]Alive domains:[/green]")
+        for url in alive:
+            console.print(f" - {url}")
     with open("httpx_alive.txt", "w") as f:
         for url in alive:
             f.write(url + "\n")
@@ -204,7 +1229,10 @@ def httpx(
 
 @app.command()
 def screenshot(
-    target: str = typer.Argument(..., help="Domain or file of domains for screenshots")
+    target: str = typer.Argument(..., help="Domain or file of domains for screenshots"),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Number of gowitness processes to run in parallel"
+    ),
 ):
     """
     Capture screenshots for the given target(s) using gowitness.
@@ -214,23 +1242,86 @@ def screenshot(
             domains = [line.strip() for line in f if line.strip()]
     else:
         domains = [target]
-    run_screenshot(domains)
+    run_screenshot(domains, concurrency=concurrency)
     typer.secho(
         "Screenshots saved to './screenshots/' directory.", fg=typer.colors.GREEN
     )
 
 
 @app.command()
-def nmap(target: str = typer.Argument(..., help="Domain or IP for port scanning")):
+def nmap(
+    target: str = typer.Argument(
+        ..., help="Domain, IP or file of hosts for port scanning"
+    ),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Number of nmap processes to run in parallel"
+    ),
+    batch: bool = typer.Option(
+        False, "--batch", help="Deduplicate by IP and scan in batched nmap runs"
+    ),
+    prescan: bool = typer.Option(
+        False,
+        "--prescan",
+        help="TCP connect scan first so nmap only service-detects open ports",
+    ),
+    ports: str = typer.Option(
+        None, "--ports", help="Ports for the connect pre-scan, e.g. 80,443,8000-8100"
+    ),
+    prescan_concurrency: int = typer.Option(
+        PRESCAN_CONCURRENCY,
+        "--prescan-concurrency",
+        help="Connections the pre-scan keeps open at once",
+    ),
+    prescan_timeout: str = typer.Option(
+        None, "--prescan-timeout", help="Connect timeout per port (default: 1s)"
+    ),
+    prescan_host_timeout: str = typer.Option(
+        None,
+        "--prescan-host-timeout",
+        help="Pre-scan time limit per host; open ports found so far are kept "
+        "(default: 60s)",
+    ),
+):
     """
     Run nmap port scan with service detection.
     """
-    run_port_scan([target])
+    if os.path.isfile(target):
+        with open(target) as f:
+            hosts = [line.strip() for line in f if line.strip()]
+    else:
+        hosts = [target]
+    prescan_ports = (ports or DEFAULT_PORTS) if prescan else None
+    scanner = run_batched_port_scan if batch else run_port_scan
+    results = scanner(
+        hosts,
+        concurrency=concurrency,
+        prescan_ports=prescan_ports,
+        prescan_options=prescan_options(
+            prescan_concurrency, prescan_timeout, prescan_host_timeout
+        ),
+    )
+    table = Table(title="Open ports", show_lines=True)
+    table.add_column("Host", style="cyan")
+    table.add_column("IP")
+    table.add_column("Ports")
+    for host, result in results.items():
+        ports = ", ".join(
+            f"{p['port']}/{p['service'] or '?'}"
+            for p in result["ports"]
+            if p["state"] == "open"
+        )
+        table.add_row(host, result["ip"] or "", ports)
+    console.print(table)
     typer.secho("Nmap scan complete.", fg=typer.colors.GREEN)
 
 
 @app.command()
-def fuzz(target: str = typer.Argument(..., help="Domain for directory brute-forcing")):
+def fuzz(
+    target: str = typer.Argument(..., help="Domain for directory brute-forcing"),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Number of ffuf processes to run in parallel"
+    ),
+):
     """
     Run ffuf directory brute-force on the given domain.
     """
@@ -239,13 +1330,30 @@ def fuzz(target: str = typer.Argument(..., help="Domain for directory brute-forc
             domains = [line.strip() for line in f if line.strip()]
     else:
         domains = [target]
-    run_directory_scan(domains)
+    run_directory_scan(domains, concurrency=concurrency)
     typer.secho("Directory brute-forcing complete.", fg=typer.colors.GREEN)
 
 
 @app.command()
 def nuclei(
-    target: str = typer.Argument(..., help="Domain or file for vulnerability scanning")
+    target: str = typer.Argument(..., help="Domain or file for vulnerability scanning"),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Number of nuclei processes to run in parallel"
+    ),
+    batch: bool = typer.Option(
+        False, "--batch", help="Pass targets to nuclei as lists with JSONL output"
+    ),
+    templates: str = typer.Option(
+        None,
+        "--templates",
+        help="Nuclei templates path (defaults to config, then nuclei's own)",
+    ),
+    tags: str = typer.Option(
+        None, "--tags", help="Only run Nuclei templates with these tags"
+    ),
+    severity: str = typer.Option(
+        None, "--severity", help="Only run Nuclei templates of these severities"
+    ),
 ):
     """
     Run Nuclei vulnerability scanning on the given target(s).
@@ -255,16 +1363,36 @@ def nuclei(
             domains = [line.strip() for line in f if line.strip()]
     else:
         domains = [target]
-    run_vulnerability_scan(domains)
+    filters = {
+        "templates": templates or load_config().get("nuclei_templates"),
+        "tags": tags,
+        "severity": severity,
+    }
+    if batch:
+        run_batched_vulnerability_scan(domains, shards=concurrency, **filters)
+    else:
+        run_vulnerability_scan(domains, concurrency=concurrency, **filters)
     typer.secho("Nuclei scanning complete.", fg=typer.colors.GREEN)
 
 
 @app.command()
-def params(target: str = typer.Argument(..., help="Domain for parameter discovery")):
+def params(
+    target: str = typer.Argument(
+        ..., help="Domain or file of domains for parameter discovery"
+    ),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Number of ParamSpider processes to run in parallel"
+    ),
+):
     """
     Run ParamSpider on the given target domain.
     """
-    run_param_spider([target])
+    if os.path.isfile(target):
+        with open(target) as f:
+            domains = [line.strip() for line in f if line.strip()]
+    else:
+        domains = [target]
+    run_param_spider(domains, concurrency=concurrency)
     typer.secho("ParamSpider scan complete.", fg=typer.colors.GREEN)
 
 
@@ -286,5 +1414,167 @@ def takeover(
     typer.secho("Subjack scan complete.", fg=typer.colors.GREEN)
 
 
+def _since(value):
+    # An ISO date/time, or a duration ago that names its unit ("7d", "12h"):
+    # a bare number such as 2026 is a year typed short, not seconds.
+    try:
+        return datetime.fromisoformat(value).isoformat(timespec="seconds")
+    except ValueError:
+        pass
+    try:
+        if not value.strip()[-1:].isalpha():
+            raise ValueError(value)
+        moment = datetime.now() - timedelta(seconds=parse_duration(value))
+    except ValueError:
+        raise ValueError(
+            f"--since '{value}' is neither an ISO date nor a duration with a "
+            "unit such as '7d' or '12h'"
+        ) from None
+    return moment.isoformat(timespec="seconds")
+
+
+def _finding_detail(row):
+    if row["stage"] == "port_scan":
+        product = " ".join(filter(None, (row["product"], row["version"])))
+        return f"{row['service'] or '?'} {product}".strip()
+    if row["stage"] == "directory_scan":
+        return f"{row['url']} [{row['status']}, {row['length']} bytes]"
+    if row["stage"] == "vulnerability_scan":
+        return f"[{row['severity']}] {row['template']} {row['url']}"
+    return row["service"] or ""
+
+
+@app.command()
+def query(
+    target: str = typer.Option(
+        None, "--target", help="Only findings of this root domain or scope name"
+    ),
+    stage: str = typer.Option(None, "--stage", help=f"One of {', '.join(STAGES)}"),
+    host: str = typer.Option(
+        None, "--host", help="Host name; '*' matches anything, e.g. '*.example.com'"
+    ),
+    port: str = typer.Option(
+        None,
+        "--port",
+        help="Ports such as 8080,8000-8100; a leading '!' excludes them "
+        "('!80,443')",
+    ),
+    service: str = typer.Option(None, "--service", help="nmap service name"),
+    product: str = typer.Option(
+        None, "--product", help="Product nmap detected, e.g. '*jenkins*'"
+    ),
+    template: str = typer.Option(None, "--template", help="Nuclei template ID"),
+    severity: str = typer.Option(
+        None, "--severity", help="Nuclei severities, e.g. high,critical"
+    ),
+    status: str = typer.Option(
+        None, "--status", help="HTTP status codes of discovered paths, e.g. 200,403"
+    ),
+    since: str = typer.Option(
+        None, "--since", help="Last seen within a duration ('7d') or after a date"
+    ),
+    until: str = typer.Option(None, "--until", help="Last seen before a date"),
+    limit: int = typer.Option(100, "--limit", help="Maximum rows (0 for all)"),
+    as_json: bool = typer.Option(
+        False, "--json", help="Print the matching records as JSON lines"
+    ),
+    db_path: str = typer.Option(
+        None, "--db", help=f"Findings database (default: {DB_PATH})"
+    ),
+    ingest: str = typer.Option(
+        None,
+        "--ingest",
+        help="First add the stored sessions of these targets (comma-separated)",
+    ),
+):
+    """
+    Search the findings of all past runs.
+    """
+    if stage and stage not in STAGES:
+        raise typer.BadParameter(f"--stage must be one of {', '.join(STAGES)}")
+    try:
+        since = _since(since) if since else None
+        until = datetime.fromisoformat(until).isoformat() if until else None
+        status = [int(code) for code in read_list(status)] if status else None
+        if port:
+            parse_ports(port)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    db = FindingsDB(db_path)
+    try:
+        for name in read_list(ingest) if ingest else []:
+            if not os.path.exists(os.path.join("sessions", f"{name}_session.db")):
+                console.print(f"[red]Error:[/red] No stored session for {name}.")
+                continue
+            try:
+                store = SessionStore(name, resume=True)
+            except SessionBusy as e:
+                console.print(f"[red]Error:[/red] {e}")
+                continue
+            try:
+                count = db.ingest_session(store)
+            finally:
+                store.close()
+            console.print(f"[green]{count} record(s) added from {name}.[/green]")
+        rows = db.query(
+            target=target,
+            stage=stage,
+            host=host,
+            ports=port,
+            service=service,
+            product=product,
+            template=template,
+            severity=[s.lower() for s in read_list(severity)] if severity else None,
+            status=status,
+            since=since,
+            until=until,
+            limit=limit,
+        )
+    finally:
+        db.close()
+    if as_json:
+        for row in rows:
+            typer.echo(json.dumps({k: v for k, v in row.items() if v is not None}))
+        return
+    table = Table(title=f"Findings ({len(rows)})")
+    table.add_column("Last seen")
+    table.add_column("Target", style="cyan")
+    table.add_column("Stage")
+    table.add_column("Host")
+    table.add_column("Port", justify="right")
+    table.add_column("Details")
+    for row in rows:
+        table.add_row(
+            row["last_seen"],
+            row["target"],
+            row["stage"],
+            row["host"] or "",
+            str(row["port"] or ""),
+            escape(_finding_detail(row)),
+        )
+    console.print(table)
+
+
+@app.command()
+def worker(
+    address: str = typer.Argument(
+        ..., help="Coordinator address (host:port) started with full --distribute"
+    ),
+    concurrency: int = typer.Option(
+        1, "--concurrency", help="Work items to process at the same time"
+    ),
+    token: str = typer.Option(
+        None, "--token", help="Shared secret of the coordinator"
+    ),
+):
+    """
+    Process scan work items for a coordinator until interrupted.
+    """
+    try:
+        run_worker(address, concurrency=concurrency, token=token)
+    except KeyboardInterrupt:
+        typer.secho("Worker stopped.", fg=typer.colors.YELLOW)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from modules import cache as cache_module
+from modules.cache import ToolCache, configure_cache, get_cache, parse_size, parse_ttl
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    configure_cache(enabled=False)
+
+
+def test_parse_size():
+    assert parse_size("1048576") == 1048576
+    assert parse_size("500k") == 500 * 1024
+    assert parse_size(" 512MB ") == 512 * 1024**2
+    assert parse_size("1.5G") == 3 * 1024**3 // 2
+    for value in ("", "lots", "-1M", "0"):
+        with pytest.raises(ValueError):
+            parse_size(value)
+
+
+def test_parse_ttl():
+    assert parse_ttl("48")["nmap"] == 48
+    ttl = parse_ttl("NMAP=96,paramspider=1")
+    assert (ttl["nmap"], ttl["ParamSpider"], ttl["nuclei"]) == (96, 1, 24)
+    for value in ("nmap=soon", "masscan=4", "forever"):
+        with pytest.raises(ValueError):
+            parse_ttl(value)
+
+
+def test_cache_is_opened_on_first_use(workdir):
+    configure_cache(ttl="1", max_bytes=1024)
+    assert not os.path.exists(workdir / "cache")
+    assert get_cache(create=False) is None
+    cache = get_cache()
+    assert cache.max_bytes == 1024
+    assert cache.ttl_hours["nmap"] == 1
+    assert os.path.exists(workdir / "cache" / "tool_cache.db")
+    assert get_cache(create=False) is cache
+    configure_cache(enabled=False)
+    assert get_cache() is None
+
+
+def test_least_recently_used_entries_are_evicted(workdir, monkeypatch):
+    monkeypatch.setattr(cache_module, "tool_version", lambda tool: "test")
+    cache = ToolCache(path=str(workdir / "tool_cache.db"), max_bytes=100)
+    try:
+        cache.put("nmap", [], "a", "x" * 40)
+        cache.put("nmap", [], "b", "x" * 40)
+        assert cache.get("nmap", [], "a") is not None
+        cache.put("nmap", [], "c", "x" * 40)
+        assert cache.get("nmap", [], "b") is None
+        assert cache.get("nmap", [], "a") == "x" * 40
+        assert cache.get("nmap", [], "c") == "x" * 40
+    finally:
+        cache.close()
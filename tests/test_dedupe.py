@@ -0,0 +1,36 @@
+from modules.dedupe import DiskDedupe, read_names, write_names
+
+
+def test_disk_dedupe_spills_and_merges(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    names = DiskDedupe(chunk=2)
+    try:
+        for name in ["c", "a", "b", "a", "d", "c"]:
+            names.add(name)
+        assert list(names) == ["a", "b", "c", "d"]
+        assert list(names) == ["a", "b", "c", "d"]
+    finally:
+        names.close()
+
+
+def test_add_new_checks_the_names_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    names = DiskDedupe(chunk=3)
+    try:
+        assert names.add_new("a")
+        assert not names.add_new("a")
+        assert names.add_new("b")
+        assert names.add_new("c")
+        # "a" was spilled with the full chunk, so it counts as new again.
+        assert names.add_new("a")
+        assert list(names) == ["a", "b", "c"]
+    finally:
+        names.close()
+
+
+def test_write_and_read_names(tmp_path):
+    path = str(tmp_path / "sessions" / "names.txt")
+    write_names(iter(["a.example.com", "b.example.com"]), path)
+    assert list(read_names(path)) == ["a.example.com", "b.example.com"]
+    assert list(read_names(["x"])) == ["x"]
+    assert list(read_names(None)) == []
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import distributed
+from distributed import Coordinator, WorkQueue, _Connection, _work_loop
+
+
+def test_expired_lease_is_reassigned():
+    work = WorkQueue(lease_seconds=0.05)
+    finished = work.submit("port_scan", [["a.example.com"]], {})
+    first = work.handle({"op": "lease", "worker": "w1"})["item"]
+    assert first["targets"] == ["a.example.com"]
+    assert work.handle({"op": "lease", "worker": "w2"})["item"] is None
+
+    time.sleep(0.1)
+    work.expire()
+    second = work.handle({"op": "lease", "worker": "w2"})["item"]
+    assert second["id"] == first["id"]
+    # The first worker lost its lease.
+    assert work.handle({"op": "heartbeat", "worker": "w1", "id": first["id"]}) == {
+        "ok": False
+    }
+    assert work.handle({"op": "heartbeat", "worker": "w2", "id": first["id"]}) == {
+        "ok": True
+    }
+
+    result = {"a.example.com": "scanned"}
+    request = {"op": "complete", "worker": "w2", "id": second["id"], "result": result}
+    assert work.handle(request) == {"ok": True}
+    assert finished.get_nowait() == (["a.example.com"], result)
+    # A late result for an item that is already done is ignored.
+    request["worker"] = "w1"
+    assert work.handle(request) == {"ok": False}
+    assert finished.empty()
+
+
+def test_item_given_up_after_max_attempts():
+    work = WorkQueue(lease_seconds=0.01, max_attempts=2)
+    finished = work.submit("port_scan", [["a.example.com"]], {})
+    for worker in ("w1", "w2"):
+        assert work.handle({"op": "lease", "worker": worker})["item"] is not None
+        time.sleep(0.02)
+        work.expire()
+    assert work.handle({"op": "lease", "worker": "w3"})["item"] is None
+    assert finished.get_nowait() == (["a.example.com"], None)
+
+
+def test_failed_item_is_retried():
+    work = WorkQueue()
+    work.submit("port_scan", [["a.example.com"]], {})
+    item = work.handle({"op": "lease", "worker": "w1"})["item"]
+    request = {"op": "fail", "worker": "w1", "id": item["id"], "error": "boom"}
+    assert work.handle(request) == {"ok": True}
+    assert work.handle({"op": "lease", "worker": "w2"})["item"]["id"] == item["id"]
+
+
+def test_token_is_checked():
+    work = WorkQueue(token="secret")
+    assert work.handle({"op": "lease", "worker": "w1"}) == {"error": "unauthorized"}
+    request = {"op": "lease", "worker": "w1", "token": "secret"}
+    assert work.handle(request) == {"item": None}
+
+
+def test_cancel_drops_unfinished_items():
+    work = WorkQueue()
+    finished = work.submit("port_scan", [["a"], ["b", "c"]], {})
+    item = work.handle({"op": "lease", "worker": "w1"})["item"]
+    assert sorted(work.cancel(finished)) == ["a", "b", "c"]
+    assert work.handle({"op": "lease", "worker": "w1"})["item"] is None
+    request = {"op": "complete", "worker": "w1", "id": item["id"], "result": {}}
+    assert work.handle(request) == {"ok": False}
+    assert finished.empty()
+
+
+def test_coordinator_reassigns_work_of_a_silent_worker(monkeypatch):
+    monkeypatch.setitem(
+        distributed.TASKS,
+        "echo",
+        lambda targets, options: {target: target.upper() for target in targets},
+    )
+    coordinator = Coordinator("127.0.0.1:0", lease_seconds=0.5).start()
+    address = coordinator._server.server_address[:2]
+    stop = threading.Event()
+    silent = _Connection(address, None)
+
+    def lease_and_vanish():
+        # Takes the first item and never heartbeats or completes it.
+        while not stop.is_set():
+            if silent.request(op="lease", worker="silent")["item"] is not None:
+                return
+            stop.wait(0.01)
+
+    def live_worker():
+        lease_and_vanish()
+        _work_loop(address, None, "live", stop, 0.05)
+
+    threading.Thread(target=live_worker, daemon=True).start()
+    try:
+        results = coordinator.map("echo", ["a", "b", "c"])
+    finally:
+        stop.set()
+        silent.close()
+        coordinator.stop()
+    assert results == {"a": "A", "b": "B", "c": "C"}
@@ -0,0 +1,241 @@
+import asyncio
+import socket
+import socketserver
+import struct
+import threading
+
+import pytest
+
+from modules.dns_resolve import (
+    QTYPE_A,
+    QTYPE_AAAA,
+    QTYPE_CNAME,
+    RCODE_NXDOMAIN,
+    RCODE_SERVFAIL,
+    AsyncResolver,
+    _read_name,
+    build_query,
+    parse_resolver,
+    parse_response,
+    run_dns_resolution,
+)
+
+
+def _answer(rtype, rdata, name=b"\xc0\x0c"):
+    return name + struct.pack("!HHIH", rtype, 1, 300, len(rdata)) + rdata
+
+
+def _response(query, answers=(), rcode=0):
+    """
+    Turn a query packet into a response carrying `answers`.
+    """
+    txid = struct.unpack("!H", query[:2])[0]
+    header = struct.pack("!HHHHHH", txid, 0x8180 | rcode, 1, len(answers), 0, 0)
+    return header + query[12:] + b"".join(answers)
+
+
+def test_parse_resolver():
+    assert parse_resolver("1.1.1.1") == ("1.1.1.1", 53)
+    assert parse_resolver(" 127.0.0.1:5353 ") == ("127.0.0.1", 5353)
+    assert parse_resolver("[::1]:5353") == ("::1", 5353)
+    assert parse_resolver("[::1]") == ("::1", 53)
+
+
+def test_build_query_encodes_labels():
+    packet = build_query("Www.Example.com.", QTYPE_A, 0x1234)
+    assert packet[:12] == struct.pack("!HHHHHH", 0x1234, 0x0100, 1, 0, 0, 0)
+    assert packet[12:] == b"\x03Www\x07Example\x03com\x00" + struct.pack("!HH", 1, 1)
+
+
+def test_parse_response_answers_with_compression():
+    query = build_query("www.example.com", QTYPE_A, 7)
+    # The CNAME target points back into the question ("example.com").
+    cname = b"\x03cdn\xc0\x10"
+    packet = _response(
+        query,
+        [
+            _answer(QTYPE_CNAME, cname),
+            _answer(QTYPE_A, socket.inet_aton("192.0.2.1")),
+            _answer(QTYPE_AAAA, socket.inet_pton(socket.AF_INET6, "2001:db8::1")),
+            # Other record types (here TXT) are skipped.
+            _answer(16, b"\x02hi"),
+        ],
+    )
+    txid, rcode, answers = parse_response(packet)
+    assert (txid, rcode) == (7, 0)
+    assert answers == [
+        ("CNAME", "cdn.example.com"),
+        ("A", "192.0.2.1"),
+        ("AAAA", "2001:db8::1"),
+    ]
+
+
+def test_parse_response_rcode():
+    query = build_query("missing.example.com", QTYPE_A, 9)
+    assert parse_response(_response(query, rcode=RCODE_NXDOMAIN)) == (
+        9,
+        RCODE_NXDOMAIN,
+        [],
+    )
+
+
+def test_parse_response_rejects_compression_loop():
+    header = struct.pack("!HHHHHH", 1, 0x8180, 1, 0, 0, 0)
+    with pytest.raises(ValueError):
+        parse_response(header + b"\xc0\x0c" + struct.pack("!HH", 1, 1))
+
+
+class _StubServer(asyncio.DatagramProtocol):
+    """
+    Answers A queries with 192.0.2.1 after dropping the first `drop` queries;
+    AAAA queries get an empty answer. With `rcode`, every query gets that
+    error instead.
+    """
+
+    def __init__(self, drop=0, rcode=0):
+        self.drop = drop
+        self.rcode = rcode
+        self.received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        if self.received <= self.drop:
+            return
+        if self.rcode:
+            self.transport.sendto(_response(data, rcode=self.rcode), addr)
+            return
+        qtype = struct.unpack("!H", data[-4:-2])[0]
+        answers = []
+        if qtype == QTYPE_A:
+            answers.append(_answer(QTYPE_A, socket.inet_aton("192.0.2.1")))
+        self.transport.sendto(_response(data, answers), addr)
+
+
+async def _resolve(name, drop, retries):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: _StubServer(drop), local_addr=("127.0.0.1", 0)
+    )
+    port = transport.get_extra_info("sockname")[1]
+    resolver = AsyncResolver([f"127.0.0.1:{port}"], timeout=0.2, retries=retries)
+    await resolver.start()
+    try:
+        return await resolver.query(name, QTYPE_A), resolver.queries
+    finally:
+        resolver.close()
+        transport.close()
+
+
+def test_query_retries_after_a_lost_packet():
+    response, queries = asyncio.run(_resolve("www.example.com", drop=2, retries=2))
+    assert response == (0, [("A", "192.0.2.1")])
+    assert queries == 3
+
+
+def test_query_gives_up_after_retries():
+    response, queries = asyncio.run(_resolve("www.example.com", drop=10, retries=1))
+    assert response is None
+    assert queries == 2
+
+
+def test_resolve_collects_records():
+    async def resolve():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            _StubServer, local_addr=("127.0.0.1", 0)
+        )
+        port = transport.get_extra_info("sockname")[1]
+        resolver = AsyncResolver([f"127.0.0.1:{port}"], timeout=0.5)
+        await resolver.start()
+        try:
+            return await resolver.resolve("www.example.com")
+        finally:
+            resolver.close()
+            transport.close()
+
+    assert asyncio.run(resolve()) == {"a": ["192.0.2.1"], "aaaa": [], "cname": []}
+
+
+def test_servfail_fails_over_to_another_resolver():
+    async def query():
+        loop = asyncio.get_running_loop()
+        broken, _ = await loop.create_datagram_endpoint(
+            lambda: _StubServer(rcode=RCODE_SERVFAIL), local_addr=("127.0.0.1", 0)
+        )
+        working, _ = await loop.create_datagram_endpoint(
+            _StubServer, local_addr=("127.0.0.1", 0)
+        )
+        resolvers = [
+            f"127.0.0.1:{t.get_extra_info('sockname')[1]}" for t in (broken, working)
+        ]
+        resolver = AsyncResolver(resolvers, timeout=0.5, retries=1)
+        await resolver.start()
+        try:
+            return await resolver.query("www.example.com", QTYPE_A)
+        finally:
+            resolver.close()
+            broken.close()
+            working.close()
+
+    assert asyncio.run(query()) == (0, [("A", "192.0.2.1")])
+
+
+# A zone where *.wild.example.com answers 192.0.2.9.
+ZONE = {
+    "www.example.com": "192.0.2.1",
+    "www.wild.example.com": "192.0.2.9",
+    "app.wild.example.com": "192.0.2.10",
+}
+
+
+class _ZoneHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        name, offset = _read_name(data, 12)
+        qtype = struct.unpack("!H", data[offset : offset + 2])[0]
+        address = ZONE.get(name)
+        if address is None and name.endswith(".wild.example.com"):
+            address = "192.0.2.9"
+        if name == "broken.example.com":
+            packet = _response(data, rcode=RCODE_SERVFAIL)
+        elif address is None:
+            packet = _response(data, rcode=RCODE_NXDOMAIN)
+        elif qtype == QTYPE_A:
+            packet = _response(data, [_answer(QTYPE_A, socket.inet_aton(address))])
+        else:
+            packet = _response(data)
+        sock.sendto(packet, self.client_address)
+
+
+@pytest.fixture
+def zone_resolver():
+    server = socketserver.ThreadingUDPServer(("127.0.0.1", 0), _ZoneHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_wildcard_only_names_are_dropped(zone_resolver):
+    names = (
+        name
+        for name in [
+            "www.example.com",
+            "WWW.example.com.",
+            "www.wild.example.com",
+            "app.wild.example.com",
+            "dead.example.com",
+            "broken.example.com",
+        ]
+    )
+    result = run_dns_resolution(
+        names, root="example.com", resolvers=[zone_resolver], timeout=0.5
+    )
+    assert list(result["records"]) == ["app.wild.example.com", "www.example.com"]
+    assert result["records"]["app.wild.example.com"]["a"] == ["192.0.2.10"]
+    assert result["wildcards"] == {"wild.example.com": ["192.0.2.9"]}
+    assert result["failed"] == ["broken.example.com"]
+    assert result["dropped"] == {"unresolved": 1, "wildcard": 1}
@@ -0,0 +1,106 @@
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+
+from modules.http_probe import _title_of, run_native_probe
+
+
+HOME = b"<html><title> Home &amp; Away\n</title>hello</html>"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "stub"
+    sys_version = ""
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow":
+            time.sleep(3)
+        if self.path == "/":
+            status, body = 200, HOME
+        else:
+            status, body = 404, b"<title>Not Found</title>"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_title_of():
+    assert _title_of(b"<TITLE>a\n  b</TITLE>") == "a b"
+    assert _title_of(b"<title> </title>") is None
+    assert _title_of(b"no title") is None
+
+
+def test_status_and_title(server):
+    records = run_native_probe([f"{server}/", f"{server}/missing"], timeout=5)
+    home = records[f"{server}/"]
+    assert home["status"] == 200
+    assert home["title"] == "Home & Away"
+    assert home["server"] == "stub"
+    assert home["content_length"] == len(HOME)
+    assert home["location"] is None
+    assert "simhash" not in home
+    missing = records[f"{server}/missing"]
+    assert (missing["status"], missing["title"]) == (404, "Not Found")
+
+
+def test_redirect_not_followed(server):
+    record = run_native_probe([f"{server}/redirect"], timeout=5)[f"{server}/redirect"]
+    assert record["status"] == 302
+    assert record["location"] == "/"
+    assert record["final_url"] == f"{server}/redirect"
+
+
+def test_redirect_followed(server):
+    record = run_native_probe(
+        [f"{server}/redirect"], timeout=5, follow_redirects=True
+    )[f"{server}/redirect"]
+    assert record["status"] == 200
+    assert record["final_url"] == f"{server}/"
+    assert record["title"] == "Home & Away"
+
+
+def test_unreachable_host_is_dropped(server):
+    # Bound but not listening, so connections to it are refused.
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+        records = run_native_probe(
+            [f"{server}/", f"http://127.0.0.1:{port}/"], timeout=2
+        )
+    assert list(records) == [f"{server}/"]
+
+
+def test_timeout_drops_slow_host(server):
+    started = time.monotonic()
+    assert run_native_probe([f"{server}/slow"], timeout=1) == {}
+    assert time.monotonic() - started < 2.5
+
+
+def test_fingerprint(server):
+    record = run_native_probe([f"{server}/"], timeout=5, fingerprint=True)[
+        f"{server}/"
+    ]
+    assert len(record["simhash"]) == 16
@@ -0,0 +1,91 @@
+import http.server
+import json
+import threading
+
+import pytest
+
+from modules.notify import Notifier, _chunks
+
+
+class _BotAPI(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.posts.append((self.path, body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        reply = {"ok": status == 200}
+        if status == 429:
+            reply["parameters"] = {"retry_after": 0}
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _BotAPI)
+    httpd.posts = []
+    httpd.statuses = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_chunks():
+    assert list(_chunks(["a", "b", "c"], limit=3)) == ["a\nb", "c"]
+    assert list(_chunks(["abcdefg"], limit=3)) == ["abc", "def", "g"]
+
+
+def test_messages_are_coalesced(api):
+    notifier = Notifier("TOKEN", "42", api_url=api.url, coalesce=0.5).start()
+    for text in ("one", "two", "three"):
+        assert notifier.send(text)
+    notifier.close()
+    assert api.posts == [
+        ("/botTOKEN/sendMessage", {"chat_id": "42", "text": "one\ntwo\nthree"})
+    ]
+    assert (notifier.sent, notifier.failed) == (1, 0)
+
+
+def test_rate_limit_is_retried(api):
+    api.statuses = [429, 500]
+    notifier = Notifier("TOKEN", "42", api_url=api.url, backoff=0.01, coalesce=0)
+    notifier.start().send("hello")
+    notifier.close()
+    assert [body["text"] for _, body in api.posts] == ["hello"] * 3
+    assert (notifier.sent, notifier.failed) == (1, 0)
+
+
+def test_client_error_is_not_retried(api):
+    api.statuses = [400]
+    notifier = Notifier("TOKEN", "42", api_url=api.url, backoff=0.01, coalesce=0)
+    notifier.start().send("hello")
+    notifier.close()
+    assert len(api.posts) == 1
+    assert (notifier.sent, notifier.failed) == (0, 1)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    notifier = Notifier("TOKEN", "42", queue_size=1)
+    assert notifier.send("one")
+    assert not notifier.send("two")
+    assert notifier.dropped == 1
+
+
+def test_findings_only_when_enabled(api):
+    quiet = Notifier("TOKEN", "42", api_url=api.url)
+    quiet.finding("nuclei", "a.example.com", "xss")
+    assert quiet._queue.empty()
+    loud = Notifier("TOKEN", "42", api_url=api.url, findings=True)
+    loud.finding("nuclei", "a.example.com", "xss")
+    loud.finding("subjack", None, "b.example.com is vulnerable")
+    assert [loud._queue.get_nowait() for _ in range(2)] == [
+        "[nuclei] a.example.com: xss",
+        "[subjack] b.example.com is vulnerable",
+    ]
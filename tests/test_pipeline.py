@@ -0,0 +1,87 @@
+import pytest
+
+from modules.metrics import reset_metrics
+from modules.runner import ToolTimeout, run_pool, run_tool
+from pipeline import Stage, run_stages
+from utils import SessionStore
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reset_metrics()
+    return tmp_path
+
+
+def _stages(calls, timeout=None):
+    async def job(target):
+        calls.append(target)
+        # "b" outlives the stage timeout on the first run.
+        seconds = "1" if target == "b" and timeout else "0"
+        try:
+            await run_tool(["sleep", seconds])
+        except ToolTimeout:
+            return f"partial {target}"
+        return f"scanned {target}"
+
+    return [
+        Stage("targets", lambda r: ["a", "b", "c"]),
+        Stage(
+            "scan",
+            lambda r, completed, on_result: run_pool(
+                r["targets"], job, completed=completed, on_result=on_result
+            ),
+            deps=["targets"],
+            per_target=True,
+            timeout=timeout,
+        ),
+    ]
+
+
+def test_resume_reruns_only_items_cut_short_by_the_deadline():
+    calls = []
+    store = SessionStore("example.com")
+    try:
+        results = run_stages(_stages(calls, timeout=0.5), store=store)
+        # "b" was killed at the stage deadline; "c" could not start its tool.
+        assert results["scan"] == {"a": "scanned a", "b": "partial b"}
+        assert store.stage_status("scan")[0] is False
+        assert store.stage_status("targets")[0] is True
+        assert store.load_items("scan") == {"a": "scanned a"}
+        # The partial result is still there for the reports.
+        assert store.to_dict()["results"]["scan"]["b"] == "partial b"
+    finally:
+        store.close()
+    assert calls == ["a", "b", "c"]
+
+    calls.clear()
+    reset_metrics()
+    store = SessionStore("example.com", resume=True)
+    try:
+        results = run_stages(_stages(calls), store=store)
+        assert store.stage_status("scan")[0] is True
+    finally:
+        store.close()
+    assert calls == ["b", "c"]
+    assert results["scan"] == {
+        "a": "scanned a",
+        "b": "scanned b",
+        "c": "scanned c",
+    }
+
+
+def test_completed_stage_is_restored():
+    calls = []
+    store = SessionStore("example.com")
+    try:
+        run_stages(_stages(calls), store=store)
+    finally:
+        store.close()
+    calls.clear()
+    store = SessionStore("example.com", resume=True)
+    try:
+        results = run_stages(_stages(calls), store=store)
+    finally:
+        store.close()
+    assert calls == []
+    assert results["scan"]["c"] == "scanned c"
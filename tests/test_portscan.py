@@ -0,0 +1,65 @@
+import socket
+import time
+
+from modules.portscan import parse_ports, run_connect_scan
+
+
+def test_parse_ports():
+    assert parse_ports("443, 80,8000-8002,0,70000") == [80, 443, 8000, 8001, 8002]
+    assert 443 in parse_ports(None)
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_connect_scan_finds_listening_port():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        closed = _closed_port()
+        results = run_connect_scan(["127.0.0.1"], [port, closed], timeout=1.0)
+    assert results == {"127.0.0.1": [port]}
+
+
+
+def _filtered_listener():
+    """
+    A listener whose backlog is full, so further connects hang like a
+    filtered port. Returns (listener, port, clients keeping it full).
+    """
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+    clients = []
+    for _ in range(4):
+        client = socket.socket()
+        client.setblocking(False)
+        client.connect_ex(("127.0.0.1", port))
+        clients.append(client)
+    time.sleep(0.2)
+    return listener, port, clients
+
+
+def test_host_timeout_keeps_ports_found_so_far():
+    listener, filtered, clients = _filtered_listener()
+    try:
+        with socket.socket() as open_listener:
+            open_listener.bind(("127.0.0.1", 0))
+            open_listener.listen()
+            port = open_listener.getsockname()[1]
+            started = time.monotonic()
+            results = run_connect_scan(
+                ["127.0.0.1"], [port, filtered], timeout=5.0, host_timeout=0.5
+            )
+            elapsed = time.monotonic() - started
+    finally:
+        for sock in clients + [listener]:
+            sock.close()
+    assert results == {"127.0.0.1": [port]}
+    assert elapsed < 3
+
@@ -1,15 +1,38 @@
 import os
 import json
+import sqlite3
+import threading
 from datetime import datetime
-import requests
 from cryptography.fernet import Fernet
-from fpdf import FPDF
+
+from modules.dedupe import count_names
+
+try:
+    import fcntl
+except ImportError:  # Windows: sessions are not locked.
+    fcntl = None
 
 
 def get_timestamp():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    """
+    Seconds in a duration such as "90", "45s", "15m", "2h" or "1d".
+    Raises ValueError for anything else.
+    """
+    value = str(value).strip().lower()
+    unit = _DURATION_UNITS.get(value[-1:]) if value else None
+    seconds = float(value[:-1] if unit else value) * (unit or 1)
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value}")
+    return seconds
+
+
 # ---------- Configuration Handling (Encrypted) ----------
 
 
@@ -62,149 +85,365 @@ def save_config(config_data):
 # ---------- Session State Saving/Loading ----------
 
 
-def save_state(target, state):
-    """
-    Save session state to sessions/<target>_session.json.
-    """
-    os.makedirs("sessions", exist_ok=True)
-    filename = os.path.join("sessions", f"{target}_session.json")
-    with open(filename, "w") as f:
-        json.dump(state, f, indent=2)
+class SessionBusy(RuntimeError):
+    """Raised when another run is using the same session."""
 
 
-def load_state(target):
+class SessionStore:
     """
-    Load session state from sessions/<target>_session.json.
+    Incremental session storage in sessions/<target>_session.db (SQLite).
+    Dict results are stored one row per key, so a checkpoint only writes the
+    new data, and every write is its own transaction so a crash never leaves
+    a half-written session behind.
+    Each stage carries a completion flag and a fingerprint of its input so a
+    resumed run can tell which stages are still valid.
+    A run holds sessions/<target>_session.lock while the store is open, so a
+    second run on the same target fails with SessionBusy instead of
+    resetting the session under the first.
     """
-    filename = os.path.join("sessions", f"{target}_session.json")
-    if os.path.exists(filename):
-        with open(filename) as f:
-            return json.load(f)
-    else:
-        return None
 
+    def __init__(self, target, resume=False):
+        os.makedirs("sessions", exist_ok=True)
+        self.target = target
+        self.path = os.path.join("sessions", f"{target}_session.db")
+        self._lock_file = self._acquire(
+            os.path.join("sessions", f"{target}_session.lock")
+        )
+        is_new = not os.path.exists(self.path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                "stage TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0, fingerprint TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "stage TEXT NOT NULL, item TEXT NOT NULL, value TEXT, "
+                "partial INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (stage, item))"
+            )
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(results)")
+            ]
+            if "partial" not in columns:
+                # Sessions written before results could be flagged partial.
+                self._conn.execute(
+                    "ALTER TABLE results ADD COLUMN partial INTEGER NOT NULL DEFAULT 0"
+                )
+        if not resume:
+            self.reset()
+        elif is_new:
+            # Carry over a session written by older versions as a single JSON file.
+            legacy = load_state(target)
+            if legacy:
+                self.set_meta("timestamp", legacy.get("timestamp"))
+                for stage, value in legacy.get("results", {}).items():
+                    self.save_stage(stage, value)
+        if self.get_meta("timestamp") is None:
+            self.set_meta("timestamp", get_timestamp())
+
+    def reset(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("DELETE FROM stages")
+            self._conn.execute("DELETE FROM results")
+
+    @staticmethod
+    def _acquire(path):
+        if fcntl is None:
+            return None
+        lock_file = open(path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise SessionBusy(
+                f"{path} is held by another run on the same target; wait for "
+                "it to finish."
+            )
+        return lock_file
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
 
-# ---------- Telegram Messaging ----------
+    def begin_stage(self, stage, fingerprint):
+        """
+        Mark a stage as started for the given input fingerprint.
+        Per-target results recorded earlier are kept.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO stages (stage, kind) VALUES (?, 'dict')",
+                (stage,),
+            )
+            self._conn.execute(
+                "UPDATE stages SET done = 0, fingerprint = ? WHERE stage = ?",
+                (fingerprint, stage),
+            )
 
+    def stage_status(self, stage):
+        """
+        Returns (done, fingerprint) for a stage, or (False, None) if unknown.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT done, fingerprint FROM stages WHERE stage = ?", (stage,)
+            ).fetchone()
+        return (bool(row[0]), row[1]) if row else (False, None)
+
+    def mark_done(self, stage):
+        """
+        Record completion of a stage that has no result to store.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO stages (stage, kind) VALUES (?, 'marker')",
+                (stage,),
+            )
+            self._conn.execute(
+                "UPDATE stages SET kind = 'marker', done = 1 WHERE stage = ?",
+                (stage,),
+            )
+
+    def _read_stage(self, stage, kind, complete=False):
+        rows = self._conn.execute(
+            "SELECT item, value FROM results WHERE stage = ? "
+            + ("AND partial = 0 " if complete else "")
+            + "ORDER BY rowid",
+            (stage,),
+        )
+        if kind == "dict":
+            return {item: json.loads(value) for item, value in rows}
+        row = rows.fetchone()
+        return json.loads(row[1]) if row else None
+
+    def load_stage(self, stage):
+        """
+        Return the stored result of a stage, or None if there is none.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind FROM stages WHERE stage = ?", (stage,)
+            ).fetchone()
+            if not row or row[0] == "marker":
+                return None
+            return self._read_stage(stage, row[0])
+
+    def load_items(self, stage):
+        """
+        Return the per-target results recorded so far for a stage, without
+        the ones flagged partial.
+        """
+        with self._lock:
+            return self._read_stage(stage, "dict", complete=True)
+
+    def save_stage(self, stage, value, partial=()):
+        """
+        Replace the stored result of a whole stage and mark it done.
+        With `partial` (items that were cut short), the result is stored for
+        the reports but the stage is left unfinished, and those items are
+        flagged so load_items() leaves them out.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE stage = ?", (stage,))
+            if isinstance(value, dict):
+                kind = "dict"
+                rows = [
+                    (stage, str(k), json.dumps(v), int(str(k) in partial))
+                    for k, v in value.items()
+                ]
+            else:
+                kind = "value"
+                rows = [(stage, "", json.dumps(value), int(bool(partial)))]
+            self._conn.execute(
+                "INSERT OR IGNORE INTO stages (stage, kind) VALUES (?, ?)",
+                (stage, kind),
+            )
+            self._conn.execute(
+                "UPDATE stages SET kind = ?, done = ? WHERE stage = ?",
+                (kind, int(not partial), stage),
+            )
+            self._conn.executemany(
+                "INSERT INTO results (stage, item, value, partial) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
 
-def send_telegram(bot_token, chat_id, message):
+    def save_item(self, stage, item, value):
+        """
+        Record the result for one target of a per-target stage.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO stages (stage, kind) VALUES (?, 'dict')",
+                (stage,),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (stage, item, value, partial) "
+                "VALUES (?, ?, ?, 0)",
+                (stage, item, json.dumps(value)),
+            )
+
+    def to_dict(self):
+        """
+        Rebuild the session dict ({"target", "timestamp", "results"}).
+        """
+        results = {}
+        with self._lock:
+            stages = self._conn.execute(
+                "SELECT stage, kind FROM stages ORDER BY rowid"
+            ).fetchall()
+            for stage, kind in stages:
+                if kind != "marker":
+                    results[stage] = self._read_stage(stage, kind)
+        return {
+            "target": self.target,
+            "timestamp": self.get_meta("timestamp"),
+            "results": results,
+        }
+
+
+def merge_results(a, b):
     """
-    Send a message via Telegram Bot API.
+    Combine two stage results: dicts key by key, lists without duplicates,
+    numbers summed. Otherwise the first value wins.
     """
-    try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        params = {"chat_id": chat_id, "text": message}
-        requests.get(url, params=params)
-    except Exception as e:
-        print(f"Failed to send Telegram message: {e}")
+    if isinstance(a, dict) and isinstance(b, dict):
+        merged = dict(a)
+        for key, value in b.items():
+            merged[key] = merge_results(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(a, list) and isinstance(b, list):
+        seen = {json.dumps(item, sort_keys=True) for item in a}
+        merged = list(a)
+        for item in b:
+            key = json.dumps(item, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+        return merged
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a + b
+    return a if a is not None else b
+
+
+class MultiSessionStore:
+    """
+    Session storage for a scope run. Stage names of the form "<root>/<stage>"
+    are routed to one SessionStore per root, so every root keeps the same
+    session it would have in a single-target run.
+    """
+
+    def __init__(self, label, roots, resume=False):
+        self.target = label
+        self.stores = {}
+        try:
+            for root in roots:
+                self.stores[root] = SessionStore(root, resume=resume)
+        except SessionBusy:
+            self.close()
+            raise
+        if not resume:
+            self.set_meta("timestamp", get_timestamp())
+
+    def _route(self, name):
+        root, _, stage = name.partition("/")
+        return self.stores[root], stage
+
+    def stage_status(self, name):
+        store, stage = self._route(name)
+        return store.stage_status(stage)
+
+    def begin_stage(self, name, fingerprint):
+        store, stage = self._route(name)
+        store.begin_stage(stage, fingerprint)
+
+    def mark_done(self, name):
+        store, stage = self._route(name)
+        store.mark_done(stage)
+
+    def load_stage(self, name):
+        store, stage = self._route(name)
+        return store.load_stage(stage)
 
+    def load_items(self, name):
+        store, stage = self._route(name)
+        return store.load_items(stage)
 
-# ---------- Report Generation ----------
+    def save_stage(self, name, value, partial=()):
+        store, stage = self._route(name)
+        store.save_stage(stage, value, partial)
 
+    def save_item(self, name, item, value):
+        store, stage = self._route(name)
+        store.save_item(stage, item, value)
 
-def generate_reports(session, output_prefix=None):
+    def set_meta(self, key, value):
+        for store in self.stores.values():
+            store.set_meta(key, value)
+
+    def get_meta(self, key, default=None):
+        return next(iter(self.stores.values())).get_meta(key, default)
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
+
+    def to_dict(self):
+        """
+        Combined session: every stage's results merged across roots, plus
+        a "roots" section with per-root subdomain and alive host counts.
+        """
+        results = {}
+        roots = {}
+        for root, store in self.stores.items():
+            session = store.to_dict()["results"]
+            roots[root] = {
+                "subdomains": count_names(session.get("subdomains")),
+                "alive": len(session.get("alive_domains") or []),
+            }
+            for stage, value in session.items():
+                results[stage] = (
+                    merge_results(results[stage], value) if stage in results else value
+                )
+        return {
+            "target": self.target,
+            "timestamp": self.get_meta("timestamp"),
+            "results": {"roots": roots, **results},
+        }
+
+
+def load_state(target):
     """
-    Generate reports in PDF, HTML, JSON, TXT, and CSV formats using session data.
-    Reports are saved under the 'reports/' directory.
+    Load a legacy JSON session from sessions/<target>_session.json.
     """
-    target = session.get("target")
-    timestamp = session.get("timestamp", get_timestamp())
-    results = session.get("results", {})
-
-    os.makedirs("reports", exist_ok=True)
-    prefix = output_prefix or f"{target}_recon_{timestamp}"
-
-    # JSON report
-    json_path = os.path.join("reports", prefix + ".json")
-    with open(json_path, "w") as f:
-        json.dump(session, f, indent=2)
-
-    # TXT report
-    txt_path = os.path.join("reports", prefix + ".txt")
-    with open(txt_path, "w") as f:
-        f.write(f"Report for {target} - {timestamp}\n\n")
-        for key, value in results.items():
-            f.write(f"=== {key.upper()} ===\n")
-            if isinstance(value, list):
-                for item in value:
-                    f.write(str(item) + "\n")
-            elif isinstance(value, dict):
-                for subkey, subvalue in value.items():
-                    f.write(f"{subkey}: {subvalue}\n")
-            else:
-                f.write(str(value) + "\n")
-            f.write("\n")
-
-    # CSV reports (one per section)
-    for key, value in results.items():
-        csv_path = os.path.join("reports", f"{prefix}_{key}.csv")
-        with open(csv_path, "w") as f:
-            if isinstance(value, list):
-                for item in value:
-                    if isinstance(item, (list, dict)):
-                        f.write(json.dumps(item) + "\n")
-                    else:
-                        f.write(str(item) + "\n")
-            elif isinstance(value, dict):
-                f.write("Key,Value\n")
-                for subkey, subvalue in value.items():
-                    f.write(f"{subkey},{subvalue}\n")
-            else:
-                f.write(str(value) + "\n")
-
-    # HTML report
-    html_path = os.path.join("reports", prefix + ".html")
-    logo_path = os.path.join("assets", "logo.jpeg")
-    logo_tag = ""
-    if os.path.exists(logo_path):
-        # Adjust path for HTML
-        logo_tag = (
-            f'<img src="../assets/logo.jpeg" alt="Logo" style="max-width:200px;"><br>'
-        )
-    html_content = f"""
-<html><head><title>su6oRecon Report - {target}</title></head><body>
-{logo_tag}
-<h1>su6oRecon Report for {target}</h1>
-<p><strong>Generated:</strong> {timestamp}</p>
-"""
-    for key, value in results.items():
-        html_content += f"<h2>{key.capitalize()}</h2>\n<ul>"
-        if isinstance(value, list):
-            for item in value:
-                html_content += f"<li>{item}</li>"
-        elif isinstance(value, dict):
-            for subkey, subvalue in value.items():
-                html_content += f"<li><strong>{subkey}:</strong> {subvalue}</li>"
-        else:
-            html_content += f"<li>{value}</li>"
-        html_content += "</ul>\n"
-    html_content += "</body></html>"
-    with open(html_path, "w") as f:
-        f.write(html_content)
-
-    # PDF report using FPDF
-    pdf_path = os.path.join("reports", prefix + ".pdf")
-    pdf = FPDF()
-    pdf.add_page()
-    # Logo
-    if os.path.exists(logo_path):
-        pdf.image(logo_path, x=10, y=8, w=30)
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, f"su6oRecon Report for {target}", ln=1)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, f"Generated: {timestamp}", ln=1)
-    pdf.ln(5)
-    for key, value in results.items():
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(0, 10, key.capitalize(), ln=1)
-        pdf.set_font("Arial", "", 12)
-        if isinstance(value, list):
-            for item in value:
-                pdf.multi_cell(0, 8, str(item))
-        elif isinstance(value, dict):
-            for subkey, subvalue in value.items():
-                pdf.multi_cell(0, 8, f"{subkey}: {subvalue}")
-        else:
-            pdf.multi_cell(0, 8, str(value))
-        pdf.ln(3)
-    pdf.output(pdf_path)
\ No newline at end of file
+    filename = os.path.join("sessions", f"{target}_session.json")
+    if os.path.exists(filename):
+        with open(filename) as f:
+            return json.load(f)
+    else:
+        return None